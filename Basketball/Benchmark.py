@@ -0,0 +1,435 @@
+import os
+import io
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+import PlayerStatsScraper
+import PlayerDataProcessor
+import usportsDataCleaning
+import combine
+import TeamRegistry
+from RunMetrics import quiet_logging
+
+
+BASKETBALL_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RESULTS_DIR = os.path.join(BASKETBALL_DIR, "BenchmarkResults")
+
+# Size of one real season today; --scales multiplies these
+BASE_ROWS = 15000        # player-game rows per season file
+BASE_PAGES = 100         # box-score pages parsed per engine (a sample of the ~750 per season)
+SEASONS = ["2022-23", "2023-24", "2024-25"]
+PLAYERS_PER_TEAM = 11    # players with minutes in a typical box score
+
+STAGES = ["scrape_parse", "schedule_parse", "process", "clean", "combine"]
+REGRESSION_THRESHOLD = 1.20   # flag stages that got 20% slower than the previous run
+
+FIRST_NAMES = ["Aaron", "Ben", "Cole", "Daniel", "Emanuel", "Felix", "Grant", "Hugo", "Isaac", "Jalen",
+               "Kyle", "Liam", "Marcus", "Nate", "Owen", "Parker", "Quinn", "Ryan", "Sam", "Tyler"]
+LAST_NAMES = ["Brown", "Chen", "Diallo", "Evans", "Fraser", "Gagnon", "Harris", "Ibrahim", "Jones", "King",
+              "Lee", "Martin", "Nguyen", "Osei", "Patel", "Roy", "Smith", "Tremblay", "Walker", "Young"]
+
+
+def load_teams():
+    """Return [(schedule name, full name, city, province)] for every team in TeamData.csv."""
+    team_data = pd.read_csv(os.path.join(BASKETBALL_DIR, "TeamData.csv"))
+    short_names = {}
+    for short, full in TeamRegistry.SCHEDULE_ALIASES.items():
+        short_names.setdefault(full, short)
+    teams = []
+    for row in team_data.itertuples(index=False):
+        if row.team in short_names:
+            teams.append((short_names[row.team], row.team, row.city, row.province))
+    return teams
+
+
+def generate_season_plan(season, n_rows, rng, teams):
+    """
+    Build the synthetic games of one season: a list of dicts with date,
+    away/home team tuples, scores and one stat line per player. The number
+    of games is chosen so the season has about n_rows player rows.
+    """
+    start_year = int(season[:4])
+    first_day = date(start_year, 11, 1)
+    # Names are unique within a roster so (PlayerName, Date, Team) stays a key
+    names = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    rosters = {
+        team[1]: [(rng.randint(0, 45), name) for name in rng.sample(names, PLAYERS_PER_TEAM + 3)]
+        for team in teams
+    }
+
+    games = []
+    n_games = max(1, n_rows // (2 * PLAYERS_PER_TEAM))
+    # November through early March, stretched (up to a year) when a team
+    # would otherwise need more than one game a day
+    n_days = min(364, max(130, -(-n_games * 11 // (10 * (len(teams) // 2)))))
+    playing = [set() for _ in range(n_days)]
+    for _ in range(n_games):
+        # Two teams not playing yet on the first day from a random start that
+        # has them, so (PlayerName, Date, Team) stays a key; once every day is
+        # full (scales past about x12) teams play twice a day
+        start = rng.randrange(n_days)
+        day, free = start, teams
+        for d in range(start, start + n_days):
+            idle = [team for team in teams if team[1] not in playing[d % n_days]]
+            if len(idle) >= 2:
+                day, free = d % n_days, idle
+                break
+        away, home = rng.sample(free, 2)
+        playing[day].update((away[1], home[1]))
+        games.append({
+            "date": first_day + timedelta(days=day),
+            "away": away,
+            "home": home,
+            "away_score": rng.randint(50, 110),
+            "home_score": rng.randint(50, 110),
+        })
+    games.sort(key=lambda g: g["date"])
+
+    for game in games:
+        game["lines"] = {}
+        for team in (game["away"], game["home"]):
+            lines = []
+            for idx, (jersey, name) in enumerate(rng.sample(rosters[team[1]], PLAYERS_PER_TEAM)):
+                fga = rng.randint(0, 18)
+                fgm = rng.randint(0, fga)
+                tpa = rng.randint(0, min(fga, 9))
+                tpm = rng.randint(0, min(tpa, fgm))
+                fta = rng.randint(0, 8)
+                ftm = rng.randint(0, fta)
+                reb_o, reb_d = rng.randint(0, 4), rng.randint(0, 8)
+                lines.append({
+                    "Jersey": str(jersey),
+                    "PlayerName": name,
+                    "StarterFlag": "1" if idx < 5 else "0",
+                    "Mins": str(rng.randint(1, 40)),
+                    "ThreePt_Made_Att": f"{tpm}-{tpa}",
+                    "ThreePtPct": f"{100 * tpm / tpa:.1f}" if tpa else "0.0",
+                    "FG_Made_Att": f"{fgm}-{fga}",
+                    "FGPct": f"{100 * fgm / fga:.1f}" if fga else "0.0",
+                    "FT_Made_Att": f"{ftm}-{fta}",
+                    "FTPct": f"{100 * ftm / fta:.1f}" if fta else "0.0",
+                    "Reb_Off": str(reb_o),
+                    "Reb_Def": str(reb_d),
+                    "Reb_Tot": str(reb_o + reb_d),
+                    "PF": str(rng.randint(0, 5)),
+                    "AST": str(rng.randint(0, 8)),
+                    "TO": str(rng.randint(0, 5)),
+                    "BLK": str(rng.randint(0, 3)),
+                    "STL": str(rng.randint(0, 4)),
+                    "Pts": str(2 * fgm + tpm + ftm),
+                })
+            game["lines"][team[1]] = lines
+    return games
+
+
+def game_records(season, game):
+    """Yield the raw PlayerData rows (RECORD_COLUMNS) of one synthetic game."""
+    game_date = game["date"].strftime("%a %b %d, %Y").replace(" 0", " ")
+    location = f"{game['home'][2]}, {game['home'][3]}"
+    for team, opponent in ((game["away"], game["home"]), (game["home"], game["away"])):
+        for line in game["lines"][team[1]]:
+            yield {"Season": season, "Date": game_date, "Location": location,
+                   "Team": team[1], "Opponent": opponent[1], **line}
+
+
+def write_player_games_csv(path, season, games):
+    """Write a synthetic PlayerData/playerGameData<season>.csv."""
+    rows = [rec for game in games for rec in game_records(season, game)]
+    pd.DataFrame(rows, columns=PlayerStatsScraper.RECORD_COLUMNS).to_csv(path, index=False)
+    return len(rows)
+
+
+def write_schedule_csv(path, games):
+    """
+    Write a synthetic schedule in the exported USports format: a month row,
+    then for each day a "Sun. 30" row, an Away/Home header row and the games.
+    """
+    lines = []
+    month = day = None
+    for game in games:
+        d = game["date"]
+        if d.strftime("%B") != month:
+            month = d.strftime("%B")
+            lines.append(f"{month},,,,")
+        if d != day:
+            day = d
+            lines.append(f"{d.strftime('%a')}. {d.day},,,,")
+            lines.append("Away,Home,Notes,Status,Links")
+        away = f"{game['away'][0]}{game['away_score']}"
+        home = f"{game['home'][0]}{game['home_score']}"
+        lines.append(f"{away},{home},,Final*,Box Score")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return len(lines)
+
+
+def render_boxscore_html(season, game):
+    """Render one synthetic game as a box-score page shaped like usportshoops.ca's."""
+    game_date = game["date"].strftime("%a %b %d, %Y").replace(" 0", " ")
+    home = game["home"]
+    header = ["<td>No</td><td>Player</td><td></td><td>Min</td><td>3Pt</td><td>%</td><td>FG</td><td>%</td>",
+              "<td>FT</td><td>%</td><td>O</td><td>D</td><td>T</td><td>PF</td><td>A</td><td>TO</td>",
+              "<td>B</td><td>S</td><td>Pts</td>"]
+    blocks = []
+    for team, score in ((game["away"], game["away_score"]), (game["home"], game["home_score"])):
+        rows = [f'<tr><td colspan="26"><b>{team[1]} {score}</b></td></tr>', f"<tr>{''.join(header)}</tr>"]
+        for line in game["lines"][team[1]]:
+            cells = [line["Jersey"], line["PlayerName"], "*" if line["StarterFlag"] == "1" else "&nbsp;",
+                     line["Mins"], line["ThreePt_Made_Att"], line["ThreePtPct"], line["FG_Made_Att"],
+                     line["FGPct"], line["FT_Made_Att"], line["FTPct"], line["Reb_Off"], line["Reb_Def"],
+                     line["Reb_Tot"], line["PF"], line["AST"], line["TO"], line["BLK"], line["STL"], line["Pts"]]
+            rows.append("<tr>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>")
+        rows.append("<tr><td>team-</td>" + "<td></td>" * 9 + "<td>1</td><td>2</td><td>3</td>"
+                    + "<td></td>" * 6 + "</tr>")
+        rows.append(f'<tr><td colspan="3" align="left">Totals</td><td>200</td><td>{score}</td></tr>')
+        blocks.append("\n".join(rows))
+    return f"""<html><head><title>Game Report</title></head><body>
+<h2>Men's Basketball Game Report</h2>
+<table><tr><td><table><tr><td>Date:{game_date}</td></tr><tr><td>Location:{home[2]}, {home[3]}</td></tr></table></td>
+<td><table border="0" cellpadding="1" cellspacing="1">
+<tr><td>{game['away'][1]}</td><td align="right">{game['away_score']}</td></tr>
+<tr><td>{game['home'][1]}</td><td align="right">{game['home_score']}</td></tr>
+</table></td></tr></table>
+<table width="100%">
+{blocks[0]}
+{blocks[1]}
+</table></body></html>"""
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def measure(func, track_memory=True):
+    """
+    Run func() with stdout and logging silenced and return (result, seconds, peak MB).
+    Time comes from an untraced run; peak memory from a second run under
+    tracemalloc, since tracing slows the code down.
+    """
+    with contextlib.redirect_stdout(io.StringIO()), quiet_logging():
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        peak_mb = None
+        if track_memory:
+            tracemalloc.start()
+            func()
+            peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+    return result, seconds, peak_mb
+
+
+def prepare_workspace(workdir, scale, seed):
+    """
+    Generate the synthetic inputs for one scale factor under workdir:
+    PlayerData/ season files, USportsSched_<season>.csv schedules,
+    box-score pages and a copy of TeamData.csv.
+    """
+    rng = random.Random(seed)
+    teams = load_teams()
+    os.makedirs(os.path.join(workdir, "PlayerData"), exist_ok=True)
+    shutil.copy(os.path.join(BASKETBALL_DIR, "TeamData.csv"), workdir)
+
+    plans = {}
+    for season in SEASONS:
+        games = generate_season_plan(season, int(BASE_ROWS * scale), rng, teams)
+        plans[season] = games
+        write_player_games_csv(os.path.join(workdir, "PlayerData", f"playerGameData{season}.csv"), season, games)
+        write_schedule_csv(os.path.join(workdir, f"USportsSched_{season}.csv"), games)
+
+    season = SEASONS[-1]
+    pages = [render_boxscore_html(season, plans[season][i % len(plans[season])])
+             for i in range(int(BASE_PAGES * scale))]
+    return plans, pages
+
+
+def bench_scrape_parse(workdir, pages, engine, track_memory):
+    """Parse the synthetic box scores with one engine and stream the rows to a season file."""
+    season = SEASONS[-1]
+    url = f"{PlayerStatsScraper.BASE_URL}/history/show-game-report.php?Gender=MBB&Season={season}&Gameid=1"
+
+    def run():
+        writer = PlayerStatsScraper.SeasonWriter(os.path.join(workdir, f"bench_{engine}.csv"))
+        for html in pages:
+            writer.write(PlayerStatsScraper.parse_boxscore_records(url, season, html=html, engine=engine))
+        writer.close()
+        return writer.rows_written
+
+    return measure(run, track_memory)
+
+
+def bench_schedule_parse(workdir, engine, track_memory):
+    """Parse every synthetic season schedule with one schedule parser."""
+    def run():
+        games = 0
+        for season in SEASONS:
+            path = os.path.join(workdir, f"USportsSched_{season}.csv")
+            games += len(usportsDataCleaning.parse_schedule(path, season, engine))
+        return games
+
+    return measure(run, track_memory)
+
+
+def bench_process(workdir, track_memory):
+    """process_basketball_data + save_processed_data on every synthetic season."""
+    def run():
+        rows = 0
+        with working_directory(workdir):
+            for season in SEASONS:
+                path = os.path.join("PlayerData", f"playerGameData{season}.csv")
+                df = PlayerDataProcessor.process_basketball_data(path)
+                PlayerDataProcessor.save_processed_data(df, path)
+                rows += len(df)
+        return rows
+
+    return measure(run, track_memory)
+
+
+def bench_clean(workdir, track_memory):
+    """Run the schedule cleaning stage over every synthetic season (one worker)."""
+    def run():
+        with working_directory(workdir):
+            cleaned = usportsDataCleaning.clean_all_seasons(workers=1)
+            return sum(len(pd.read_csv(path, usecols=["Season"])) for path in cleaned)
+
+    return measure(run, track_memory)
+
+
+def bench_combine(workdir, track_memory):
+    """Run the combine stage over the Home/Away files written by the clean stage."""
+    def run():
+        with working_directory(workdir):
+            combine.combine_seasons()
+            return len(pd.read_csv(os.path.join("BaseData", combine.COMBINED_FILENAME), usecols=["Season"]))
+
+    return measure(run, track_memory)
+
+
+def run_benchmarks(scales=(1, 10), stages=STAGES, track_memory=True, seed=0):
+    """
+    Generate synthetic data at every scale factor and time each pipeline stage.
+    Returns a list of result dicts (stage, scale, rows, seconds, rows_per_sec, peak_mb).
+    """
+    results = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix=f"bench_x{scale}_") as workdir:
+            print(f"\nScale x{scale}: generating synthetic data in {workdir}")
+            _, pages = prepare_workspace(workdir, scale, seed)
+
+            steps = []
+            if "scrape_parse" in stages:
+                for engine in PlayerStatsScraper.PARSER_ENGINES:
+                    steps.append((f"scrape_parse[{engine}]",
+                                  lambda engine=engine: bench_scrape_parse(workdir, pages, engine, track_memory)))
+            if "schedule_parse" in stages:
+                for engine in usportsDataCleaning.SCHEDULE_PARSERS:
+                    steps.append((f"schedule_parse[{engine}]",
+                                  lambda engine=engine: bench_schedule_parse(workdir, engine, track_memory)))
+            # clean and combine consume the output of the stage before them
+            if {"process", "clean", "combine"} & set(stages):
+                steps.append(("process", lambda: bench_process(workdir, track_memory)))
+            if {"clean", "combine"} & set(stages):
+                steps.append(("clean", lambda: bench_clean(workdir, track_memory)))
+            if "combine" in stages:
+                steps.append(("combine", lambda: bench_combine(workdir, track_memory)))
+
+            for name, step in steps:
+                rows, seconds, peak_mb = step()
+                result = {
+                    "stage": name,
+                    "scale": scale,
+                    "rows": rows,
+                    "seconds": round(seconds, 4),
+                    "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+                    "peak_mb": round(peak_mb, 2) if peak_mb is not None else None,
+                }
+                results.append(result)
+                mem = f"{result['peak_mb']:.1f} MB peak" if peak_mb is not None else "memory not tracked"
+                print(f"   {name:<22} {rows:>9} rows  {seconds:8.3f} s  {mem}")
+    return results
+
+
+def previous_results(results_dir):
+    """Return the most recent saved benchmark run, or None."""
+    if not os.path.isdir(results_dir):
+        return None
+    runs = sorted(f for f in os.listdir(results_dir) if f.startswith("benchmark_") and f.endswith(".json"))
+    if not runs:
+        return None
+    with open(os.path.join(results_dir, runs[-1]), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_with_previous(results, previous):
+    """Print the time change of every stage against the previous run and flag regressions."""
+    if previous is None:
+        print("\nNo previous benchmark run to compare with.")
+        return []
+    before = {(r["stage"], r["scale"]): r for r in previous["results"]}
+    regressions = []
+    print(f"\nCompared with run of {previous['timestamp']}:")
+    for r in results:
+        old = before.get((r["stage"], r["scale"]))
+        if not old or not old["seconds"]:
+            continue
+        ratio = r["seconds"] / old["seconds"]
+        flag = "  REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+        print(f"   {r['stage']:<22} x{r['scale']:<4} {old['seconds']:8.3f} s → {r['seconds']:8.3f} s ({ratio:.2f}x){flag}")
+        if flag:
+            regressions.append(r)
+    return regressions
+
+
+def save_results(results, results_dir, scales, seed):
+    os.makedirs(results_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    report = {
+        "timestamp": timestamp,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "scales": list(scales),
+        "seed": seed,
+        "results": results,
+    }
+    path = os.path.join(results_dir, f"benchmark_{timestamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to: {path}")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark of the scrape → process → clean → combine pipeline")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10],
+                        help="multiples of today's data size to generate (e.g. 1 10 100)")
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES,
+                        help="pipeline stages to benchmark")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc run that measures peak memory")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the data generator")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR,
+                        help="where benchmark_<timestamp>.json reports are kept")
+    args = parser.parse_args()
+
+    scales = [int(s) if float(s).is_integer() else s for s in args.scales]
+    previous = previous_results(args.results_dir)
+    results = run_benchmarks(scales, args.stages, track_memory=not args.no_memory, seed=args.seed)
+    compare_with_previous(results, previous)
+    save_results(results, args.results_dir, scales, args.seed)
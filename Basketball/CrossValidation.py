@@ -0,0 +1,318 @@
+import os
+import json
+import shutil
+import hashlib
+import argparse
+import logging
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from FeatureEngine import STARTER_CATEGORIES
+from MinutesModel import (DEFAULT_FEATURES_PATH, MODEL_FEATURES, TARGET, ALL_CATEGORIES, ACCURACY_MINUTES,
+                          design_matrix, fit_linear, error_metrics, load_features)
+from PlayerDataProcessor import file_fingerprint
+from RunMetrics import RunMetrics, setup_logging, add_logging_arguments, init_worker, collect_results
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join("BaseData", "cv_cache")
+DEFAULT_RESULTS_DIR = "CrossValidationResults"
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Expanding-window folds (train start, train end, test start, test end): the
+# README's val_splits plus one testing the 2023-24 season's second half
+DEFAULT_SPLITS = [
+    ('2022-09-30', '2023-01-31', '2023-02-01', '2023-03-31'),
+    ('2022-09-30', '2023-06-30', '2023-07-01', '2023-09-30'),
+    ('2022-09-30', '2023-09-30', '2023-10-01', '2023-12-30'),
+    ('2022-09-30', '2023-12-31', '2024-01-01', '2024-03-31'),
+]
+
+# Model configurations compared on every fold and category. Each one picks
+# its columns out of the cached design matrix, which holds all MODEL_FEATURES;
+# "mean" (no features) is the README's mean-prediction baseline.
+DEFAULT_CONFIGS = {
+    "mean": {"features": [], "ridge": 0.0},
+    "linear": {"features": MODEL_FEATURES, "ridge": 0.0},
+    "ridge": {"features": MODEL_FEATURES, "ridge": 10.0},
+    "ewm_only": {"features": ["Mins_ewm_02", "uPER_ewm_01", "Usage_Rate_ewm_01", "StarterFlag_ewm_02"],
+                 "ridge": 0.0},
+}
+
+# Categories get one model each (as in MinutesModel); ALL_CATEGORIES is one model over every row
+CATEGORIES = [category for _, category in STARTER_CATEGORIES] + [ALL_CATEGORIES]
+
+# Categories with fewer training rows than this are not evaluated on a fold
+MIN_TRAIN_ROWS = 50
+
+CACHE_MANIFEST = "folds.json"
+# Part of the cache key: bumped when the rows picked for a fold change
+CACHE_VERSION = 2
+
+
+def cache_key(features_path, splits):
+    """Cache directory name: changes with the feature file's contents, the folds or the cached columns"""
+    key = {
+        "version": CACHE_VERSION,
+        "features_sha256": file_fingerprint(features_path)["sha256"],
+        "splits": [list(split) for split in splits],
+        "columns": MODEL_FEATURES,
+        "categories": CATEGORIES,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def fold_arrays(df):
+    """Design matrix (intercept + MODEL_FEATURES), target and category codes (index in CATEGORIES) of df's rows"""
+    codes = df["Starter_Category"].map({category: code for code, category in enumerate(CATEGORIES)})
+    return {
+        "X": design_matrix(df, MODEL_FEATURES),
+        "y": df[TARGET].to_numpy(dtype=np.float64),
+        "category": codes.fillna(-1).to_numpy(dtype=np.int8),
+    }
+
+
+def next_game_dates(df):
+    """
+    Date of each row's target game, as far as the feature dataset tells: the
+    date of the player's next row (same PlayerName and Abbr). NaT for a
+    player's last row, whose target game (the player's last game) has no row.
+    The next row can be later than the target game when that game has no row
+    of its own (e.g. a team's first game of a season), never earlier.
+    """
+    order = df.sort_values(["PlayerName", "Abbr", "Date"], kind="stable")
+    return order.groupby(["PlayerName", "Abbr"], sort=False)["Date"].shift(-1).reindex(df.index)
+
+
+def build_fold_cache(features_path=DEFAULT_FEATURES_PATH, splits=DEFAULT_SPLITS, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Build every fold's train / test arrays once and save them as .npy files
+    under <cache_dir>/<cache_key>/ (fold<i>_<train|test>_<X|y|category>.npy),
+    for the workers to memory-map instead of re-slicing the feature DataFrame.
+    A cache built from the same feature file and folds is reused as is; a new
+    one is written to a .part directory and renamed into place when complete.
+    Training rows must not see the test period through their target: a row
+    dated up to train_end whose Target_Next_Mins comes from a game after
+    train_end (or from a game of unknown date, see next_game_dates) is
+    purged from the fold's training rows.
+    Returns (fold directory, manifest), the manifest listing each fold's
+    split, its train / test rows per category and the rows purged.
+    """
+    fold_dir = os.path.join(cache_dir, cache_key(features_path, splits))
+    manifest_path = os.path.join(fold_dir, CACHE_MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            logger.info("Reusing cached fold matrices in %s", fold_dir)
+            return fold_dir, json.load(f)
+
+    df = load_features(features_path)
+    next_dates = next_game_dates(df)
+    staging_dir = fold_dir + ".part"
+    if os.path.exists(staging_dir):
+        shutil.rmtree(staging_dir)
+    os.makedirs(staging_dir)
+    manifest = {"features": features_path, "columns": MODEL_FEATURES, "folds": []}
+    for fold, (train_start, train_end, test_start, test_end) in enumerate(splits):
+        entry = {"fold": fold, "split": [train_start, train_end, test_start, test_end], "rows": {}}
+        for part, start, end in (("train", train_start, train_end), ("test", test_start, test_end)):
+            in_range = (df["Date"] >= start) & (df["Date"] <= end)
+            if part == "train":
+                known_target = next_dates.notna() & (next_dates <= end)
+                entry["purged"] = int((in_range & ~known_target).sum())
+                in_range &= known_target
+            rows = df[in_range]
+            arrays = fold_arrays(rows)
+            for name, values in arrays.items():
+                np.save(os.path.join(staging_dir, f"fold{fold}_{part}_{name}.npy"), values)
+            entry["rows"][part] = {category: int(np.sum(arrays["category"] == code))
+                                   for code, category in enumerate(CATEGORIES[:-1])}
+            entry["rows"][part][ALL_CATEGORIES] = len(rows)
+        logger.info("Fold %d: train %s..%s (%d rows, %d purged), test %s..%s (%d rows)", fold, train_start,
+                    train_end, entry["rows"]["train"][ALL_CATEGORIES], entry["purged"], test_start, test_end,
+                    entry["rows"]["test"][ALL_CATEGORIES])
+        manifest["folds"].append(entry)
+    with open(os.path.join(staging_dir, CACHE_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    if os.path.exists(fold_dir):
+        shutil.rmtree(fold_dir)
+    os.rename(staging_dir, fold_dir)
+    logger.info("Cached fold matrices in %s", fold_dir)
+    return fold_dir, manifest
+
+
+def load_fold(fold_dir, fold, part, category):
+    """Memory-map one fold part and return the (X, y) rows of category"""
+    arrays = {name: np.load(os.path.join(fold_dir, f"fold{fold}_{part}_{name}.npy"), mmap_mode="r")
+              for name in ("X", "y", "category")}
+    if category == ALL_CATEGORIES:
+        return np.asarray(arrays["X"]), np.asarray(arrays["y"])
+    rows = arrays["category"] == CATEGORIES.index(category)
+    return arrays["X"][rows], arrays["y"][rows]
+
+
+def evaluate_task(fold_dir, fold, category, config_name, config):
+    """
+    Fit one config on one fold's training rows of category and score it on
+    the fold's test rows of that category (one pool task).
+    Returns a dict with the task, the test 'rows', 'mae', 'rmse',
+    'within_5', the seconds spent loading, fitting and predicting, and
+    'error' (the exception, or None).
+    """
+    result = {"fold": fold, "category": category, "config": config_name, "train_rows": 0,
+              "rows": 0, "mae": None, "rmse": None, "within_5": None, "error": None}
+    try:
+        start = time.perf_counter()
+        X_train, y_train = load_fold(fold_dir, fold, "train", category)
+        X_test, y_test = load_fold(fold_dir, fold, "test", category)
+        columns = [0] + [1 + MODEL_FEATURES.index(feature) for feature in config["features"]]
+        X_train, X_test = X_train[:, columns], X_test[:, columns]
+        result["load_seconds"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        coefs = fit_linear(X_train, y_train, config["ridge"])
+        result["fit_seconds"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        predicted = X_test @ coefs
+        result["predict_seconds"] = time.perf_counter() - start
+        result["train_rows"] = len(y_train)
+        result.update(error_metrics(y_test, predicted))
+    except Exception as e:
+        result["error"] = e
+    return result
+
+
+def summarize(results):
+    """
+    Comparison table of each config and category over all folds: test rows,
+    MAE, RMSE and ±ACCURACY_MINUTES accuracy pooled over the folds' test
+    rows, and the mean seconds per fold
+    """
+    df = pd.DataFrame(results)
+    df["seconds"] = df[["load_seconds", "fit_seconds", "predict_seconds"]].sum(axis=1)
+    df["abs_error"] = df["mae"] * df["rows"]
+    df["sq_error"] = df["rmse"] ** 2 * df["rows"]
+    df["accurate"] = df["within_5"] * df["rows"]
+    summary = df.groupby(["config", "category"], sort=False).agg(
+        folds=("fold", "count"), rows=("rows", "sum"), abs_error=("abs_error", "sum"),
+        sq_error=("sq_error", "sum"), accurate=("accurate", "sum"), seconds_per_fold=("seconds", "mean"))
+    summary["mae"] = summary["abs_error"] / summary["rows"]
+    summary["rmse"] = np.sqrt(summary["sq_error"] / summary["rows"])
+    summary["within_5"] = summary["accurate"] / summary["rows"]
+    return summary[["folds", "rows", "mae", "rmse", "within_5", "seconds_per_fold"]].reset_index()
+
+
+def run_cross_validation(features_path=DEFAULT_FEATURES_PATH, splits=DEFAULT_SPLITS, configs=DEFAULT_CONFIGS,
+                         cache_dir=DEFAULT_CACHE_DIR, results_dir=DEFAULT_RESULTS_DIR, workers=DEFAULT_WORKERS):
+    """
+    Time-series cross-validation of the minutes model configurations:
+      1. Build (or reuse) each fold's cached train / test matrices (build_fold_cache)
+      2. Evaluate every fold × category × config in a pool of `workers`
+         processes (workers=1 runs them one by one in this process); a
+         category with fewer than MIN_TRAIN_ROWS training rows or no test
+         rows on a fold is skipped there
+      3. Write the per-task results (with their timings) and the comparison
+         table (summarize) to <results_dir>/cv_<timestamp>_folds.csv and
+         cv_<timestamp>_summary.csv, plus a run report
+    Returns the comparison table.
+    """
+    metrics = RunMetrics("cross_validation")
+    with metrics.timed("cache"):
+        fold_dir, manifest = build_fold_cache(features_path, splits, cache_dir)
+
+    tasks = []
+    for entry in manifest["folds"]:
+        for category in CATEGORIES:
+            train_rows, test_rows = entry["rows"]["train"][category], entry["rows"]["test"][category]
+            if train_rows < MIN_TRAIN_ROWS or not test_rows:
+                logger.warning("Fold %d: skipping %s (%d train / %d test rows)", entry["fold"], category,
+                               train_rows, test_rows)
+                metrics.count("tasks_skipped", len(configs))
+                continue
+            tasks.extend((entry["fold"], category, name) for name in configs)
+    if not tasks:
+        logger.warning("No fold has enough rows to evaluate")
+        return None
+
+    workers = max(1, min(workers, len(tasks)))
+    logger.info("Evaluating %d fold(s) × %d categories × %d config(s) (%d tasks) with %d worker(s)",
+                len(manifest["folds"]), len(CATEGORIES), len(configs), len(tasks), workers)
+    results = []
+    executor = None
+    if workers == 1:
+        outcomes = (evaluate_task(fold_dir, fold, category, name, configs[name]) for fold, category, name in tasks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                       initargs=(logging.getLogger().getEffectiveLevel(),))
+        outcomes = collect_results([executor.submit(evaluate_task, fold_dir, fold, category, name, configs[name])
+                                    for fold, category, name in tasks])
+    try:
+        with metrics.timed("evaluate") as t:
+            for (fold, category, name), result in zip(tasks, outcomes):
+                if result["error"] is not None:
+                    logger.error("Failed fold %d / %s / %s: %s", fold, category, name, result["error"])
+                    metrics.record_error(f"fold{fold}/{category}/{name}", result["error"])
+                    continue
+                for stage in ("load", "fit", "predict"):
+                    metrics.observe(f"{stage}_ms", 1000 * result[f"{stage}_seconds"])
+                results.append(result)
+                t.rows += result["rows"]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if not results:
+        logger.error("Every task failed")
+        return None
+
+    summary = summarize(results)
+    os.makedirs(results_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    folds_path = os.path.join(results_dir, f"cv_{timestamp}_folds.csv")
+    summary_path = os.path.join(results_dir, f"cv_{timestamp}_summary.csv")
+    splits_by_fold = {entry["fold"]: entry["split"] for entry in manifest["folds"]}
+    per_fold = pd.DataFrame(results).drop(columns="error")
+    per_fold.insert(1, "test_start", per_fold["fold"].map(lambda fold: splits_by_fold[fold][2]))
+    per_fold.insert(2, "test_end", per_fold["fold"].map(lambda fold: splits_by_fold[fold][3]))
+    per_fold.to_csv(folds_path, index=False)
+    summary.to_csv(summary_path, index=False)
+
+    metrics.count("tasks", len(results))
+    metrics.note("cache_dir", fold_dir)
+    metrics.note("configs", dict(configs))
+    report_path = metrics.write_report(os.path.join(results_dir, f"cv_{timestamp}_report.json"))
+
+    print(f"\nCross-validation over {len(manifest['folds'])} fold(s) (MAE / RMSE in minutes, "
+          f"accuracy = within ±{ACCURACY_MINUTES} min):")
+    print(f"   {'config':<10} {'category':<12} {'rows':>6} {'MAE':>7} {'RMSE':>7} {'±5 min':>7} {'s/fold':>8}")
+    for row in summary.itertuples(index=False):
+        print(f"   {row.config:<10} {row.category:<12} {row.rows:>6} {row.mae:7.2f} {row.rmse:7.2f} "
+              f"{100 * row.within_5:6.1f}% {row.seconds_per_fold:8.4f}")
+    logger.info("Per-fold results saved to: %s", folds_path)
+    logger.info("Comparison table saved to: %s", summary_path)
+    logger.info("Run report saved to: %s", report_path)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Expanding-window cross-validation of the minutes model "
+                                                 "configurations per player category")
+    parser.add_argument("--features", default=DEFAULT_FEATURES_PATH, help="feature dataset (FeatureEngine.py output)")
+    parser.add_argument("--split", nargs=4, action="append", metavar=("TRAIN_START", "TRAIN_END", "TEST_START",
+                                                                      "TEST_END"),
+                        help="a fold's date range (repeat for several folds; default: the README's splits)")
+    parser.add_argument("--configs", nargs="+", choices=list(DEFAULT_CONFIGS), default=list(DEFAULT_CONFIGS),
+                        help="model configurations to compare")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="where the fold matrices are cached")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR, help="where the result tables are written")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="fold tasks evaluated in parallel (1 = no process pool)")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(quiet=args.quiet, verbose=args.verbose)
+    run_cross_validation(args.features, [tuple(split) for split in args.split] if args.split else DEFAULT_SPLITS,
+                         {name: DEFAULT_CONFIGS[name] for name in args.configs}, args.cache_dir, args.results_dir,
+                         args.workers)
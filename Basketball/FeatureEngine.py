@@ -0,0 +1,596 @@
+import os
+import json
+import copy
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from PlayerDataProcessor import (load_processed_data, iter_processed_data, processed_source, to_processed_dtypes,
+                                 DEFAULT_CHUNK_ROWS)
+from RunMetrics import RunMetrics, setup_logging, add_logging_arguments
+from TeamRegistry import load_team_registry
+from combine import find_inputs, DEDUPE_KEYS
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet sources are then never read (see processed_source)
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+FEATURES_FILENAME = "basketball_minutes_features_FINAL.csv"
+FEATURE_ROWS_FILENAME = "minutes_features_all_players.csv"
+FEATURE_STATE_FILENAME = "feature_state.json"
+# Bumped when the saved FeatureState layout changes; an older state is rebuilt
+FEATURE_STATE_VERSION = 2
+
+MIN_MINUTES = 6     # shorter appearances (garbage time) are left out
+MIN_GAMES = 30      # players with fewer games (of MIN_MINUTES+) are left out of the final dataset
+REST_DAYS_CAP = 7   # season breaks would otherwise give 200+ day rests
+
+# Feature → (per-game value it smooths, EWM alpha). Every EWM is of the
+# player's earlier games only (shift(1)), so a row never sees its own game.
+EWM_FEATURES = {
+    "Mins_ewm_02": ("Mins", 0.2),
+    "uPER_ewm_01": ("uPER", 0.1),
+    "Usage_Rate_ewm_01": ("Usage_Rate", 0.1),
+    "StarterFlag_ewm_02": ("StarterFlag", 0.2),
+}
+
+# Lowest StarterFlag_ewm_02 of each category, highest first
+STARTER_CATEGORIES = [(0.6, "Starter"), (0.2, "Role Player"), (0.0, "Bench")]
+
+SEASON_PHASES = {7: "Early Season", 8: "Early Season", 9: "Early Season", 10: "Early Season",
+                 11: "Non-Conference", 12: "Non-Conference",
+                 1: "Conference Play", 2: "Conference Play",
+                 3: "Tournament", 4: "Tournament", 5: "Tournament", 6: "Tournament"}
+
+FEATURE_COLUMNS = ["PlayerName", "Date", "Abbr", "Is_Home", "Is_Away", "Is_Neutral", "Rest_Days",
+                   "Team_Avg_Minutes_Season", "Mins_ewm_02", "uPER_ewm_01", "Usage_Rate_ewm_01",
+                   "StarterFlag_ewm_02", "Target_Next_Mins", "Starter_Category", "Year", "Month",
+                   "DayOfYear", "Season_Phase"]
+
+# A player's history is kept per team: the same name on two teams is two players
+PLAYER_KEYS = ["PlayerName", "Abbr"]
+
+# Columns of a game kept until the player's next game supplies its target
+PENDING_COLUMNS = ["PlayerName", "Date", "Abbr", "HomeAway", "Rest_Days", "Team_Avg_Minutes_Season",
+                   *EWM_FEATURES]
+
+# Running totals behind the per-game ratings: league-wide, and per team, both
+# restarting every season
+LEAGUE_TOTALS = ["Pts", "FGA", "FGM", "FTA", "FTM", "Reb_O", "Reb_T", "AST", "TO", "PF"]
+TEAM_TOTALS = ["Rows", "Mins", "Possessions", "AST", "FGM"]
+
+
+def usage_possessions(games):
+    """Possessions a player used: FGA + 0.44 FTA + TO"""
+    return games["FGA"] + 0.44 * games["FTA"] + games["TO"]
+
+
+def game_rates(games, league, team):
+    """
+    uPER and usage rate of each game. league holds the league totals
+    (LEAGUE_TOTALS) and team the totals of the player's team (TEAM_TOTALS),
+    as scalars or arrays aligned with games; both cover the season's games up
+    to and including the game's date, so no rating uses later games.
+      uPER        Hollinger's unadjusted PER, not divided by minutes
+      Usage_Rate  100 × possessions used × (team minutes / 5) / (minutes × team possessions)
+    Returns (uPER, Usage_Rate) as float arrays.
+    """
+    g = {col: np.asarray(games[col], dtype=np.float64)
+         for col in ["3PTM", "AST", "FGM", "FGA", "FTM", "FTA", "TO", "Reb_O", "Reb_T", "STL", "BLK", "PF", "Mins"]}
+    vop = league["Pts"] / (league["FGA"] - league["Reb_O"] + league["TO"] + 0.44 * league["FTA"])
+    drb = (league["Reb_T"] - league["Reb_O"]) / league["Reb_T"]
+    factor = 2 / 3 - (0.5 * (league["AST"] / league["FGM"])) / (2 * (league["FGM"] / league["FTM"]))
+    foul_value = league["FTM"] / league["PF"] - 0.44 * (league["FTA"] / league["PF"]) * vop
+    assisted = team["AST"] / team["FGM"]
+
+    uper = (g["3PTM"] + 2 / 3 * g["AST"]
+            + (2 - factor * assisted) * g["FGM"]
+            + g["FTM"] * 0.5 * (1 + (1 - assisted) + 2 / 3 * assisted)
+            - vop * g["TO"]
+            - vop * drb * (g["FGA"] - g["FGM"])
+            - vop * 0.44 * (0.44 + 0.56 * drb) * (g["FTA"] - g["FTM"])
+            + vop * (1 - drb) * (g["Reb_T"] - g["Reb_O"])
+            + vop * drb * g["Reb_O"]
+            + vop * g["STL"]
+            + vop * drb * g["BLK"]
+            - g["PF"] * foul_value)
+    usage = 100 * usage_possessions(g) * (team["Mins"] / 5) / (g["Mins"] * team["Possessions"])
+    return uper, usage
+
+
+def date_seasons(dates):
+    """Season ("2023-24") of each date: a season runs from July to June"""
+    dates = pd.to_datetime(pd.Series(dates))
+    first_year = dates.dt.year - (dates.dt.month < 7)
+    return first_year.astype(str) + "-" + ((first_year + 1) % 100).astype(str).str.zfill(2)
+
+
+def prepare_games(games):
+    """
+    Games that feed the features: one row per (PlayerName, Date, Team) with
+    MIN_MINUTES+ played, sorted by player, team and date. Teams are keyed by
+    their registry abbreviation (filled in where a season file has no Abbr),
+    and every game has its Season (from its date where a file has none).
+    """
+    games = games.drop_duplicates(DEDUPE_KEYS)
+    games = games[games["Mins"] >= MIN_MINUTES].copy()
+    for col in ["PlayerName", "Abbr", "HomeAway", "Season"]:
+        games[col] = games[col].astype(object) if col in games.columns else None
+    registry = load_team_registry()
+    games["Abbr"] = games["Abbr"].fillna(pd.Series(registry.abbrs_of(registry.ids(games["Team"])), index=games.index))
+    games["Season"] = games["Season"].fillna(pd.Series(date_seasons(games["Date"]).to_numpy(), index=games.index))
+    games = games[games["Abbr"].notna()]
+    games["StarterFlag"] = games["StarterFlag"].astype(np.float64)
+    games["Possessions"] = usage_possessions(games)
+    games["Rows"] = 1
+    return games.sort_values([*PLAYER_KEYS, "Date"], kind="stable").reset_index(drop=True)
+
+
+def load_games(input_dir="PlayerDataHomeAway"):
+    """Every cleaned season in input_dir as one frame"""
+    inputs = find_inputs(input_dir)
+    if not inputs:
+        raise FileNotFoundError(f"No season files found in {input_dir}")
+    return to_processed_dtypes(pd.concat([load_processed_data(path) for path in inputs], ignore_index=True))
+
+
+def file_season(path):
+    """Season of a cleaned season file, read from its first row (None if it has no Season)"""
+    source = processed_source(path)
+    if source.endswith(".parquet"):
+        parquet = pq.ParquetFile(source)
+        if "Season" not in parquet.schema_arrow.names or not parquet.metadata.num_rows:
+            return None
+        season = next(parquet.iter_batches(batch_size=1, columns=["Season"])).column(0)[0].as_py()
+    else:
+        first = pd.read_csv(source, nrows=1)
+        season = first["Season"].iloc[0] if "Season" in first.columns and len(first) else None
+    return None if pd.isna(season) else str(season)
+
+
+def load_new_games(inputs, state, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Games of the season files inputs (paths as listed by find_inputs) dated
+    after state.last_date, without loading the whole archive:
+      1. Files of seasons before the state's season are skipped unread (every
+         date in them is before last_date, seasons do not overlap)
+      2. Parquet files are read with a Date filter, so row groups of earlier
+         games are skipped; CSV files are streamed chunk_rows rows at a time
+         and filtered, so only the new rows are kept in memory
+    """
+    frames = []
+    for path in inputs:
+        season = file_season(path)
+        if state.season is not None and season is not None and season < state.season:
+            logger.debug("Skipping %s: season %s is before the feature state's %s", path, season, state.season)
+            continue
+        source = processed_source(path)
+        if source.endswith(".parquet"):
+            frames.append(pd.read_parquet(source, engine="pyarrow", filters=[("Date", ">", state.last_date)]))
+        else:
+            frames.extend(chunk[chunk["Date"] > state.last_date] for chunk in iter_processed_data(source, chunk_rows))
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=["PlayerName", "Date", "Team", "Mins", "StarterFlag"])
+    return to_processed_dtypes(pd.concat([frame.dropna(axis=1, how="all") for frame in frames], ignore_index=True))
+
+
+def finish_rows(rows):
+    """
+    Turn completed rows (PENDING_COLUMNS + Target_Next_Mins) into the
+    FEATURE_COLUMNS layout: location flags, starter category and calendar
+    columns. Rows missing a feature (a player's first game, a team's first
+    date) are dropped.
+    """
+    rows = rows.dropna(subset=["Rest_Days", "Team_Avg_Minutes_Season", *EWM_FEATURES, "Target_Next_Mins"])
+    rows = rows.assign(Date=pd.to_datetime(rows["Date"]))
+    home_away = rows["HomeAway"].astype(object)
+    return pd.DataFrame({
+        "PlayerName": rows["PlayerName"].astype(object),
+        "Date": rows["Date"],
+        "Abbr": rows["Abbr"].astype(object),
+        "Is_Home": (home_away == "Home").astype(np.int64),
+        "Is_Away": (home_away == "Away").astype(np.int64),
+        "Is_Neutral": (~home_away.isin(["Home", "Away"])).astype(np.int64),
+        "Rest_Days": rows["Rest_Days"].astype(np.float64),
+        "Team_Avg_Minutes_Season": rows["Team_Avg_Minutes_Season"].astype(np.float64),
+        **{feature: rows[feature].astype(np.float64) for feature in EWM_FEATURES},
+        "Target_Next_Mins": rows["Target_Next_Mins"].astype(np.float64),
+        "Starter_Category": starter_categories(rows["StarterFlag_ewm_02"]),
+        "Year": rows["Date"].dt.year.astype(np.int64),
+        "Month": rows["Date"].dt.month.astype(np.int64),
+        "DayOfYear": rows["Date"].dt.dayofyear.astype(np.int64),
+        "Season_Phase": rows["Date"].dt.month.map(SEASON_PHASES),
+    })[FEATURE_COLUMNS].reset_index(drop=True)
+
+
+def starter_categories(starter_ewm):
+    """Starter_Category of each StarterFlag_ewm_02 value"""
+    starter_ewm = np.asarray(starter_ewm, dtype=np.float64)
+    return np.select([starter_ewm >= low for low, _ in STARTER_CATEGORIES],
+                     [name for _, name in STARTER_CATEGORIES], default="Bench")
+
+
+def json_value(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.date().isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def player_keys(df):
+    """(PlayerName, Abbr) of each row, to match against FeatureState.players"""
+    return pd.MultiIndex.from_arrays([df["PlayerName"].astype(object), df["Abbr"].astype(object)])
+
+
+class FeatureState:
+    """
+    Everything needed to compute the features of the next games without
+    looking at earlier games again:
+      season   season of the last game; league and team totals are of this season
+      league   running LEAGUE_TOTALS of the season's games so far
+      teams    abbr → running TEAM_TOTALS of the season (rows and minutes give
+               the team's season average)
+      players  (name, abbr) → games played, last game date, numerator and
+               weight sum of each EWM, and the last game's features (pending
+               until the next game gives its Target_Next_Mins)
+    add_games() updates it game by game in constant time per game;
+    build_features() produces the same state for a whole history at once.
+    """
+
+    def __init__(self):
+        self.last_date = None
+        self.season = None
+        self.league = {col: 0.0 for col in LEAGUE_TOTALS}
+        self.teams = {}
+        self.players = {}
+
+    def add_games(self, games):
+        """
+        Add games played after last_date and return the rows they complete
+        (each player's previous game, now that its target is known), in the
+        FEATURE_COLUMNS layout. Games on or before last_date would change
+        features already written: rebuild instead.
+        """
+        if len(games):
+            games = prepare_games(games)
+        if len(games) == 0:
+            return finish_rows(pd.DataFrame(columns=PENDING_COLUMNS + ["Target_Next_Mins"]))
+        if self.last_date is not None and games["Date"].min() <= self.last_date:
+            raise ValueError(f"Games on or before {self.last_date.date()} are already in the feature state; "
+                             "rebuild the features instead of updating them")
+
+        completed = []
+        for date, day in games.groupby("Date", sort=True):
+            season = day["Season"].max()
+            if season != self.season:
+                self.season = season
+                self.league = {col: 0.0 for col in LEAGUE_TOTALS}
+                self.teams = {}
+            team_average = {abbr: team["Mins"] / team["Rows"] if team["Rows"] else np.nan
+                            for abbr, team in self.teams.items()}
+            for col in LEAGUE_TOTALS:
+                self.league[col] += float(day[col].sum())
+            for abbr, totals in day.groupby("Abbr", observed=True)[TEAM_TOTALS].sum().iterrows():
+                team = self.teams.setdefault(abbr, {col: 0.0 for col in TEAM_TOTALS})
+                for col in TEAM_TOTALS:
+                    team[col] += float(totals[col])
+            team = {col: np.array([self.teams[abbr][col] for abbr in day["Abbr"]]) for col in TEAM_TOTALS}
+            uper, usage = game_rates(day, self.league, team)
+
+            for row, uper_value, usage_value in zip(day.itertuples(index=False), uper, usage):
+                values = {"Mins": row.Mins, "uPER": uper_value, "Usage_Rate": usage_value,
+                          "StarterFlag": row.StarterFlag}
+                player = self.players.setdefault((row.PlayerName, row.Abbr), {
+                    "games": 0, "last_date": None, "ewm": {feature: [0.0, 0.0] for feature in EWM_FEATURES},
+                    "pending": None})
+                if player["pending"] is not None:
+                    completed.append({**player["pending"], "Target_Next_Mins": row.Mins})
+                rest = (min((date - player["last_date"]).days, REST_DAYS_CAP)
+                        if player["last_date"] is not None else np.nan)
+                player["pending"] = {
+                    "PlayerName": row.PlayerName, "Date": date, "Abbr": row.Abbr, "HomeAway": row.HomeAway,
+                    "Rest_Days": rest, "Team_Avg_Minutes_Season": team_average.get(row.Abbr, np.nan),
+                    **{feature: weights[0] / weights[1] if weights[1] else np.nan
+                       for feature, weights in player["ewm"].items()},
+                }
+                for feature, (source, alpha) in EWM_FEATURES.items():
+                    weights = player["ewm"][feature]
+                    weights[0] *= 1 - alpha
+                    weights[1] *= 1 - alpha
+                    if not np.isnan(values[source]):
+                        weights[0] += values[source]
+                        weights[1] += 1
+                player["games"] += 1
+                player["last_date"] = date
+            self.last_date = date
+        return finish_rows(pd.DataFrame(completed, columns=PENDING_COLUMNS + ["Target_Next_Mins"]))
+
+    def snapshot(self):
+        """Deep copy of the state's values, for restore()"""
+        return copy.deepcopy(vars(self))
+
+    def restore(self, snapshot):
+        """Put the state back to an earlier snapshot()"""
+        vars(self).update(snapshot)
+
+    def final_players(self):
+        """(name, abbr) of the players with MIN_GAMES or more games: the ones kept in the final dataset"""
+        return {key for key, player in self.players.items() if player["games"] >= MIN_GAMES}
+
+    def to_dict(self):
+        return {
+            "version": FEATURE_STATE_VERSION,
+            "last_date": json_value(self.last_date),
+            "season": self.season,
+            "league": self.league,
+            "teams": self.teams,
+            "players": [{"name": name, "abbr": abbr, "games": player["games"],
+                         "last_date": json_value(player["last_date"]), "ewm": player["ewm"],
+                         "pending": {col: json_value(value) for col, value in player["pending"].items()}}
+                        for (name, abbr), player in self.players.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != FEATURE_STATE_VERSION:
+            raise ValueError(f"Feature state version {data.get('version')} is not {FEATURE_STATE_VERSION}; "
+                             "rebuild the features")
+        state = cls()
+        state.last_date = pd.Timestamp(data["last_date"]) if data["last_date"] else None
+        state.season = data["season"]
+        state.league = data["league"]
+        state.teams = data["teams"]
+        for player in data["players"]:
+            pending = {col: np.nan if value is None else value for col, value in player["pending"].items()}
+            pending["Date"] = pd.Timestamp(pending["Date"])
+            state.players[player["name"], player["abbr"]] = {
+                "games": player["games"], "last_date": pd.Timestamp(player["last_date"]),
+                "ewm": player["ewm"], "pending": pending}
+        return state
+
+    def save(self, path):
+        """Atomically write the state as JSON and return its path"""
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(path + ".tmp", path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def build_features(games):
+    """
+    Compute the features of a whole game history at once:
+      1. Running league and team totals of the season by date → uPER and
+         Usage_Rate of every game
+      2. Team average minutes over the team's earlier dates of the season
+      3. Per player and team: shift(1) EWMs, rest days (capped), next game's
+         minutes as the target
+    Returns (rows in the FEATURE_COLUMNS layout for every player, FeatureState
+    after the last game), the same as feeding the games to add_games().
+    """
+    games = prepare_games(games)
+    state = FeatureState()
+    if len(games) == 0:
+        return finish_rows(pd.DataFrame(columns=PENDING_COLUMNS + ["Target_Next_Mins"])), state
+
+    # 1. League and team totals of the season through each game's date
+    daily = games.groupby(["Season", "Date"])[LEAGUE_TOTALS].sum()
+    league = daily.groupby(level="Season").cumsum().reindex(pd.MultiIndex.from_arrays([games["Season"], games["Date"]]))
+    team_daily = games.groupby(["Season", "Abbr", "Date"], observed=True)[TEAM_TOTALS].sum()
+    team_totals = team_daily.groupby(level=["Season", "Abbr"], observed=True).cumsum()
+    team = team_totals.reindex(pd.MultiIndex.from_arrays([games["Season"], games["Abbr"], games["Date"]]))
+    uper, usage = game_rates(games, {col: league[col].to_numpy() for col in LEAGUE_TOTALS},
+                             {col: team[col].to_numpy() for col in TEAM_TOTALS})
+    games["uPER"] = uper
+    games["Usage_Rate"] = usage
+
+    # 2. Team average minutes before each date
+    before = team_totals - team_daily
+    average = (before["Mins"] / before["Rows"].where(before["Rows"] > 0)).reindex(team.index)
+    games["Team_Avg_Minutes_Season"] = average.to_numpy()
+
+    # 3. Player history
+    by_player = games.groupby(PLAYER_KEYS, sort=False)
+    for feature, (source, alpha) in EWM_FEATURES.items():
+        shifted = by_player[source].shift(1)
+        games[feature] = shifted.groupby([games[key] for key in PLAYER_KEYS], sort=False).ewm(alpha=alpha).mean() \
+            .reset_index(level=[0, 1], drop=True).reindex(games.index)
+    games["Rest_Days"] = by_player["Date"].diff().dt.days.clip(upper=REST_DAYS_CAP)
+    games["Target_Next_Mins"] = by_player["Mins"].shift(-1)
+
+    # State: running totals, and per player the EWM sums over every game (weight (1 - alpha) ** games since)
+    games_since = by_player.cumcount(ascending=False).to_numpy()
+    is_last = games_since == 0
+    state.last_date = games["Date"].max()
+    state.season = games.loc[games["Date"] == state.last_date, "Season"].max()
+    state.league = {col: float(daily.loc[state.season, col].sum()) for col in LEAGUE_TOTALS}
+    last_totals = team_totals.loc[state.season].groupby(level="Abbr", observed=True).last()
+    state.teams = {abbr: {col: float(totals[col]) for col in TEAM_TOTALS} for abbr, totals in last_totals.iterrows()}
+    ewm_sums = {}
+    for feature, (source, alpha) in EWM_FEATURES.items():
+        weight = (1 - alpha) ** games_since * games[source].notna().to_numpy()
+        ewm_sums[feature] = pd.DataFrame({"numerator": weight * games[source].fillna(0).to_numpy(),
+                                          "weight": weight}).groupby([games[key] for key in PLAYER_KEYS],
+                                                                     sort=False).sum()
+    counts = by_player.size()
+    for row in games.loc[is_last, PENDING_COLUMNS].itertuples(index=False):
+        key = (row.PlayerName, row.Abbr)
+        state.players[key] = {
+            "games": int(counts[key]),
+            "last_date": row.Date,
+            "ewm": {feature: [float(sums.at[key, "numerator"]), float(sums.at[key, "weight"])]
+                    for feature, sums in ewm_sums.items()},
+            "pending": dict(zip(PENDING_COLUMNS, row)),
+        }
+    return finish_rows(games[~is_last]), state
+
+
+def write_csv(df, path):
+    """Write a CSV through a .part file, replacing path only once it is complete"""
+    df.to_csv(path + ".part", index=False)
+    os.replace(path + ".part", path)
+    return path
+
+
+def final_rows(rows, state):
+    """The rows of players with MIN_GAMES+ games, by player, team and date"""
+    final = rows[player_keys(rows).isin(state.final_players())]
+    return final.sort_values([*PLAYER_KEYS, "Date"], kind="stable")
+
+
+def read_player_rows(rows_path, players, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Rows of the given (name, abbr) players in a feature rows file, streamed chunk_rows rows at a time"""
+    frames = [chunk[player_keys(chunk).isin(players)]
+              for chunk in pd.read_csv(rows_path, parse_dates=["Date"], chunksize=chunk_rows)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=FEATURE_COLUMNS)
+
+
+def feature_paths(output_dir):
+    """(rows, final dataset, state) paths in output_dir"""
+    return (os.path.join(output_dir, FEATURE_ROWS_FILENAME), os.path.join(output_dir, FEATURES_FILENAME),
+            os.path.join(output_dir, FEATURE_STATE_FILENAME))
+
+
+def save_features(rows, state, output_dir="BaseData"):
+    """
+    Write the outputs of a rebuild: every completed row, the final dataset
+    (final_rows) and the state. Returns the final dataset's rows.
+    """
+    rows_path, final_path, state_path = feature_paths(output_dir)
+    write_csv(rows, rows_path)
+    final = final_rows(rows, state)
+    write_csv(final, final_path)
+    state.save(state_path)
+    return final
+
+
+def update_features(state, games, output_dir="BaseData"):
+    """
+    Add games (dated after state.last_date) to state and append what they
+    complete to the outputs in output_dir, without rewriting them:
+      1. The completed rows are appended to the rows file
+      2. Those of players with MIN_GAMES+ games are appended to the final
+         dataset, together with the earlier rows of players who reached
+         MIN_GAMES in this update (read back from the rows file)
+      3. The state is saved
+    Appended rows follow the existing ones (in date order) rather than being
+    sorted in by player; a rebuild sorts the whole dataset again. If a step
+    fails, both files are truncated back to their previous size and state is
+    restored to what it was, so state and outputs stay in step and the same
+    games can be added again. Returns (completed rows, final dataset rows added).
+    """
+    rows_path, final_path, state_path = feature_paths(output_dir)
+    sizes = {path: os.path.getsize(path) for path in (rows_path, final_path)}
+    snapshot = state.snapshot()
+    try:
+        qualified = state.final_players()
+        rows = state.add_games(games)
+        newly_qualified = state.final_players() - qualified
+        final = rows[player_keys(rows).isin(state.final_players())]
+        if newly_qualified:
+            final = pd.concat([read_player_rows(rows_path, newly_qualified), final], ignore_index=True)
+            final = final.sort_values([*PLAYER_KEYS, "Date"], kind="stable")
+
+        rows.to_csv(rows_path, mode="a", header=False, index=False)
+        final.to_csv(final_path, mode="a", header=False, index=False)
+        state.save(state_path)
+    except BaseException:
+        for path, size in sizes.items():
+            os.truncate(path, size)
+        state.restore(snapshot)
+        raise
+    return rows, final
+
+
+def load_state(output_dir="BaseData"):
+    """The saved FeatureState of output_dir, or None if there is none (or it is of an older version)"""
+    rows_path, final_path, state_path = feature_paths(output_dir)
+    if not all(os.path.exists(path) for path in (rows_path, final_path, state_path)):
+        return None
+    try:
+        return FeatureState.load(state_path)
+    except ValueError as e:
+        logger.warning("Ignoring the saved feature state: %s", e)
+        return None
+
+
+def generate_features(input_dir="PlayerDataHomeAway", output_dir="BaseData", update=False):
+    """
+    Build BaseData/basketball_minutes_features_FINAL.csv from the cleaned seasons.
+      update=False  rebuild every feature from the full history (vectorized)
+      update=True   load the saved FeatureState, read only the games after its
+                    last date (load_new_games) and add them, updating each
+                    player and team in constant time and appending to the
+                    outputs (update_features); falls back to a rebuild when
+                    there is no saved state
+    The completed rows of every player are kept in minutes_features_all_players.csv,
+    the state in feature_state.json, and a run report in
+    feature_run_report.json, all in output_dir.
+    Returns the path of the final dataset.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    final_path = feature_paths(output_dir)[1]
+    metrics = RunMetrics("features")
+
+    state = load_state(output_dir) if update else None
+    if update and state is None:
+        logger.info("No saved feature state in %s: rebuilding", output_dir)
+        update = False
+
+    with metrics.timed("load") as t:
+        if update:
+            inputs = find_inputs(input_dir)
+            if not inputs:
+                raise FileNotFoundError(f"No season files found in {input_dir}")
+            games = load_new_games(inputs, state)
+            logger.info("Feature state is up to %s: %d new game rows", state.last_date.date(), len(games))
+        else:
+            games = load_games(input_dir)
+        t.rows = len(games)
+
+    if update:
+        with metrics.timed("update") as t:
+            rows, final = update_features(state, games, output_dir)
+            t.rows = len(games)
+    else:
+        with metrics.timed("features") as t:
+            rows, state = build_features(games)
+            t.rows = len(games)
+        with metrics.timed("save") as t:
+            final = save_features(rows, state, output_dir)
+            t.rows = len(final)
+
+    metrics.count("rows_added", len(rows))
+    metrics.count("final_rows_added", len(final))
+    metrics.count("final_players", len(state.final_players()))
+    report_path = metrics.write_report(os.path.join(output_dir, "feature_run_report.json"))
+    logger.info("%s %d feature rows; final dataset: %d rows %s, %d players with %d+ games → %s",
+                "Added" if update else "Built", len(rows), len(final), "appended" if update else "written",
+                len(state.final_players()), MIN_GAMES, final_path)
+    logger.info("Run report saved to: %s", report_path)
+    return final_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the minutes-prediction feature dataset from the cleaned seasons")
+    parser.add_argument("--input-dir", default="PlayerDataHomeAway", help="directory with the cleaned seasons")
+    parser.add_argument("--output-dir", default="BaseData", help="directory for the features and their state")
+    parser.add_argument("--update", action="store_true",
+                        help="only add games after the saved feature state instead of rebuilding")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(quiet=args.quiet, verbose=args.verbose)
+    generate_features(args.input_dir, args.output_dir, args.update)
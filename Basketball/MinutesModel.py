@@ -0,0 +1,155 @@
+import os
+import json
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from FeatureEngine import FEATURES_FILENAME, STARTER_CATEGORIES, starter_categories
+from RunMetrics import setup_logging, add_logging_arguments
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEATURES_PATH = os.path.join("BaseData", FEATURES_FILENAME)
+DEFAULT_MODEL_PATH = os.path.join("BaseData", "minutes_model.json")
+
+# Is_Neutral is left out: the three location flags sum to 1, which the intercept already covers
+MODEL_FEATURES = ["Is_Home", "Is_Away", "Rest_Days", "Team_Avg_Minutes_Season",
+                  "Mins_ewm_02", "uPER_ewm_01", "Usage_Rate_ewm_01", "StarterFlag_ewm_02"]
+TARGET = "Target_Next_Mins"
+
+# Name of the model fitted on every row, used for a category with too few rows of its own
+ALL_CATEGORIES = "All"
+
+# A prediction within this many minutes of the actual minutes counts as accurate
+ACCURACY_MINUTES = 5
+
+
+def design_matrix(df, features):
+    """Intercept column followed by the feature columns, as float64"""
+    X = np.empty((len(df), len(features) + 1), dtype=np.float64)
+    X[:, 0] = 1.0
+    X[:, 1:] = df[features].to_numpy(dtype=np.float64)
+    return X
+
+
+def fit_linear(X, y, ridge=0.0):
+    """Least-squares coefficients of X → y; ridge > 0 shrinks every coefficient but the intercept"""
+    if ridge > 0:
+        penalty = np.sqrt(ridge) * np.eye(X.shape[1])[1:]
+        X = np.vstack([X, penalty])
+        y = np.concatenate([y, np.zeros(len(penalty))])
+    coefs, *_ = np.linalg.lstsq(X, y, rcond=None)
+    return coefs
+
+
+def error_metrics(actual, predicted):
+    """MAE, RMSE and share of predictions within ACCURACY_MINUTES of the actual minutes"""
+    errors = np.asarray(predicted, dtype=np.float64) - np.asarray(actual, dtype=np.float64)
+    if len(errors) == 0:
+        return {"rows": 0, "mae": None, "rmse": None, "within_5": None}
+    return {
+        "rows": int(len(errors)),
+        "mae": float(np.mean(np.abs(errors))),
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+        "within_5": float(np.mean(np.abs(errors) <= ACCURACY_MINUTES)),
+    }
+
+
+class MinutesModel:
+    """
+    Baseline minutes model from the modeling plan in the README: one linear
+    regression of Target_Next_Mins per Starter_Category (Bench / Role
+    Player / Starter), fitted with numpy least squares, plus one over all
+    rows for categories with fewer than min_rows training rows.
+    """
+
+    def __init__(self, features=MODEL_FEATURES, ridge=0.0, min_rows=50):
+        self.features = list(features)
+        self.ridge = ridge
+        self.min_rows = min_rows
+        self.coefs = {}   # category → coefficients (intercept first)
+
+    def fit(self, df):
+        self.coefs = {ALL_CATEGORIES: fit_linear(design_matrix(df, self.features), df[TARGET].to_numpy(np.float64),
+                                                 self.ridge)}
+        for category, rows in df.groupby("Starter_Category"):
+            if len(rows) >= self.min_rows:
+                self.coefs[category] = fit_linear(design_matrix(rows, self.features),
+                                                  rows[TARGET].to_numpy(np.float64), self.ridge)
+        logger.debug("Fitted %s on %d rows", ", ".join(self.coefs), len(df))
+        return self
+
+    def predict(self, df, categories=None):
+        """
+        Predicted minutes of each row; categories defaults to the row's
+        Starter_Category (or the category of its StarterFlag_ewm_02)
+        """
+        if categories is None:
+            categories = (df["Starter_Category"].to_numpy() if "Starter_Category" in df.columns
+                          else starter_categories(df["StarterFlag_ewm_02"]))
+        categories = np.asarray(categories, dtype=object)
+        X = design_matrix(df, self.features)
+        predicted = np.full(len(df), np.nan)
+        for category in pd.unique(categories):
+            rows = categories == category
+            predicted[rows] = X[rows] @ self.coefs.get(category, self.coefs[ALL_CATEGORIES])
+        return predicted
+
+    def evaluate(self, df):
+        """error_metrics overall and per Starter_Category"""
+        predicted = self.predict(df)
+        results = {ALL_CATEGORIES: error_metrics(df[TARGET], predicted)}
+        for _, category in STARTER_CATEGORIES:
+            rows = (df["Starter_Category"] == category).to_numpy()
+            results[category] = error_metrics(df[TARGET].to_numpy()[rows], predicted[rows])
+        return results
+
+    def to_dict(self):
+        return {"features": self.features, "ridge": self.ridge, "min_rows": self.min_rows,
+                "coefs": {category: coefs.tolist() for category, coefs in self.coefs.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        model = cls(data["features"], data["ridge"], data["min_rows"])
+        model.coefs = {category: np.array(coefs) for category, coefs in data["coefs"].items()}
+        return model
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        """Atomically write the model as JSON and return its path"""
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(path + ".tmp", path)
+        return path
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def load_features(path=DEFAULT_FEATURES_PATH):
+    return pd.read_csv(path, parse_dates=["Date"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit the baseline minutes model on the feature dataset")
+    parser.add_argument("--features", default=DEFAULT_FEATURES_PATH, help="feature dataset (FeatureEngine.py output)")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="where to save the fitted model")
+    parser.add_argument("--test-year", type=int,
+                        help="fit on the years before this one and report errors on it (the README's split)")
+    parser.add_argument("--ridge", type=float, default=0.0, help="ridge penalty of the coefficients")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(quiet=args.quiet, verbose=args.verbose)
+
+    features = load_features(args.features)
+    train = features[features["Year"] < args.test_year] if args.test_year else features
+    model = MinutesModel(ridge=args.ridge).fit(train)
+    evaluated = features[features["Year"] == args.test_year] if args.test_year else train
+    for category, metrics in model.evaluate(evaluated).items():
+        if metrics["rows"]:
+            logger.info("%-12s %6d rows  MAE %.2f  RMSE %.2f  within ±%d min %.1f%%", category, metrics["rows"],
+                        metrics["mae"], metrics["rmse"], ACCURACY_MINUTES, 100 * metrics["within_5"])
+    logger.info("Model saved to: %s", model.save(args.model))
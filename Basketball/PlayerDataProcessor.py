@@ -1,227 +1,862 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime
 import os
-import re
+import io
+import json
+import time
+import hashlib
+import argparse
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
-def process_basketball_data(csv_file_path):
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = None
+    pq = None
+HAVE_PYARROW = pa is not None
+
+from RunMetrics import RunMetrics, setup_logging, add_logging_arguments, init_worker, collect_results
+from StatsStore import StatsStore, STATS_SUFFIX, is_season_input
+from TeamRegistry import load_team_registry
+
+logger = logging.getLogger(__name__)
+
+# Declared column types of the processed player-game data, used for the typed
+# Parquet output. Repetitive text columns are categorical, box-score counts are
+# small integers; percentages stay float64 so values are unchanged.
+PROCESSED_DTYPES = {
+    'Season': 'category',
+    'Date': 'datetime64[ns]',
+    'Location': 'category',
+    'Team': 'category',
+    'Opponent': 'category',
+    'Abbr': 'category',
+    'Jersey': 'float32',
+    'PlayerName': 'category',
+    'StarterFlag': 'bool',
+    'Mins': 'int16',
+    'Reb_O': 'int16', 'Reb_D': 'int16', 'Reb_T': 'int16',
+    'PF': 'int16', 'AST': 'int16', 'TO': 'int16', 'BLK': 'int16', 'STL': 'int16', 'Pts': 'int16',
+    '3PTM': 'int16', '3PTA': 'int16', 'FGM': 'int16', 'FGA': 'int16', 'FTM': 'int16', 'FTA': 'int16',
+    '3PT_Pct': 'float64', 'FG_Pct': 'float64', 'FT_Pct': 'float64',
+    'TS_Pct': 'float64', 'eFG_Pct': 'float64',
+    'HomeAway': 'category',
+}
+
+# Compact in-memory mode (compact_dtypes): text columns with at most this
+# share of distinct values become categoricals
+COMPACT_CATEGORY_MAX_RATIO = 0.5
+
+# Output formats of save_processed_data
+PROCESSED_FORMATS = ('csv', 'parquet', 'both')
+DEFAULT_PROCESSED_FORMAT = 'both' if HAVE_PYARROW else 'csv'
+
+# Season files processed in parallel by process_all_csv_files
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Rows per chunk in the bounded-memory streaming mode
+DEFAULT_CHUNK_ROWS = 50000
+
+# Made-attempted ("X-Y") columns and the (made, attempted) columns they are split into
+MADE_ATTEMPTED_COLUMNS = {
+    'ThreePt_Made_Att': ['3PTM', '3PTA'],
+    'FG_Made_Att': ['FGM', 'FGA'],
+    'FT_Made_Att': ['FTM', 'FTA']
+}
+MADE_ATTEMPTED_PATTERN = r'^([^-]*)(?:-([^-]*))?'
+DIGIT_0, DIGIT_9, DASH = ord('0'), ord('9'), ord('-')
+PERCENTAGE_COLUMNS = ['ThreePtPct', 'FGPct', 'FTPct']
+NUMERIC_COLUMNS = ['Jersey', 'Mins', 'Reb_Off', 'Reb_Def', 'Reb_Tot',
+                   'PF', 'AST', 'TO', 'BLK', 'STL', 'Pts']
+COLUMN_RENAMES = {
+    'ThreePtPct': '3PT_Pct',
+    'FGPct': 'FG_Pct',
+    'FTPct': 'FT_Pct',
+    'Reb_Off': 'Reb_O',
+    'Reb_Def': 'Reb_D',
+    'Reb_Tot': 'Reb_T'
+}
+
+def split_made_attempted(values):
+    """
+    Split an object array of "X-Y" strings into (made, attempted) int arrays.
+    Fast path: when every value is plain digits-dash-digits, the numbers are
+    read straight from the fixed-width unicode code points, with no per-value
+    Python strings. Anything else (missing values, "-", "1-2-3", ...) goes
+    through the general path: regex extraction + to_numeric, with unparsable
+    parts counted as 0, the same as str.split('-') + to_numeric.
+    """
+    if len(values) and pd.api.types.infer_dtype(values, skipna=False) == 'string':
+        codes = values.astype(str)
+        width = codes.dtype.itemsize // 4
+        codes = codes.view(np.uint32).reshape(len(values), width)
+        filled = codes != 0
+        is_digit = (codes >= DIGIT_0) & (codes <= DIGIT_9)
+        is_dash = codes == DASH
+        dash = is_dash.argmax(axis=1)[:, None]
+        pos = np.arange(width)
+        before = pos < dash
+        after = (pos > dash) & filled
+        plain = ((is_dash.sum(axis=1) == 1) & (dash[:, 0] > 0) & after.any(axis=1)
+                 & (is_digit | is_dash | ~filled).all(axis=1)
+                 & (filled[:, :-1] >= filled[:, 1:]).all(axis=1))
+        if plain.all():
+            # Read both numbers digit by digit, one character column at a time
+            made = np.zeros(len(values), dtype=np.int64)
+            attempted = np.zeros(len(values), dtype=np.int64)
+            for j in range(width):
+                digit = codes[:, j].astype(np.int64) - DIGIT_0
+                made = np.where(before[:, j], made * 10 + digit, made)
+                attempted = np.where(after[:, j], attempted * 10 + digit, attempted)
+            return made, attempted
+
+    parts = pd.Series(values).str.extract(MADE_ATTEMPTED_PATTERN).to_numpy()
+    made = np.nan_to_num(pd.to_numeric(parts[:, 0], errors='coerce'), nan=0).astype(int)
+    attempted = np.nan_to_num(pd.to_numeric(parts[:, 1], errors='coerce'), nan=0).astype(int)
+    return made, attempted
+
+def load_team_info(team_data_path='TeamData.csv'):
+    """
+    Load the team registry (TeamData.csv plus every known alias, see
+    TeamRegistry) once for process_basketball_data.
+    """
+    return load_team_registry(team_data_path)
+
+def process_basketball_data(csv_file_path, team_info=None, compact=False, with_types=False):
     """
     Process basketball CSV data by:
     1. Converting Date column to datetime
     2. Splitting X-Y columns into separate Made and Attempted columns
     3. Converting numeric columns to appropriate types
     4. Adding calculated columns like shooting percentages
+    5. Adding team abbreviations and removing exhibition games
+    6. Renaming columns to the preferred format
+    Every output column is computed once as an array; the result frame is
+    built in a single step from the rows that survive the exhibition filter,
+    already in final column order and with final names.
+    team_info is the result of load_team_info(); it is loaded here if not given.
+    With compact=True the result is shrunk by compact_dtypes (in memory only).
+    With with_types=True (read_dtypes, numeric_dtypes) of the file as read
+    (see scan_column_types) are returned after the frame, for the process
+    manifest, without reading the file again.
     """
     
     # Load the data
-    print(f"Loading data from: {csv_file_path}")
+    logger.info("Loading data from: %s", csv_file_path)
     df = pd.read_csv(csv_file_path)
-    print(f"Original shape: {df.shape}")
+    logger.info("Original shape: %s", df.shape)
+    types = (dict(df.dtypes), numeric_column_types(df)) if with_types else None
+
+    df = transform_player_games(df, team_info or load_team_info())
+
+    logger.info("Final shape: %s", df.shape)
+    df = compact_with_report(df) if compact else df
+    return (df, types) if with_types else df
+
+def transform_player_games(df, team_info, numeric_dtypes=None):
+    """
+    Steps 1-6 of process_basketball_data on an already loaded frame: the
+    whole file, or one chunk of it in streaming mode. numeric_dtypes
+    ({column: dtype}, see scan_column_types) forces the dtype of the converted
+    numeric columns, so every chunk gets the types the whole file would.
+    """
+    columns = {}   # source column name -> converted values
     
     # 1. Convert Date column to datetime
-    print("\n1. Converting Date column to datetime...")
-    df['Date'] = pd.to_datetime(df['Date'], format='%a %b %d, %Y')
-    print(f"Date column converted. Sample: {df['Date'].iloc[0]}")
-    
-    # 2. Split X-Y columns into separate Made and Attempted columns
-    print("\n2. Splitting X-Y columns...")
+    logger.debug("1. Converting Date column to datetime...")
+    columns['Date'] = pd.to_datetime(df['Date'], format='%a %b %d, %Y').to_numpy()
     
-    # Define columns to split
-    columns_to_split = {
-        'ThreePt_Made_Att': ['3PTM', '3PTA'],
-        'FG_Made_Att': ['FGM', 'FGA'], 
-        'FT_Made_Att': ['FTM', 'FTA']
-    }
+    # 2. Split all X-Y columns with one extraction over the stacked columns
+    logger.debug("2. Splitting X-Y columns...")
+    split_cols = [col for col in MADE_ATTEMPTED_COLUMNS if col in df.columns]
+    made_attempted = {}
+    if split_cols:
+        stacked = np.concatenate([df[col].to_numpy() for col in split_cols])
+        made, attempted = split_made_attempted(stacked)
+        for k, col in enumerate(split_cols):
+            made_col, att_col = MADE_ATTEMPTED_COLUMNS[col]
+            made_attempted[made_col] = made[k * len(df):(k + 1) * len(df)]
+            made_attempted[att_col] = attempted[k * len(df):(k + 1) * len(df)]
     
-    for col, new_cols in columns_to_split.items():
+    # 3. Convert percentage and other numeric columns
+    logger.debug("3. Converting percentage and numeric columns...")
+    for col in PERCENTAGE_COLUMNS:
         if col in df.columns:
-            print(f"  Splitting {col} into {new_cols[0]} and {new_cols[1]}")
-            
-            # Split the X-Y format
-            split_data = df[col].str.split('-', expand=True)
-            
-            # Convert to numeric, handling any non-numeric values
-            df[new_cols[0]] = pd.to_numeric(split_data[0], errors='coerce').fillna(0).astype(int)
-            df[new_cols[1]] = pd.to_numeric(split_data[1], errors='coerce').fillna(0).astype(int)
-            
-            # Drop the original column
-            df = df.drop(columns=[col])
-    
-    # 3. Convert percentage columns to numeric (remove % sign)
-    print("\n3. Converting percentage columns...")
-    percentage_cols = ['ThreePtPct', 'FGPct', 'FTPct']
-    for col in percentage_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            print(f"  Converted {col}")
-    
-    # 4. Convert other numeric columns
-    print("\n4. Converting other numeric columns...")
-    numeric_cols = ['Jersey', 'Mins', 'Reb_Off', 'Reb_Def', 'Reb_Tot', 
-                   'PF', 'AST', 'TO', 'BLK', 'STL', 'Pts']
-    
-    for col in numeric_cols:
+            columns[col] = pd.to_numeric(df[col], errors='coerce').to_numpy()
+    for col in NUMERIC_COLUMNS:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    
-    # Convert StarterFlag to boolean
+            columns[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy()
+    if numeric_dtypes:
+        for col, dtype in numeric_dtypes.items():
+            if col in columns:
+                columns[col] = columns[col].astype(dtype, copy=False)
     if 'StarterFlag' in df.columns:
-        df['StarterFlag'] = df['StarterFlag'].astype(bool)
-        print("  Converted StarterFlag to boolean")
-    
-    # 5. Calculate additional useful columns
-    print("\n5. Adding calculated columns...")
-    
-    # True shooting percentage: TS% = PTS / (2 * (FGA + 0.44 * FTA))
-    df['TS_Pct'] = np.where(
-        (df['FGA'] + 0.44 * df['FTA']) > 0,
-        df['Pts'] / (2 * (df['FGA'] + 0.44 * df['FTA'])) * 100,
-        0
-    )
-    df['TS_Pct'] = df['TS_Pct'].round(2)
-    
-    # Effective field goal percentage: eFG% = (FGM + 0.5 * 3PTM) / FGA
-    df['eFG_Pct'] = np.where(
-        df['FGA'] > 0,
-        (df['FGM'] + 0.5 * df['3PTM']) / df['FGA'] * 100,
-        0
-    )
-    df['eFG_Pct'] = df['eFG_Pct'].round(2)
-
-    # Minutes played as float
-    df['Mins'] = pd.to_numeric(df['Mins'], errors='coerce').fillna(0)
-    
-    print(f"\nFinal shape: {df.shape}")
-    print(f"Added columns: TS_Pct, eFG_Pct")
-
-    # 6. Add Team Abbrevitions
-     # Read team data
-    team_data = pd.read_csv('TeamData.csv')
-    # Create a dictionary of team names to abbreviations
-    team_abbr_dict = dict(zip(team_data['team'], team_data['abbr']))
-
-     # Add abbreviation column
-    df['Abbr'] = df['Team'].map(team_abbr_dict)
-    
-    # Reorder columns to put Abbr before Jersey
-    cols = list(df.columns)
-    jersey_idx = cols.index('Jersey')
-    cols.remove('Abbr')
-    cols.insert(jersey_idx, 'Abbr')
-    df = df[cols]
-
-    # 7. Remove Exhibition Games
-    valid_teams = set(team_data['team'])
-    df = df[
-        df['Team'].isin(valid_teams) & 
-        df['Opponent'].isin(valid_teams)
-        ]
-
-
-    # 8. Rename columns to preferred format
-    print("\n6. Renaming columns...")
-    column_mapping = {
-        'ThreePtPct': '3PT_Pct',
-        'FGPct': 'FG_Pct',
-        'FTPct': 'FT_Pct',
-        'Reb_Off': 'Reb_O',
-        'Reb_Def': 'Reb_D',
-        'Reb_Tot': 'Reb_T'
-    }
-    
-    df = df.rename(columns=column_mapping)
-    
-    for old_name, new_name in column_mapping.items():
-        if old_name in df.columns:
-            print(f"  Renamed {old_name} to {new_name}")
-    
-    return df
-
-def save_processed_data(df, original_file_path):
-    """Save the processed data with a new filename"""
-    # Create PlayerData directory if it doesn't exist
+        columns['StarterFlag'] = df['StarterFlag'].astype(bool).to_numpy()
+    
+    # 4. Calculate additional useful columns
+    logger.debug("4. Adding calculated columns...")
+    pts, fgm, fga = columns['Pts'], made_attempted['FGM'], made_attempted['FGA']
+    three_pm, fta = made_attempted['3PTM'], made_attempted['FTA']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # True shooting percentage: TS% = PTS / (2 * (FGA + 0.44 * FTA))
+        shot_attempts = fga + 0.44 * fta
+        ts_pct = np.where(shot_attempts > 0, pts / (2 * shot_attempts) * 100, 0).round(2)
+        # Effective field goal percentage: eFG% = (FGM + 0.5 * 3PTM) / FGA
+        efg_pct = np.where(fga > 0, (fgm + 0.5 * three_pm) / fga * 100, 0).round(2)
+    calculated = {'TS_Pct': ts_pct, 'eFG_Pct': efg_pct}
+
+    # 5. Add Team Abbreviations (before Jersey) and remove exhibition games
+    #    (kept: both teams are listed in TeamData.csv, spelled exactly as there)
+    logger.debug("5. Adding team abbreviations...")
+    team_ids = team_info.ids(df['Team'], exact=True)
+    columns['Abbr'] = team_info.abbrs_of(team_ids)
+    keep = team_info.is_listed(team_ids) & team_info.is_listed(team_info.ids(df['Opponent'], exact=True))
+
+    # 6. Build the result in final column order with final names
+    logger.debug("6. Renaming columns...")
+    order = []
+    for col in df.columns:
+        if col in MADE_ATTEMPTED_COLUMNS:
+            continue
+        if col == 'Jersey':
+            order.append('Abbr')
+        order.append(col)
+    data = {}
+    for col in order:
+        values = columns[col] if col in columns else df[col].to_numpy()
+        data[COLUMN_RENAMES.get(col, col)] = values[keep]
+    for col, values in {**made_attempted, **calculated}.items():
+        data[col] = values[keep]
+    return pd.DataFrame(data, index=df.index[keep], copy=False)
+
+def to_processed_dtypes(df):
+    """
+    Return df with the columns listed in PROCESSED_DTYPES cast to their declared
+    types. Integer columns with missing values (e.g. after concatenating files
+    with different columns) are left as they are.
+    """
+    dtypes = {col: dtype for col, dtype in PROCESSED_DTYPES.items()
+              if col in df.columns and str(df[col].dtype) != dtype
+              and not (dtype.startswith('int') and df[col].isna().any())}
+    return df.astype(dtypes) if dtypes else df
+
+def processed_paths(original_file_path):
+    """Return the (CSV, Parquet) output paths for an input file, creating PlayerDataProcessed/"""
     player_data_dir = "PlayerDataProcessed"
     os.makedirs(player_data_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(original_file_path))[0]
+    return (os.path.join(player_data_dir, f"{base_name}_processed.csv"),
+            os.path.join(player_data_dir, f"{base_name}_processed.parquet"))
 
-    # Create new filename
+def processed_stats_path(original_file_path):
+    """
+    Return the path of the StatsStore saved next to the processed outputs of
+    an input file, or None for a checkpoint or combined input (no stats are
+    kept for those, as a season file already counts their rows)
+    """
+    if not is_season_input(original_file_path):
+        return None
+    player_data_dir = "PlayerDataProcessed"
+    os.makedirs(player_data_dir, exist_ok=True)
     base_name = os.path.splitext(os.path.basename(original_file_path))[0]
-    new_file_path = os.path.join(player_data_dir, f"{base_name}_processed.csv")
+    return os.path.join(player_data_dir, f"{base_name}{STATS_SUFFIX}")
+
+def check_output_format(output_format):
+    if output_format not in PROCESSED_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}' (have: {', '.join(PROCESSED_FORMATS)})")
+    if output_format != 'csv' and not HAVE_PYARROW:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+
+def save_processed_data(df, original_file_path, output_format=DEFAULT_PROCESSED_FORMAT):
+    """
+    Save the processed data with a new filename.
+    output_format is 'csv', 'parquet' (typed, see PROCESSED_DTYPES) or 'both'.
+    Returns the path of the CSV file, or of the Parquet file when no CSV is written.
+    """
+    check_output_format(output_format)
+
+    csv_path, parquet_path = processed_paths(original_file_path)
     
     # Save processed data
-    df.to_csv(new_file_path, index=False)
-    print(f"\nProcessed data saved to: {new_file_path}")
+    if output_format in ('csv', 'both'):
+        df.to_csv(csv_path, index=False)
+        logger.info("Processed data saved to: %s", csv_path)
+    if output_format in ('parquet', 'both'):
+        save_typed_parquet(df, parquet_path)
+        logger.info("Typed Parquet saved to: %s", parquet_path)
     
-    return new_file_path
+    return parquet_path if output_format == 'parquet' else csv_path
 
-def display_data_info(df):
-    """Display information about the processed data"""
-    
-    print("\n" + "="*60)
-    print("DATA SUMMARY")
-    print("="*60)
-    
-    print(f"Total rows: {len(df)}")
-    print(f"Total columns: {len(df.columns)}")
-    print(f"Date range: {df['Date'].min()} to {df['Date'].max()}")
-    print(f"Number of unique players: {df['PlayerName'].nunique()}")
-    print(f"Number of unique teams: {df['Team'].nunique()}")
-    
-    print("\nColumn types:")
-    print(df.dtypes)
-    
-    print(f"\nSample of processed data:")
-    print(df.head(3).to_string())
-    
-    print(f"\nBasic statistics:")
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    print(df[numeric_cols].describe())
+def save_typed_parquet(df, parquet_path):
+    """Write df as Parquet with the PROCESSED_DTYPES schema (atomically, via a .part file)"""
+    df = to_processed_dtypes(df).reset_index(drop=True)
+    df.to_parquet(parquet_path + ".part", index=False, engine="pyarrow")
+    os.replace(parquet_path + ".part", parquet_path)
+
+def merge_dtypes(dtypes):
+    """The dtype a column gets when parts read with these dtypes are read as one"""
+    dtypes = set(dtypes)
+    if len(dtypes) == 1:
+        return dtypes.pop()
+    if all(pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in dtypes):
+        return np.result_type(*dtypes)
+    return np.dtype(object)
+
+def numeric_column_types(df):
+    """{column: dtype to_numeric gives it} of df's percentage and numeric columns"""
+    return {col: pd.to_numeric(df[col], errors='coerce').dtype
+            for col in PERCENTAGE_COLUMNS + NUMERIC_COLUMNS if col in df.columns}
+
+def scan_column_types(csv_file_path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    First pass of the streaming mode. pandas infers column types per chunk, so
+    a chunk without missing jersey numbers would get int64 where the whole
+    file gets float64. Reading the file once chunk by chunk gives:
+      read_dtypes    → {column: dtype a whole-file read_csv gives it}
+      numeric_dtypes → {column: dtype to_numeric gives it over the whole file}
+    """
+    read_types = {}
+    numeric_types = {}
+    for chunk in pd.read_csv(csv_file_path, chunksize=chunk_rows):
+        for col, dtype in chunk.dtypes.items():
+            read_types.setdefault(col, set()).add(dtype)
+        for col, dtype in numeric_column_types(chunk).items():
+            numeric_types.setdefault(col, set()).add(dtype)
+    return ({col: merge_dtypes(types) for col, types in read_types.items()},
+            {col: merge_dtypes(types) for col, types in numeric_types.items()})
+
+def process_file_chunked(csv_file_path, output_format=DEFAULT_PROCESSED_FORMAT,
+                         chunk_rows=DEFAULT_CHUNK_ROWS, team_info=None, stats=None):
+    """
+    Bounded-memory version of process_basketball_data + save_processed_data:
+    the file is read, transformed, filtered and written chunk_rows rows at a
+    time, so peak memory follows chunk_rows instead of the file size.
+    Column types are fixed up front by scan_column_types, so the output is
+    identical to processing the whole file at once. Each processed chunk is
+    added to stats (a StatsStore), if given.
+    Returns (path of the saved file, rows written, (read_dtypes, numeric_dtypes))
+    with the column types found by the scan.
+    """
+    check_output_format(output_format)
+    team_info = team_info or load_team_info()
+    csv_path, parquet_path = processed_paths(csv_file_path)
+    write_csv = output_format in ('csv', 'both')
+    write_parquet = output_format in ('parquet', 'both')
+
+    logger.info("Streaming %s in chunks of %d rows", csv_file_path, chunk_rows)
+    read_dtypes, numeric_dtypes = scan_column_types(csv_file_path, chunk_rows)
+
+    rows = 0
+    chunks = 0
+    parquet_writer = None
+    try:
+        for chunk in pd.read_csv(csv_file_path, dtype=read_dtypes, chunksize=chunk_rows):
+            if len(chunk) == 0:
+                continue
+            df = transform_player_games(chunk, team_info, numeric_dtypes)
+            if stats is not None:
+                stats.update(df)
+            if write_csv:
+                df.to_csv(csv_path + ".part", mode='a' if chunks else 'w', header=not chunks, index=False)
+            if write_parquet:
+                table = pa.Table.from_pandas(to_processed_dtypes(df), preserve_index=False)
+                if parquet_writer is None:
+                    # Category codes get wider as chunks add categories: use int32 indices throughout
+                    schema = pa.schema([field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+                                        if pa.types.is_dictionary(field.type) else field
+                                        for field in table.schema], metadata=table.schema.metadata)
+                    parquet_writer = pq.ParquetWriter(parquet_path + ".part", schema)
+                parquet_writer.write_table(table.cast(parquet_writer.schema))
+            rows += len(df)
+            chunks += 1
+            logger.debug("Chunk %d: %d rows kept of %d", chunks, len(df), len(chunk))
+    except BaseException:
+        if parquet_writer is not None:
+            parquet_writer.close()
+        for part in (csv_path + ".part", parquet_path + ".part"):
+            if os.path.exists(part):
+                os.remove(part)
+        raise
+
+    if not chunks:
+        # Header-only file: nothing to stream, the whole-file path writes the empty output
+        df = process_basketball_data(csv_file_path, team_info)
+        if stats is not None:
+            stats.update(df)
+        return save_processed_data(df, csv_file_path, output_format), 0, (read_dtypes, numeric_dtypes)
+
+    if write_csv:
+        os.replace(csv_path + ".part", csv_path)
+        logger.info("Processed data saved to: %s", csv_path)
+    if parquet_writer is not None:
+        parquet_writer.close()
+        os.replace(parquet_path + ".part", parquet_path)
+        logger.info("Typed Parquet saved to: %s", parquet_path)
+    logger.info("Streamed %d rows in %d chunk(s)", rows, chunks)
+    return (parquet_path if output_format == 'parquet' else csv_path), rows, (read_dtypes, numeric_dtypes)
+
+def processed_source(path):
+    """
+    Return the file load_processed_data reads for path: the Parquet file next
+    to the CSV with the same base name when it is at least as new as the CSV,
+    otherwise the CSV.
+    """
+    base, ext = os.path.splitext(path)
+    parquet_path = base + ".parquet"
+    csv_path = base + ".csv"
+    if HAVE_PYARROW and os.path.exists(parquet_path) and (
+            ext == ".parquet" or not os.path.exists(csv_path)
+            or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)):
+        return parquet_path
+    return csv_path
 
-def process_all_csv_files(directory_path="PlayerData"):
-    """Process all CSV files in the PlayerData directory"""
+def parse_processed_csv(df):
+    """Types of a processed frame read back from CSV: parsed dates, PROCESSED_DTYPES"""
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'])
+    return to_processed_dtypes(df)
+
+def load_processed_data(path, compact=False):
+    """
+    Load player-game data written by save_processed_data (or a later stage).
+    A Parquet file next to the CSV with the same base name is preferred when it
+    is at least as new as the CSV: it is read with its stored types, with no
+    text parsing. Otherwise the CSV is read and cast to PROCESSED_DTYPES.
+    With compact=True the frame is further shrunk by compact_dtypes.
+    """
+    source = processed_source(path)
+    if source.endswith(".parquet"):
+        df = pd.read_parquet(source, engine="pyarrow")
+    else:
+        df = parse_processed_csv(pd.read_csv(source))
+    return compact_with_report(df) if compact else df
+
+def iter_processed_data(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Streaming version of load_processed_data: yield the same rows as frames
+    of at most chunk_rows rows, so a whole season never has to be in memory.
+    """
+    source = processed_source(path)
+    if source.endswith(".parquet"):
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(source, chunksize=chunk_rows):
+            yield parse_processed_csv(chunk)
+
+def compact_dtypes(df):
+    """
+    Return df with the smallest column types that hold its values, for
+    analysis of many seasons in memory:
+    1. Integer columns, and float columns of whole numbers without missing
+       values (counting stats), are downcast to the smallest integer type
+       (int8 for box-score counts). Arithmetic on them stays in that type, so
+       widen a column before summing it into large totals.
+    2. Percentages (*_Pct) and other float columns become float32 (about
+       7 significant digits, plenty for percentages).
+    3. Text columns where at most COMPACT_CATEGORY_MAX_RATIO of the values
+       are distinct (teams, seasons, locations) become categoricals.
+    Dates, flags and existing categoricals are kept.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_bool_dtype(values) or not (pd.api.types.is_numeric_dtype(values)
+                                                       or values.dtype == object):
+            columns[col] = values
+        elif pd.api.types.is_integer_dtype(values):
+            columns[col] = pd.to_numeric(values, downcast='integer')
+        elif pd.api.types.is_float_dtype(values):
+            whole = (not col.endswith('_Pct') and len(values) > 0 and values.notna().all()
+                     and bool((values == np.floor(values)).all()))
+            columns[col] = (pd.to_numeric(values, downcast='integer') if whole
+                            else values.astype(np.float32))
+        elif values.nunique() <= COMPACT_CATEGORY_MAX_RATIO * len(values):
+            columns[col] = values.astype('category')
+        else:
+            columns[col] = values
+    return pd.DataFrame(columns, index=df.index)
+
+def memory_report(before, after):
+    """
+    Per-column memory of a frame before and after compact_dtypes (deep, i.e.
+    counting the strings of object columns), with a TOTAL row:
+    dtype_before, dtype_after, bytes_before, bytes_after, saved_pct
+    """
+    bytes_before = before.memory_usage(index=False, deep=True)
+    bytes_after = after.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'dtype_after': after.dtypes.astype(str),
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+    })
+    report.loc['TOTAL'] = ['', '', bytes_before.sum(), bytes_after.sum()]
+    report['saved_pct'] = (100 * (1 - report['bytes_after'] / report['bytes_before'].replace(0, np.nan))).round(1)
+    return report
+
+def compact_with_report(df):
+    """compact_dtypes(df), logging the memory saved (and the per-column report at DEBUG)"""
+    compact = compact_dtypes(df)
+    if logger.isEnabledFor(logging.INFO):
+        report = memory_report(df, compact)
+        total = report.loc['TOTAL']
+        logger.info("Compact types: %.1f MB -> %.1f MB (%.1f%% saved)",
+                    total['bytes_before'] / 1e6, total['bytes_after'] / 1e6, total['saved_pct'])
+        logger.debug("Memory by column:\n%s", report.to_string())
+    return compact
+
+def display_data_info(stats):
+    """
+    Log information about the processed data of one file from its StatsStore
+    (no rows are scanned): rows, date range and distinct players and teams,
+    plus the per-season table and the count / mean / std / min / max of
+    every numeric column at DEBUG level.
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+
+    overall = stats.overall()
+    summary = overall.summary()
+    logger.info("DATA SUMMARY: %d rows, dates %s to %s, ~%s unique players, ~%s unique teams",
+                summary['rows'], summary['first_date'], summary['last_date'],
+                summary['players'], summary['teams'])
+
+    if not logger.isEnabledFor(logging.DEBUG) or not overall.rows:
+        return
+    logger.debug("Seasons:\n%s", stats.season_table().to_string())
+    logger.debug("Basic statistics:\n%s", overall.describe().to_string())
+
+PROCESS_MANIFEST_FILENAME = "process_manifest.json"
+HASH_BLOCK_BYTES = 1 << 20
+
+def file_fingerprint(path, prefix_size=None):
+    """
+    Read path once and return its fingerprint for the process manifest:
+      {'sha256', 'size', 'mtime_ns', 'rows'} (rows = lines after the header)
+    plus the sha256 of its first prefix_size bytes under 'prefix_sha256' when
+    prefix_size is given (None if the file is shorter than that).
+    """
+    digest = hashlib.sha256()
+    prefix_sha256 = None
+    lines = 0
+    read = 0
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(HASH_BLOCK_BYTES)
+            if not block:
+                break
+            if prefix_size is not None and read < prefix_size <= read + len(block):
+                head = digest.copy()
+                head.update(block[:prefix_size - read])
+                prefix_sha256 = head.hexdigest()
+            digest.update(block)
+            lines += block.count(b'\n')
+            read += len(block)
+    if prefix_size == 0:
+        prefix_sha256 = hashlib.sha256().hexdigest()
+    stat = os.stat(path)
+    fingerprint = {'sha256': digest.hexdigest(), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                   'rows': max(0, lines - 1)}
+    if prefix_size is not None:
+        fingerprint['prefix_sha256'] = prefix_sha256
+    return fingerprint
+
+def load_process_manifest(player_data_dir="PlayerDataProcessed"):
+    """
+    Load the manifest of processed inputs: {input file name: entry}, where an
+    entry is the input's fingerprint plus the output format and the column
+    types it was processed with. Returns {} if none has been written yet.
+    """
+    path = os.path.join(player_data_dir, PROCESS_MANIFEST_FILENAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_process_manifest(manifest, player_data_dir="PlayerDataProcessed"):
+    """Atomically write the process manifest"""
+    os.makedirs(player_data_dir, exist_ok=True)
+    path = os.path.join(player_data_dir, PROCESS_MANIFEST_FILENAME)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def plan_reprocessing(file_path, entry, output_format):
+    """
+    Decide what an incremental run does with one input file. Returns
+    (action, fingerprint) where action is
+      'skip'   → unchanged since it was processed (same size and mtime, or same hash)
+      'append' → rows were only appended: the first entry['size'] bytes are unchanged
+      'full'   → new or rewritten file, or its outputs (or stats) are missing / in another format
+    """
+    outputs = processed_paths(file_path)
+    have_outputs = all(os.path.exists(path) for path, fmt in zip(outputs, ('csv', 'parquet'))
+                       if output_format in (fmt, 'both'))
+    stats_path = processed_stats_path(file_path)
+    have_outputs = have_outputs and (stats_path is None or os.path.exists(stats_path))
+    if not entry or entry.get('output_format') != output_format or not have_outputs:
+        return 'full', file_fingerprint(file_path)
+
+    stat = os.stat(file_path)
+    if stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']:
+        return 'skip', entry
+    fingerprint = file_fingerprint(file_path, prefix_size=entry['size'])
+    if fingerprint['sha256'] == entry['sha256']:
+        return 'skip', fingerprint
+    if fingerprint.pop('prefix_sha256') == entry['sha256']:
+        return 'append', fingerprint
+    return 'full', fingerprint
+
+def process_appended_rows(file_path, entry, output_format=DEFAULT_PROCESSED_FORMAT, team_info=None,
+                          stats=None):
+    """
+    Process only the rows appended to file_path since its manifest entry and
+    append them to the processed outputs and to stats (a StatsStore), if
+    given. The rows are read with the column types of the whole file, so the
+    outputs match a full reprocess.
+    Only the new rows are read and transformed, and the CSV output is
+    appended to; a Parquet file cannot be appended to, so the Parquet copy is
+    still read and rewritten in full (O(file) I/O, but no CSV parsing or
+    transforming of the old rows).
+    Returns the number of rows written, or None when the file has to be
+    reprocessed in full: the entry recorded an empty file, or the new rows
+    would change a column type of the whole file (e.g. the first missing
+    jersey number turns ints into floats).
+    """
+    if entry['size'] <= 0:
+        return None
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        f.seek(entry['size'] - 1)
+        if f.read(1) != b'\n':   # the last old row was cut mid-line
+            return None
+        tail = header + f.read()
+
+    read_dtypes = {col: np.dtype(dtype) for col, dtype in entry['read_dtypes'].items()}
+    numeric_dtypes = {col: np.dtype(dtype) for col, dtype in entry['numeric_dtypes'].items()}
+    tail_read, tail_numeric = scan_column_types(io.BytesIO(tail))
+    for known, new in ((read_dtypes, tail_read), (numeric_dtypes, tail_numeric)):
+        if set(new) != set(known) or any(merge_dtypes([known[col], new[col]]) != known[col] for col in new):
+            return None
+
+    df = pd.read_csv(io.BytesIO(tail), dtype=read_dtypes)
+    df = transform_player_games(df, team_info or load_team_info(), numeric_dtypes)
+    if stats is not None:
+        stats.update(df)
+    csv_path, parquet_path = processed_paths(file_path)
+    if output_format in ('csv', 'both'):
+        df.to_csv(csv_path, mode='a', header=False, index=False)
+    if output_format in ('parquet', 'both'):
+        save_typed_parquet(pd.concat([pd.read_parquet(parquet_path), df], ignore_index=True), parquet_path)
+    logger.info("Appended %d new rows to the outputs of %s", len(df), file_path)
+    return len(df)
+
+def column_types_entry(read_dtypes, numeric_dtypes):
+    """Column types (as found by scan_column_types) in the form stored in a manifest entry"""
+    return {'read_dtypes': {col: str(dtype) for col, dtype in read_dtypes.items()},
+            'numeric_dtypes': {col: str(dtype) for col, dtype in numeric_dtypes.items()}}
+
+# Team info shared by every file a pool worker processes (set by init_team_worker)
+worker_team_info = None
+
+def init_team_worker(team_info, log_level):
+    """Pool initializer: keep the parent's team info and log level (see init_worker) in this worker"""
+    global worker_team_info
+    worker_team_info = team_info
+    init_worker(log_level)
+
+def process_file(file_path, output_format=DEFAULT_PROCESSED_FORMAT, team_info=None, chunk_rows=None,
+                 append_entry=None, record_types=False):
+    """
+    Process, save and summarize one season file (one pool task). With
+    chunk_rows the file is streamed by process_file_chunked instead (its
+    'process' stage then includes saving).
+    With append_entry (a manifest entry) only the rows appended since then
+    are processed, falling back to the whole file if that is not possible.
+    The summary statistics of the file (a StatsStore, updated as rows are
+    processed) are logged and, unless it is a checkpoint or combined input,
+    saved next to its outputs.
+    Returns a dict with the saved 'path', the number of 'rows', the seconds
+    spent in each stage under 'stages', whether rows were 'appended', the
+    column 'types' for the manifest (if record_types; taken from the read that
+    processes the file, not from an extra pass over it), the team names the
+    registry could not resolve under 'unresolved' ({name: rows}), and
+    'error' (the exception, or None).
+    """
+    result = {'path': None, 'rows': 0, 'stages': {}, 'appended': False, 'types': None, 'unresolved': {},
+              'error': None}
+    team_info = team_info or worker_team_info
+    team_info.take_unresolved()
+    stats_path = processed_stats_path(file_path)
+    start = time.perf_counter()
+    try:
+        if append_entry is not None:
+            stats = StatsStore.load(stats_path) if stats_path else StatsStore()
+            rows = process_appended_rows(file_path, append_entry, output_format, team_info, stats)
+            if rows is not None:
+                result['path'] = processed_paths(file_path)[1 if output_format == 'parquet' else 0]
+                result['rows'] = rows
+                result['appended'] = True
+                result['types'] = {key: append_entry[key] for key in ('read_dtypes', 'numeric_dtypes')}
+                result['stages']['append'] = time.perf_counter() - start
+                start = time.perf_counter()
+                if stats_path:
+                    stats.save(stats_path)
+                display_data_info(stats)
+                result['stages']['summary'] = time.perf_counter() - start
+                return result
+            logger.info("New rows in %s change its column types; reprocessing the whole file", file_path)
+
+        stats = StatsStore()
+        if chunk_rows:
+            result['path'], result['rows'], types = process_file_chunked(file_path, output_format, chunk_rows,
+                                                                         team_info, stats)
+            result['stages']['process'] = time.perf_counter() - start
+        else:
+            # Process the data
+            df_processed, types = process_basketball_data(file_path, team_info, with_types=True)
+            result['rows'] = len(df_processed)
+            result['stages']['process'] = time.perf_counter() - start
+
+            # Save processed data
+            start = time.perf_counter()
+            result['path'] = save_processed_data(df_processed, file_path, output_format)
+            result['stages']['save'] = time.perf_counter() - start
+
+        if record_types:
+            result['types'] = column_types_entry(*types)
+
+        # Save and display summary statistics
+        start = time.perf_counter()
+        if not chunk_rows:
+            stats.update(df_processed)
+        if stats_path:
+            logger.info("Summary statistics saved to: %s", stats.save(stats_path))
+        display_data_info(stats)
+        result['stages']['summary'] = time.perf_counter() - start
+    except Exception as e:
+        result['error'] = e
+    result['unresolved'] = team_info.take_unresolved()
+    return result
+
+def process_all_csv_files(directory_path="PlayerData", output_format=DEFAULT_PROCESSED_FORMAT,
+                          workers=DEFAULT_WORKERS, chunk_rows=None, incremental=False):
+    """
+    Process all CSV files in the PlayerData directory and save each one in
+    output_format ('csv', 'parquet' or 'both').
+    Files are processed in parallel by a pool of `workers` processes
+    (workers=1 processes them one by one in this process). TeamData.csv is
+    read once here and handed to every worker. A file that fails does not
+    stop the others; its error is logged and collected.
+    With chunk_rows every file is streamed in chunks of that many rows
+    (bounded memory, same output; see process_file_chunked).
+    With incremental=True every processed input is recorded in
+    PlayerDataProcessed/process_manifest.json (content hash, size, row count,
+    column types), unchanged files are skipped and files that only grew by
+    appended rows have just the new rows processed and appended to their
+    outputs. Other runs neither hash the inputs nor record their types; they
+    drop the manifest entries of the files they rewrite, so the next
+    incremental run processes those in full once.
+    Time and rows of each stage (process, save, summary, append), failures by
+    exception type, the error of each failed file and the team names the
+    registry could not resolve are written to
+    PlayerDataProcessed/process_run_report.json.
+    Returns the list of processed files.
+    """
     
     if not os.path.exists(directory_path):
-        print(f"Directory {directory_path} does not exist!")
-        return
+        logger.error("Directory %s does not exist!", directory_path)
+        return []
     
     csv_files = [f for f in os.listdir(directory_path) if f.endswith('.csv') and not f.endswith('_processed.csv')]
     
     if not csv_files:
-        print(f"No CSV files found in {directory_path}")
-        return
+        logger.warning("No CSV files found in %s", directory_path)
+        return []
+    
+    metrics = RunMetrics("process")
+    manifest = load_process_manifest()
+    tasks = []   # (csv file, path, manifest entry to append from or None, fingerprint)
+    for csv_file in csv_files:
+        file_path = os.path.join(directory_path, csv_file)
+        if not incremental:
+            manifest.pop(csv_file, None)
+            tasks.append((csv_file, file_path, None, None))
+            continue
+        action, fingerprint = plan_reprocessing(file_path, manifest.get(csv_file), output_format)
+        if action == 'skip':
+            logger.info("Unchanged, skipped: %s", csv_file)
+            manifest[csv_file].update(fingerprint)
+            metrics.count("files_skipped")
+            continue
+        tasks.append((csv_file, file_path, manifest[csv_file] if action == 'append' else None, fingerprint))
     
-    print(f"Found {len(csv_files)} CSV files to process:")
-    for file in csv_files:
-        print(f"  - {file}")
+    workers = max(1, min(workers, len(tasks)))
+    logger.info("Found %d CSV files, %d to process with %d worker(s): %s", len(csv_files), len(tasks), workers,
+                ", ".join(task[0] for task in tasks))
     
     processed_files = []
+    team_info = load_team_info()
     
-    for csv_file in csv_files:
-        file_path = os.path.join(directory_path, csv_file)
-        print(f"\n{'='*80}")
-        print(f"PROCESSING: {csv_file}")
-        print(f"{'='*80}")
-        
-        try:
-            # Process the data
-            df_processed = process_basketball_data(file_path)
-            
-            # Save processed data
-            new_file_path = save_processed_data(df_processed, file_path)
-            processed_files.append(new_file_path)
-            
-            # Display info
-            display_data_info(df_processed)
-            
-        except Exception as e:
-            print(f"ERROR processing {csv_file}: {str(e)}")
-    
-    print(f"\n{'='*80}")
-    print("PROCESSING COMPLETE!")
-    print(f"{'='*80}")
-    print("Processed files created:")
-    for file in processed_files:
-        print(f"  ✓ {file}")
+    executor = None
+    if workers == 1:
+        results = (process_file(path, output_format, team_info, chunk_rows, entry, incremental)
+                   for _, path, entry, _ in tasks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_team_worker,
+                                       initargs=(team_info, logging.getLogger().getEffectiveLevel()))
+        results = collect_results([executor.submit(process_file, path, output_format, None, chunk_rows, entry, incremental)
+                                   for _, path, entry, _ in tasks])
+    
+    unresolved = Counter()
+    try:
+        for (csv_file, _, _, fingerprint), result in zip(tasks, results):
+            unresolved.update(result.get('unresolved', {}))
+            if result['error'] is not None:
+                logger.error("Failed processing %s: %s", csv_file, result['error'])
+                metrics.record_error(csv_file, result['error'])
+                manifest.pop(csv_file, None)
+                continue
+            for stage, seconds in result['stages'].items():
+                metrics.add_stage(stage, seconds, result['rows'] if stage != 'summary' else 0)
+            if result['appended']:
+                metrics.count("files_appended")
+                metrics.count("rows_appended", result['rows'])
+            processed_files.append(result['path'])
+            if incremental:
+                manifest[csv_file] = {**fingerprint, 'output_format': output_format, **result['types']}
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        save_process_manifest(manifest)
+    
+    metrics.count("files_processed", len(processed_files))
+    metrics.note("unresolved_teams", team_info.report_unresolved(unresolved, "team names (games dropped as exhibitions)"))
+    report_path = metrics.write_report(os.path.join("PlayerDataProcessed", "process_run_report.json"))
+    logger.info("PROCESSING COMPLETE! Processed files created: %s", ", ".join(processed_files) or "none")
+    if metrics.errors:
+        logger.warning("%d file(s) failed: %s", len(metrics.errors),
+                       "; ".join(f"{name} ({error})" for name, error in metrics.errors.items()))
+    logger.info("Run report saved to: %s", report_path)
+    return processed_files
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process the scraped player-game CSV files")
+    parser.add_argument("--format", default=DEFAULT_PROCESSED_FORMAT, choices=PROCESSED_FORMATS,
+                        help="output format of the processed files (parquet is typed and needs pyarrow)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="number of season files processed in parallel (1 = no process pool)")
+    parser.add_argument("--chunk-rows", type=int, default=None,
+                        help=f"stream each file in chunks of this many rows to bound memory (e.g. {DEFAULT_CHUNK_ROWS})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip unchanged files and only process rows appended since the last run")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(quiet=args.quiet, verbose=args.verbose)
     # Process all CSV files in PlayerData directory
-    process_all_csv_files()
\ No newline at end of file
+    process_all_csv_files(output_format=args.format, workers=args.workers, chunk_rows=args.chunk_rows,
+                          incremental=args.incremental)
@@ -5,11 +5,217 @@ import time
 import re
 import sys
 import os
+import csv
+import json
+import shutil
+import argparse
+import random
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = None
+    pq = None
 
+try:
+    import lxml.html
+    import lxml.etree
+except ImportError:  # fall back to the BeautifulSoup parser engine
+    lxml = None
+
+from ResponseCache import ResponseCache, DEFAULT_CACHE_DIR, DEFAULT_TTL_HOURS, DEFAULT_MAX_MB
+from RunMetrics import RunMetrics, setup_logging, add_logging_arguments, quiet_logging
+
+
+logger = logging.getLogger(__name__)
 
 BASE_URL = "https://usportshoops.ca"
 
+# Column layout of the PlayerData/playerGameData<season>.csv files
+RECORD_COLUMNS = [
+    "Season", "Date", "Location", "Team", "Opponent", "Jersey", "PlayerName", "StarterFlag",
+    "Mins", "ThreePt_Made_Att", "ThreePtPct", "FG_Made_Att", "FGPct", "FT_Made_Att", "FTPct",
+    "Reb_Off", "Reb_Def", "Reb_Tot", "PF", "AST", "TO", "BLK", "STL", "Pts",
+]
+
+# Defaults for the concurrent fetch mode
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 3.0   # box-score pages per second, shared across all workers
+
+# Retry policy for transient failures (connection errors, timeouts, 429/5xx)
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0   # seconds; attempt n waits up to BACKOFF_BASE * 2**n
+BACKOFF_MAX = 30.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used as a global rate limiter.
+    Tokens are refilled at `rate` per second up to `capacity`; every call to
+    acquire() takes one token, blocking until one is available. All fetch
+    workers share one bucket, so the site sees at most `rate` requests/sec
+    no matter how many workers are running.
+    The rate adapts to the server: slow_down() halves it (down to min_rate)
+    when the site answers 429/5xx, and recover() raises it back towards the
+    configured rate a little on every successful request.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=1, min_rate=0.2):
+        self.target_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min(float(min_rate), self.target_rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def slow_down(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def recover(self):
+        with self.lock:
+            self.rate = min(self.target_rate, self.rate + 0.05 * self.target_rate)
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Shared fetch state, set by configure_fetching() before a scrape
+rate_limiter = None      # TokenBucket applied to every network request
+response_cache = None    # ResponseCache consulted before the network
+replay_mode = False      # True → serve everything from the cache, never hit the network
+run_metrics = RunMetrics("scrape")   # requests, bytes, cache hits and failures of the current run
+
+
+def configure_fetching(limiter=None, cache=None, replay=False, metrics=None):
+    """Set the rate limiter, response cache, replay flag and run metrics used by fetch_page()."""
+    global rate_limiter, response_cache, replay_mode, run_metrics
+    rate_limiter = limiter
+    response_cache = cache
+    replay_mode = replay
+    run_metrics = metrics or RunMetrics("scrape")
+
+
+def failure_reason(error):
+    """Short label for a failed request, used as the failure key in run reports."""
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "connection_error"
+    response = getattr(error, "response", None)
+    if response is not None:
+        return f"http_{response.status_code}"
+    return "request_error"
+
+
+thread_state = threading.local()
+
+
+def get_session():
+    """
+    Return this thread's pooled requests.Session, creating it on first use.
+    Each fetch worker keeps its own keep-alive connection to the site instead
+    of opening a new TCP/TLS connection per page.
+    """
+    session = getattr(thread_state, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=2)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        thread_state.session = session
+    return session
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Seconds to wait before retry number `attempt` (0-based): the server's
+    Retry-After if it sent one, otherwise full-jitter exponential backoff.
+    """
+    if retry_after is not None:
+        try:
+            return min(BACKOFF_MAX, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def download(url):
+    """
+    GET url on the thread's pooled session, retrying connection errors,
+    timeouts and 429/5xx answers up to MAX_RETRIES times with jittered
+    exponential backoff. 429/5xx answers also slow the shared rate limiter.
+    Raises requests.exceptions.RequestException once retries are exhausted.
+    """
+    session = get_session()
+    for attempt in range(MAX_RETRIES + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        retry_after = None
+        try:
+            resp = session.get(url, timeout=10)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            error = e
+        else:
+            if resp.status_code not in RETRY_STATUS:
+                # Success, or a 4xx that retrying will not fix
+                run_metrics.record_request(len(resp.content))
+                resp.raise_for_status()
+                if rate_limiter is not None:
+                    rate_limiter.recover()
+                return resp.text
+            run_metrics.record_request(len(resp.content))
+            if rate_limiter is not None:
+                rate_limiter.slow_down()
+            retry_after = resp.headers.get("Retry-After")
+            error = requests.exceptions.HTTPError(f"{resp.status_code} Error for url: {url}", response=resp)
+
+        if attempt == MAX_RETRIES:
+            raise error
+        delay = backoff_delay(attempt, retry_after)
+        run_metrics.count(f"retry_{failure_reason(error)}")
+        logger.warning("%s failed (%s); retry %d/%d in %.1fs", url, error, attempt + 1, MAX_RETRIES, delay)
+        time.sleep(delay)
+
+
+def fetch_page(url):
+    """
+    Return the body of url as text. The response cache is checked first; on a
+    miss the page is downloaded with download() and stored.
+    In replay mode the network is never used and a cache miss raises
+    requests.exceptions.RequestException like any other failed fetch.
+    """
+    if response_cache is not None:
+        text = response_cache.get(url, ignore_ttl=replay_mode)
+        if text is not None:
+            run_metrics.count("cache_hits")
+            return text
+        run_metrics.count("cache_misses")
+    if replay_mode:
+        raise requests.exceptions.RequestException(f"{url} is not in the response cache (replay mode)")
+
+    text = download(url)
+    if response_cache is not None:
+        response_cache.put(url, text)
+    return text
+
 
 def get_last_seasons(n=4):
     """
@@ -19,13 +225,12 @@ def get_last_seasons(n=4):
     """
     url = f"{BASE_URL}/history/pastseasons.php?Gender=MBB"
     try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
+        html = fetch_page(url)
     except requests.exceptions.RequestException as e:
-        print(f"ERROR: Failed to fetch seasons page: {e}", file=sys.stderr)
+        logger.error("Failed to fetch seasons page: %s", e)
         return []
         
-    soup = BeautifulSoup(resp.text, "html.parser")
+    soup = BeautifulSoup(html, "html.parser")
 
     seasons = []
     pattern = re.compile(r"seasongames\.php\?Gender=MBB&Season=([0-9]{4}-[0-9]{2})")
@@ -40,7 +245,7 @@ def get_last_seasons(n=4):
                 break
 
     if not seasons:
-        print("WARNING:  No seasons found. HTML may have changed.", file=sys.stderr)
+        logger.warning("No seasons found. HTML may have changed.")
     return seasons
 
 
@@ -54,13 +259,12 @@ def get_game_links_for_season(season):
     """
     url = f"{BASE_URL}/history/seasongames.php?Gender=MBB&Season={season}"
     try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
+        html = fetch_page(url)
     except requests.exceptions.RequestException as e:
-        print(f"ERROR: Failed to fetch games for season {season}: {e}", file=sys.stderr)
+        logger.error("Failed to fetch games for season %s: %s", season, e)
         return []
         
-    soup = BeautifulSoup(resp.text, "html.parser")
+    soup = BeautifulSoup(html, "html.parser")
 
     game_links = []
     pattern = re.compile(
@@ -79,22 +283,24 @@ def get_game_links_for_season(season):
                 game_links.append(full_url)
 
     if not game_links:
-        print(f"WARNING:  No box‐score links found for {season}.", file=sys.stderr)
+        logger.warning("No box-score links found for %s.", season)
     else:
-        print(f"   Stats Found {len(game_links)} games with box scores for {season}")
+        logger.info("Found %d games with box scores for %s", len(game_links), season)
         
     return game_links
 
 
-def extract_game_info(game_url):
+def extract_game_info(game_url, soup=None):
     """
-    Fetch the box‐score page at game_url and return a dict with:
+    Return a dict with the box‐score header for game_url:
       'date'     → e.g. "Mon Jul 29, 2024"
       'location' → e.g. "Toronto, ON"
       'team1'    → e.g. "McMaster Marauders"
       'score1'   → e.g. "76"
       'team2'    → e.g. "Air Force Academy Falcons"
       'score2'   → e.g. "87"
+    If `soup` (the already-parsed page) is given it is used directly;
+    otherwise the page is fetched and parsed here.
     """
     game_info = {
         'date': '',
@@ -105,14 +311,14 @@ def extract_game_info(game_url):
         'score2': ''
     }
 
-    try:
-        resp = requests.get(game_url, timeout=10)
-        resp.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"   ERROR: Could not fetch {game_url}: {e}")
-        return game_info
+    if soup is None:
+        try:
+            html = fetch_page(game_url)
+        except requests.exceptions.RequestException as e:
+            logger.error("Could not fetch %s: %s", game_url, e)
+            return game_info
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+        soup = BeautifulSoup(html, "html.parser")
 
     # 1) Find the <h2> header, then its next sibling <table>, then inside that
     #    look for any <td> whose text starts with "Date:" or "Location:".
@@ -159,70 +365,282 @@ def extract_game_info(game_url):
     return game_info
 
         
-def parse_boxscore_page(game_url, season):
+def parse_boxscore_page(game_url, season, timings=None, html=None):
     """
     Fetches a single game box score page, extracts player stats for both teams,
-    and returns a DataFrame with one row per player. Relies on extract_game_info()
-    (defined elsewhere) to pull date, location, and team1/team2 names.
+    and returns a DataFrame with one row per player (see parse_boxscore_records).
     """
-    try:
-        resp = requests.get(game_url, timeout=10)
-        resp.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"   ERROR: Request failed for {game_url}: {e}")
-        return pd.DataFrame()
+    return pd.DataFrame(parse_boxscore_records(game_url, season, timings=timings, html=html))
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    game_info = extract_game_info(game_url)
-    
-            # Fallback for Date/Location
-    if not game_info.get("date"):
-        for td in soup.find_all("td"):
-            if td.get_text(strip=True) == "Date:":
-                next_td = td.find_next_sibling("td")
-                if next_td:
-                    game_info["date"] = next_td.get_text(strip=True)
-                break
 
-    if not game_info.get("location"):
+# One <tr> of the box-score table, reduced to what the block walker needs:
+#   lead       → the row has a <td colspan="26"> (team header)
+#   bold       → stripped text of that cell's first <b>, or None
+#   totals     → the row is a team "Totals" row
+#   fields_all → the row's text pieces, as r.get_text("|", strip=True).split("|")
+BoxRow = namedtuple("BoxRow", ["lead", "bold", "totals", "fields_all"])
+
+TEAM_SCORE_PATTERN = re.compile(r"^(.+?)\s+(\d+)$")
+SEASON_IN_URL = re.compile(r"Season=([0-9]{4}-[0-9]{2})")
+
+
+def read_boxscore_bs4(html, game_url):
+    """
+    Reference engine: parse with BeautifulSoup's html.parser and return
+    (game_info, rows), where rows is the list of BoxRow of the stats table or
+    None if the page has no stats table.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    game_info = extract_game_info(game_url, soup=soup)
+
+    # Fallback for Date/Location: one pass over the <td>s for both labels
+    missing = {label: key for label, key in (("Date:", "date"), ("Location:", "location"))
+               if not game_info.get(key)}
+    if missing:
         for td in soup.find_all("td"):
-            if td.get_text(strip=True) == "Location:":
+            label = td.get_text(strip=True)
+            if label in missing:
                 next_td = td.find_next_sibling("td")
                 if next_td:
-                    game_info["location"] = next_td.get_text(strip=True)
-                break
-    # ───────────────────────────────────────────────────────
-
-   
-    print(f"    Processing: Game date = '{game_info.get('date', '')}'")
-    print(f"    Processing: Game location = '{game_info.get('location', '')}'")
+                    game_info[missing[label]] = next_td.get_text(strip=True)
+                # Only the first matching label counts, as before
+                del missing[label]
+                if not missing:
+                    break
 
-    # 1) Find the <table> containing "<td colspan='26'>…</td>" (the box‐score container)
+    # Find the <table> containing "<td colspan='26'>…</td>" (the box‐score container)
     stats_table = None
     for table in soup.find_all("table"):
         if table.find("td", attrs={"colspan": "26"}):
             stats_table = table
             break
-
     if stats_table is None:
-        print(f"   WARNING:  No stats table found at {game_url}")
-        return pd.DataFrame()
+        return game_info, None
+
+    rows = []
+    for r in stats_table.find_all("tr"):
+        lead_td = r.find("td", attrs={"colspan": "26"})
+        bold = lead_td.find("b") if lead_td else None
+        total_td = r.find("td", attrs={"colspan": "3", "align": "left"})
+        rows.append(BoxRow(
+            lead=lead_td is not None,
+            bold=bold.get_text(strip=True) if bold else None,
+            totals=bool(total_td and "Totals" in total_td.get_text()),
+            fields_all=r.get_text("|", strip=True).split("|"),
+        ))
+    return game_info, rows
+
+
+def lxml_string(el):
+    """lxml equivalent of BeautifulSoup's Tag.string (None unless el holds exactly one string)."""
+    children = list(el)
+    if not children:
+        return el.text
+    if len(children) == 1 and not el.text and not children[0].tail:
+        return lxml_string(children[0])
+    return None
+
+
+def lxml_text(el, sep=""):
+    """lxml equivalent of el.get_text(sep, strip=True)."""
+    return sep.join(t for t in (piece.strip() for piece in el.itertext()) if t)
+
+
+def read_boxscore_lxml(html, game_url):
+    """
+    Fast engine: same result as read_boxscore_bs4, built on lxml. The page is
+    parsed by libxml2 and the header, team scores and stats table are located
+    with XPath instead of scanning every tag from Python.
+    """
+    doc = lxml.html.fromstring(html)
+    # BeautifulSoup's get_text() leaves script/style contents out
+    lxml.etree.strip_elements(doc, "script", "style", with_tail=False)
+
+    game_info = {'date': '', 'location': '', 'team1': '', 'score1': '', 'team2': '', 'score2': ''}
+
+    for heading in doc.iter("h2"):
+        if re.search(r"Men's Basketball Game Report", lxml_string(heading) or ""):
+            parent_table = heading.xpath("following-sibling::table[1]")
+            nested_left = parent_table[0].xpath("(.//table)[1]") if parent_table else []
+            if nested_left:
+                for td in nested_left[0].iter("td"):
+                    txt = lxml_text(td)
+                    if txt.startswith("Date:"):
+                        game_info['date'] = txt.replace("Date:", "").strip()
+                    elif txt.startswith("Location:"):
+                        game_info['location'] = txt.replace("Location:", "").strip()
+            break
+
+    team_count = 0
+    pattern_strip_digits = re.compile(r"^(.+?)(?:\d*)$")
+    for table in doc.xpath('//table[@border="0" and @cellpadding="1" and @cellspacing="1"]'):
+        for row in table.iter("tr"):
+            cells = list(row.iter("td"))
+            if len(cells) == 2 and team_count < 2:
+                right_text = lxml_text(cells[1])
+                if cells[1].get("align") == "right" and right_text.isdigit():
+                    team_name = pattern_strip_digits.match(lxml_text(cells[0])).group(1).strip()
+                    game_info[f'team{team_count + 1}'] = team_name
+                    game_info[f'score{team_count + 1}'] = right_text
+                    team_count += 1
+        if team_count == 2:
+            break
+
+    missing = {label: key for label, key in (("Date:", "date"), ("Location:", "location"))
+               if not game_info.get(key)}
+    if missing:
+        for td in doc.iter("td"):
+            label = lxml_text(td)
+            if label in missing:
+                next_td = td.xpath("following-sibling::td[1]")
+                if next_td:
+                    game_info[missing[label]] = lxml_text(next_td[0])
+                del missing[label]
+                if not missing:
+                    break
+
+    stats_table = doc.xpath('(//table[.//td[@colspan="26"]])[1]')
+    if not stats_table:
+        return game_info, None
+
+    rows = []
+    for r in stats_table[0].iter("tr"):
+        lead_td = None
+        total_td = None
+        for td in r.iter("td"):
+            if lead_td is None and td.get("colspan") == "26":
+                lead_td = td
+            if total_td is None and td.get("colspan") == "3" and td.get("align") == "left":
+                total_td = td
+        bold = next(lead_td.iter("b"), None) if lead_td is not None else None
+        rows.append(BoxRow(
+            lead=lead_td is not None,
+            bold=lxml_text(bold) if bold is not None else None,
+            totals=total_td is not None and "Totals" in "".join(total_td.itertext()),
+            fields_all=lxml_text(r, "|").split("|"),
+        ))
+    return game_info, rows
+
+
+PARSER_ENGINES = {"bs4": read_boxscore_bs4}
+if lxml is not None:
+    PARSER_ENGINES["lxml"] = read_boxscore_lxml
+DEFAULT_PARSER = "lxml" if lxml is not None else "bs4"
+parser_engine = DEFAULT_PARSER   # engine used by parse_boxscore_records()
+
+
+def compare_parser_engines(cache_dir=DEFAULT_CACHE_DIR, engines=("bs4", "lxml")):
+    """
+    Run every cached box score through each parser engine, check that they
+    produce identical records, and report the average parse time per page.
+    Returns {engine: avg ms per page}; pages whose output differs are listed.
+    """
+    cache = ResponseCache(cache_dir)
+    entry_paths = [os.path.join(cache.entry_dir, name) for name in sorted(os.listdir(cache.entry_dir))
+                   if name.endswith(".json")]
+    pages = []
+    for path in entry_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            url = json.load(f)["url"]
+        if "show-game-report" in url:
+            html = cache.get(url, ignore_ttl=True)
+            if html is not None:
+                pages.append((url, html))
+    if not pages:
+        logger.warning("No cached box scores in %s", cache_dir)
+        return {}
+
+    totals = {engine: 0.0 for engine in engines}
+    mismatches = []
+    for url, html in pages:
+        season = SEASON_IN_URL.search(url).group(1) if SEASON_IN_URL.search(url) else ""
+        outputs = []
+        for engine in engines:
+            start = time.perf_counter()
+            with quiet_logging():
+                outputs.append(parse_boxscore_records(url, season, html=html, engine=engine))
+            totals[engine] += time.perf_counter() - start
+        if any(out != outputs[0] for out in outputs[1:]):
+            mismatches.append(url)
+
+    avg_ms = {engine: totals[engine] / len(pages) * 1000 for engine in engines}
+    logger.info("Compared %d cached box scores", len(pages))
+    for engine in engines:
+        logger.info("   • %s: %.2f ms per page", engine, avg_ms[engine])
+    if mismatches:
+        logger.warning("%d pages parse differently:", len(mismatches))
+        for url in mismatches:
+            logger.warning("   - %s", url)
+    else:
+        logger.info("All engines produced identical records")
+    return avg_ms
+
+
+def parse_boxscore_records(game_url, season, timings=None, html=None, engine=None):
+    """
+    Fetches a single game box score page, extracts player stats for both teams,
+    and returns a list of dicts with one entry per player (RECORD_COLUMNS keys).
+    The page is downloaded and parsed once; the header (date, location,
+    team1/team2 names) and the player rows come from the same parsed document.
+    Pass `html` to parse an already-downloaded page. `engine` picks the HTML
+    backend from PARSER_ENGINES (default: lxml when installed, else bs4).
+    If a `timings` dict is passed, 'fetch_ms' and 'parse_ms' are recorded in it.
+    """
+    start = time.perf_counter()
+    if html is None:
+        try:
+            html = fetch_page(game_url)
+        except requests.exceptions.RequestException as e:
+            logger.error("Request failed for %s: %s", game_url, e)
+            run_metrics.record_failure(failure_reason(e))
+            return []
+    fetched = time.perf_counter()
+    if timings is not None and "fetch_ms" not in timings:
+        timings["fetch_ms"] = (fetched - start) * 1000
+
+    game_info, rows = PARSER_ENGINES[engine or parser_engine](html, game_url)
 
+    logger.debug("Game date = '%s', location = '%s'", game_info.get('date', ''), game_info.get('location', ''))
+
+    if rows is None:
+        logger.warning("No stats table found at %s", game_url)
+        run_metrics.record_failure("no_stats_table")
+        if timings is not None:
+            timings["parse_ms"] = (time.perf_counter() - fetched) * 1000
+        return []
+
+    records = records_from_rows(rows, season, game_info)
+
+    if records:
+        logger.debug("Extracted %d player records", len(records))
+    else:
+        logger.warning("No player records found in box score %s", game_url)
+        run_metrics.record_failure("no_player_records")
+
+    if timings is not None:
+        timings["parse_ms"] = (time.perf_counter() - fetched) * 1000
+
+    return records
+
+
+def records_from_rows(rows, season, game_info):
+    """
+    Walk the BoxRows of a stats table and build one record per player line.
+    Each team block starts at a bold "<Team> <score>" header row, skips the
+    column-header row after it and runs until the team's "Totals" row.
+    """
     records = []
-    rows = stats_table.find_all("tr")
     i = 0
 
     while i < len(rows):
         row = rows[i]
-        lead_td = row.find("td", attrs={"colspan": "26"})
-        if lead_td:
-            bold = lead_td.find("b")
-            if not bold:
+        if row.lead:
+            if row.bold is None:
                 i += 1
                 continue
 
-            bold_txt = bold.get_text(strip=True)  # e.g. "Windsor Lancers 78"
-            m = re.match(r"^(.+?)\s+(\d+)$", bold_txt)
+            bold_txt = row.bold  # e.g. "Windsor Lancers 78"
+            m = TEAM_SCORE_PATTERN.match(bold_txt)
             if not m:
                 i += 1
                 continue
@@ -234,21 +652,18 @@ def parse_boxscore_page(game_url, season):
             else:
                 opponent = game_info.get("team1", "")
 
-            print(f"    Processing team: {player_team} (vs {opponent})")
+            logger.debug("Processing team: %s (vs %s)", player_team, opponent)
 
             # Skip the next row (header), then start reading players at i+2
             j = i + 2
             while j < len(rows):
                 r = rows[j]
                 # If we hit a "Totals" row, break out of this team's block
-                total_td = r.find("td", attrs={"colspan": "3", "align": "left"})
-                if total_td and "Totals" in total_td.get_text():
+                if r.totals:
                     break
 
-                # 2) Grab the entire <tr> text with "|" between each <td>, then split
-                raw = r.get_text("|", strip=True)
-                fields_all = raw.split("|")
-                # 3) Filter out any empty strings caused by consecutive "|" or blank <td>
+                fields_all = r.fields_all
+                # Filter out any empty strings caused by consecutive "|" or blank <td>
                 fields = [f for f in fields_all if f.strip() != ""]
 
                 if len(fields) == 18:
@@ -300,13 +715,14 @@ def parse_boxscore_page(game_url, season):
                     # Skip any header rows where player_name starts with "Player"
                     if player_name and not player_name.lower().startswith("player"):
                         records.append(rec)
-                        print(f"     SUCCESS: Added {jersey_cell} – {player_name} (Starter={starter_flag})")
+                        logger.debug("Added %s – %s (Starter=%s)", jersey_cell, player_name, starter_flag)
                 else:
                     # If this is the “team‐…” row (team totals), skip with a different message
                     if fields and fields[0].startswith("team-"):
-                        print("     WARNING: Team Total Statistics Skipped")
+                        logger.debug("Team total statistics skipped")
                     else:
-                        print(f"     WARNING:  Unexpected field count ({len(fields)}) in row: {fields_all}")
+                        logger.warning("Unexpected field count (%d) in row: %s", len(fields), fields_all)
+                        run_metrics.record_failure("unexpected_row")
 
                 j += 1
 
@@ -316,101 +732,541 @@ def parse_boxscore_page(game_url, season):
 
         i += 1
 
-    if records:
-        print(f"    SUCCESS: Extracted {len(records)} player records")
+    return records
+
+
+GAMEID_PATTERN = re.compile(r"Gameid=([^&]+)")
+MANIFEST_FILENAME = "scrape_manifest.json"
+# Columns that identify one player's line in one game
+PLAYER_GAME_KEYS = ["Season", "Date", "Team", "PlayerName"]
+
+
+def game_id_from_link(game_link):
+    """Return the Gameid= value of a box-score link, or None if it has none."""
+    m = GAMEID_PATTERN.search(game_link)
+    return m.group(1) if m else None
+
+
+def load_manifest(player_data_dir):
+    """
+    Load the manifest of already-scraped games: {season: [Gameid, ...]}.
+    Returns an empty manifest if none has been written yet.
+    """
+    path = os.path.join(player_data_dir, MANIFEST_FILENAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, player_data_dir):
+    """Atomically write the scraped-games manifest."""
+    path = os.path.join(player_data_dir, MANIFEST_FILENAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+DEFAULT_BATCH_ROWS = 5000
+
+
+def merge_player_rows(filename, new_rows_file, replace_season=None, chunk_rows=DEFAULT_BATCH_ROWS):
+    """
+    Merge the player rows in the CSV new_rows_file into the CSV at filename
+    without duplicating rows. Both files are streamed in chunks, so memory
+    stays flat however large the master file grows.
+    If replace_season is given, filename is rewritten without that season's
+    rows (a full rescrape of the season) and the new rows are appended.
+    Otherwise only new rows whose PLAYER_GAME_KEYS are not already in filename
+    are appended. Returns the number of rows added.
+    """
+    read_chunks = lambda path, **kw: pd.read_csv(path, dtype=str, keep_default_na=False,
+                                                 chunksize=chunk_rows, **kw)
+    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+        shutil.copyfile(new_rows_file, filename)
+        return sum(len(chunk) for chunk in read_chunks(new_rows_file, usecols=["Season"]))
+
+    seen = set()
+    if replace_season is not None:
+        tmp_path = filename + ".tmp"
+        header = True
+        for chunk in read_chunks(filename):
+            chunk[chunk["Season"] != replace_season].to_csv(tmp_path, mode="w" if header else "a",
+                                                            header=header, index=False)
+            header = False
+        os.replace(tmp_path, filename)
     else:
-        print(f"    WARNING:  No player records found in this box score")
+        for chunk in read_chunks(filename, usecols=PLAYER_GAME_KEYS):
+            seen.update(zip(*(chunk[key] for key in PLAYER_GAME_KEYS)))
 
-    return pd.DataFrame(records)
+    columns = list(pd.read_csv(filename, nrows=0).columns)
+    added = 0
+    for chunk in read_chunks(new_rows_file):
+        keys = list(zip(*(chunk[key] for key in PLAYER_GAME_KEYS)))
+        keep = []
+        for key in keys:
+            keep.append(key not in seen)
+            seen.add(key)
+        chunk = chunk[keep].reindex(columns=columns)
+        chunk.to_csv(filename, mode="a", header=False, index=False)
+        added += len(chunk)
+    return added
 
 
-def scrape_last_four_seasons():
+class SeasonWriter:
     """
-    Enhanced scraping with better progress tracking and error handling
+    Streams parsed player rows into a season output file instead of holding
+    the whole season in memory. Rows are buffered and written every
+    `batch_rows` rows to <csv_path>.part (and, if parquet_path is given, as a
+    Parquet row group to <parquet_path>.part). close() renames the finished
+    files into place, so a half-written season never replaces a good one.
     """
+
+    def __init__(self, csv_path, parquet_path=None, batch_rows=DEFAULT_BATCH_ROWS):
+        if parquet_path and pq is None:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+        self.csv_path = csv_path
+        self.parquet_path = parquet_path
+        self.batch_rows = batch_rows
+        self.buffer = []
+        self.rows_written = 0
+        self.csv_file = open(csv_path + ".part", "w", newline="", encoding="utf-8")
+        self.csv_writer = csv.DictWriter(self.csv_file, fieldnames=RECORD_COLUMNS, lineterminator="\n")
+        self.csv_writer.writeheader()
+        self.parquet_writer = None
+        if parquet_path:
+            schema = pa.schema([(col, pa.string()) for col in RECORD_COLUMNS])
+            self.parquet_writer = pq.ParquetWriter(parquet_path + ".part", schema)
+
+    def write(self, records):
+        self.buffer.extend(records)
+        if len(self.buffer) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        self.csv_writer.writerows(self.buffer)
+        self.csv_file.flush()
+        if self.parquet_writer is not None:
+            self.parquet_writer.write_table(pa.Table.from_pylist(self.buffer, schema=self.parquet_writer.schema))
+        self.rows_written += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        """Write the last batch and move the finished files into place."""
+        self.flush()
+        self.csv_file.close()
+        os.replace(self.csv_path + ".part", self.csv_path)
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+            os.replace(self.parquet_path + ".part", self.parquet_path)
+
+    def abort(self):
+        """Close the files without replacing the previous season output."""
+        self.csv_file.close()
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+
+def csv_to_parquet(csv_path, parquet_path, chunk_rows=DEFAULT_BATCH_ROWS):
+    """Stream a player-game CSV into a Parquet file of string columns."""
+    writer = None
+    for chunk in pd.read_csv(csv_path, dtype=str, keep_default_na=False, chunksize=chunk_rows):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(parquet_path + ".part", table.schema)
+        writer.write_table(table)
+    if writer is not None:
+        writer.close()
+        os.replace(parquet_path + ".part", parquet_path)
+
+
+DEFAULT_JOURNAL_EVERY = 25
+JOURNAL_DIRNAME = "journal"
+# Seasons the current (possibly interrupted) run has fully committed, in the journal directory
+RUN_PROGRESS_FILENAME = "completed_seasons.json"
+
+
+class GameJournal:
+    """
+    Append-only JSON-lines journal of parsed games for one season, used to
+    resume a scrape that was interrupted. Each line is
+      {"gameid": "...", "records": [ {player row}, ... ]}
+    Lines are buffered and written + fsync'd every `flush_every` games, so at
+    most that many games are re-fetched after a crash.
+    """
+
+    def __init__(self, path, flush_every=DEFAULT_JOURNAL_EVERY):
+        self.path = path
+        self.flush_every = flush_every
+        self.pending = []
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    @staticmethod
+    def load(path):
+        """
+        Return the committed games of a journal as a list of (gameid, records).
+        A torn last line (crash mid-write) is ignored.
+        """
+        games = []
+        if not os.path.exists(path):
+            return games
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                games.append((entry["gameid"], entry["records"]))
+        return games
+
+    def append(self, gameid, records):
+        self.pending.append(json.dumps({"gameid": gameid, "records": records}))
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self.pending) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending = []
+
+    def discard(self):
+        """Delete the journal once its games are safely in the season file."""
+        self.pending = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def load_run_progress(journal_dir):
+    """Seasons completed by the last run that did not finish (empty if there is none)."""
+    path = os.path.join(journal_dir, RUN_PROGRESS_FILENAME)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_run_progress(journal_dir, seasons):
+    """Atomically record the seasons the current run has completed; None deletes the record (run finished)."""
+    path = os.path.join(journal_dir, RUN_PROGRESS_FILENAME)
+    if seasons is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    os.makedirs(journal_dir, exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(seasons, f)
+    os.replace(path + ".tmp", path)
+
+
+def scrape_game(game_link, season):
+    """
+    Worker task: fetch and parse one box score (fetch_page applies the shared
+    rate limiter and retries). Returns (records, timings dict); records is None
+    when the page could not be downloaded, so the caller can queue the game
+    for another attempt instead of losing it.
+    """
+    timings = {}
+    start = time.perf_counter()
+    try:
+        html = fetch_page(game_link)
+    except requests.exceptions.RequestException as e:
+        logger.error("Request failed for %s: %s", game_link, e)
+        run_metrics.record_failure(failure_reason(e))
+        return None, timings
+    timings["fetch_ms"] = (time.perf_counter() - start) * 1000
+    records = parse_boxscore_records(game_link, season, timings=timings, html=html)
+    return records, timings
+
+
+def scrape_last_four_seasons(workers=DEFAULT_WORKERS, rate=DEFAULT_RATE,
+                             cache_dir=DEFAULT_CACHE_DIR, cache_ttl_hours=DEFAULT_TTL_HOURS,
+                             cache_max_mb=DEFAULT_MAX_MB, replay=False, incremental=False,
+                             resume=False, journal_every=DEFAULT_JOURNAL_EVERY,
+                             parquet=False, batch_rows=DEFAULT_BATCH_ROWS, parser=DEFAULT_PARSER):
+    """
+    Enhanced scraping with better progress tracking and error handling.
+    Box scores are fetched by a pool of `workers` threads sharing one
+    TokenBucket limited to `rate` pages/sec. Results are consumed in link
+    order, so the season files keep a deterministic row order (games that only
+    succeed in the final retry pass are written last).
+
+    Parsed rows are streamed to the season file by a SeasonWriter in batches of
+    batch_rows rows; with parquet=True a playerGameData<season>.parquet copy
+    is written alongside the CSV. `parser` picks the HTML engine for box scores.
+
+    Every page goes through a ResponseCache in cache_dir (None disables it).
+    With replay=True nothing is downloaded: the whole archive is re-parsed from
+    the cache, which regenerates PlayerData/ after a parser fix.
+
+    Scraped Gameids are recorded per season in PlayerData/scrape_manifest.json.
+    With incremental=True only games missing from the manifest are fetched,
+    and their rows are merged into the season file and playerGameDataAll.csv.
+
+    Parsed games are journaled to PlayerData/journal/<season>.jsonl every
+    journal_every games, and each season the run commits is recorded in
+    PlayerData/journal/completed_seasons.json until the whole run finishes.
+    With resume=True, seasons the interrupted run already committed are
+    skipped, and games already in a season's journal are loaded from it
+    instead of being fetched again, so the scrape restarts right after the
+    last committed game.
+
+    At the end a JSON run report (requests, bytes, cache hits, fetch/parse
+    latency percentiles, rows/sec per season and failures by reason) is
+    written to PlayerData/scrape_run_report.json.
+    """
+    if replay and cache_dir is None:
+        logger.error("Replay mode needs a response cache directory")
+        return
+    if parquet and pq is None:
+        logger.error("Parquet output needs pyarrow (pip install pyarrow)")
+        return
+    if parser not in PARSER_ENGINES:
+        logger.error("Unknown or unavailable parser engine '%s' (have: %s)", parser, ", ".join(PARSER_ENGINES))
+        return
+    global parser_engine
+    parser_engine = parser
+    cache = ResponseCache(cache_dir, ttl_hours=cache_ttl_hours, max_mb=cache_max_mb) if cache_dir else None
+    metrics = RunMetrics("scrape")
+    configure_fetching(limiter=None if replay else TokenBucket(rate), cache=cache, replay=replay, metrics=metrics)
+
     # Create PlayerData directory if it doesn't exist
     player_data_dir = "PlayerData"
     os.makedirs(player_data_dir, exist_ok=True)
 
+    manifest = load_manifest(player_data_dir)
+    journal_dir = os.path.join(player_data_dir, JOURNAL_DIRNAME)
+    completed_seasons = load_run_progress(journal_dir) if resume else []
+    save_run_progress(journal_dir, completed_seasons)
+
     seasons = get_last_seasons(n=4)
     if not seasons:
-        print("ERROR: No seasons found, exiting...")
+        logger.error("No seasons found, exiting...")
         return
     seasons = list(reversed(seasons))
 
-    print(f" Found seasons: {', '.join(seasons)}")
+    logger.info("Found seasons: %s", ", ".join(seasons))
+    if replay:
+        logger.info("REPLAY: Re-parsing cached pages from %s (no network)", cache_dir)
+    else:
+        logger.info("Fetching with %d worker(s) at up to %g pages/sec", workers, rate)
     
     for season_idx, season in enumerate(seasons):
-        print(f"\n{'='*60}")
-        print(f"IN PROGRESS:  SCRAPING SEASON: {season} ({season_idx + 1}/4)")
-        print(f"{'='*60}")
+        filename = os.path.join(player_data_dir, f"playerGameData{season}.csv")
+        if season in completed_seasons and os.path.exists(filename):
+            logger.info("RESUME: season %s was completed before the interruption, skipping", season)
+            continue
+        logger.info("SCRAPING SEASON: %s (%d/%d)", season, season_idx + 1, len(seasons))
+        season_start = time.perf_counter()
         
         links = get_game_links_for_season(season)
         if not links:
-            print(f"WARNING:  No games found for {season}, skipping...")
+            logger.warning("No games found for %s, skipping...", season)
             continue
-            
-        season_records = []
+
+        scraped_ids = set(manifest.get(season, [])) if incremental else set()
+        if incremental:
+            links = [link for link in links if game_id_from_link(link) not in scraped_ids]
+            logger.info("INCREMENTAL: %d new games (%d already scraped)", len(links), len(scraped_ids))
+            if not links:
+                continue
+
+        parquet_filename = os.path.join(player_data_dir, f"playerGameData{season}.parquet")
+        master_filename = os.path.join(player_data_dir, "playerGameDataAll.csv")
+        # In incremental mode only the new rows are streamed out, then merged in
+        new_rows_filename = os.path.join(player_data_dir, f"playerGameData{season}_new.csv")
+        writer = SeasonWriter(new_rows_filename if incremental else filename,
+                              parquet_path=parquet_filename if parquet and not incremental else None,
+                              batch_rows=batch_rows)
+
+        first_games = []   # records of the first games, kept only for the first-5 checkpoint
         games_saved_count = 0
         successful_games = 0
+        failed_links = []
+        fetch_ms = []
+        parse_ms = []
 
-        for idx, game_link in enumerate(links, start=1):
-            print(f"\n   Game [{idx}/{len(links)}]: {game_link.split('Gameid=')[-1] if 'Gameid=' in game_link else 'Unknown'}")
-            
-            df_game = parse_boxscore_page(game_link, season)
-            
-            if df_game.empty:
-                print(f"   WARNING:  No data extracted from this game")
-                continue
+        journal = GameJournal(os.path.join(journal_dir, f"{season}.jsonl"), journal_every)
+        if resume:
+            journaled_ids = set()
+            for gameid, records in GameJournal.load(journal.path):
+                writer.write(records)
+                journaled_ids.add(gameid)
+                games_saved_count += 1
+                successful_games += 1
+            if journaled_ids:
+                scraped_ids.update(journaled_ids)
+                links = [link for link in links if game_id_from_link(link) not in journaled_ids]
+                logger.info("RESUME: %d games loaded from %s, %d left", len(journaled_ids), journal.path, len(links))
+        else:
+            journal.discard()
+
+        def handle_result(game_link, records, timings):
+            nonlocal games_saved_count, successful_games
+            gameid = game_id_from_link(game_link)
+            if "fetch_ms" in timings:
+                fetch_ms.append(timings["fetch_ms"])
+                metrics.observe("fetch_ms", timings["fetch_ms"])
+            if "parse_ms" in timings:
+                parse_ms.append(timings["parse_ms"])
+                metrics.observe("parse_ms", timings["parse_ms"])
+                logger.debug("Timing: fetch %.0f ms, parse %.0f ms", timings["fetch_ms"], timings["parse_ms"])
+
+            if records is None:
+                logger.warning("Download of %s failed, queued for a retry pass", game_link)
+                failed_links.append(game_link)
+                return
+            if not records:
+                logger.warning("No data extracted from %s", game_link)
+                return
 
-            season_records.append(df_game)
+            writer.write(records)
+            scraped_ids.add(gameid)
+            journal.append(gameid, records)
             games_saved_count += 1
             successful_games += 1
 
             # Checkpoint after 5 games in the first season
-            if season_idx == 0 and games_saved_count == 5:
-                checkpoint_df = pd.concat(season_records, ignore_index=True)
-                checkpoint_filename = os.path.join(player_data_dir, f"playerGameData{season}_first5.csv")
-                checkpoint_df.to_csv(checkpoint_filename, index=False)
-                print(f"      CHECKPOINT: First 5 games saved to {checkpoint_filename}")
-
-            # Delay between requests
-            time.sleep(0.3)
-
-        # Save season data
-        if season_records:
-            season_df = pd.concat(season_records, ignore_index=True)
-            print(f"\n   Stats Season {season} Summary:")
-            print(f"   • Total games processed: {len(links)}")
-            print(f"   • Games with data: {successful_games}")
-            print(f"   • Total player records: {len(season_df)}")
-        else:
-            season_df = pd.DataFrame()
-            print(f"\n   WARNING:  No data collected for season {season}")
+            if season_idx == 0 and not incremental and len(first_games) < 5:
+                first_games.append(records)
+                if len(first_games) == 5:
+                    checkpoint_df = pd.DataFrame([rec for game in first_games for rec in game],
+                                                 columns=RECORD_COLUMNS)
+                    checkpoint_filename = os.path.join(player_data_dir, f"playerGameData{season}_first5.csv")
+                    checkpoint_df.to_csv(checkpoint_filename, index=False)
+                    logger.info("CHECKPOINT: First 5 games saved to %s", checkpoint_filename)
 
-        filename = os.path.join(player_data_dir, f"playerGameData{season}.csv")
-        season_df.to_csv(filename, index=False)
-        print(f"   SUCCESS  Season data saved: {filename}")
-        master_filename = os.path.join(player_data_dir, "playerGameDataAll.csv")
-        if os.path.exists(master_filename):
-            season_df.to_csv(master_filename, mode='a', header=False, index=False)
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            # executor.map yields results in submission order, not completion order
+            results = executor.map(lambda link: scrape_game(link, season), links)
+
+            for idx, (game_link, (records, timings)) in enumerate(zip(links, results), start=1):
+                logger.debug("Game [%d/%d]: %s", idx, len(links), game_id_from_link(game_link) or "Unknown")
+                handle_result(game_link, records, timings)
+
+            # Final pass over games whose download failed, once the site has had time to recover
+            retry_links, failed_links = failed_links, []
+            if retry_links:
+                logger.info("RETRY PASS: %d failed games", len(retry_links))
+                results = executor.map(lambda link: scrape_game(link, season), retry_links)
+                for game_link, (records, timings) in zip(retry_links, results):
+                    logger.debug("Retry game: %s", game_id_from_link(game_link) or "Unknown")
+                    handle_result(game_link, records, timings)
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            # On Ctrl-C or a crash, commit what was parsed and drop queued fetches
+            journal.flush()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        writer.close()
+        metrics.add_stage(f"scrape {season}", time.perf_counter() - season_start, writer.rows_written)
+        metrics.count("games_scraped", successful_games)
+        for _ in failed_links:
+            metrics.record_failure("still_failing_after_retry_pass")
+
+        # Season summary
+        if writer.rows_written:
+            logger.info("Season %s summary: %d games processed, %d with data, %d player records",
+                        season, len(links), successful_games, writer.rows_written)
         else:
-            season_df.to_csv(master_filename, index=False)
+            logger.warning("No data collected for season %s", season)
+        if failed_links:
+            logger.warning("Games still failing after retry pass: %d", len(failed_links))
+            for game_link in failed_links:
+                logger.warning("   - %s", game_link)
+        if parse_ms:
+            logger.info("Avg fetch per game: %.0f ms, avg parse per game: %.0f ms",
+                        sum(fetch_ms) / len(fetch_ms), sum(parse_ms) / len(parse_ms))
+
+        with metrics.timed("merge"):
+            if incremental:
+                added = merge_player_rows(filename, new_rows_filename, chunk_rows=batch_rows)
+                logger.info("%d new rows merged into %s", added, filename)
+                if writer.rows_written:
+                    merge_player_rows(master_filename, new_rows_filename, chunk_rows=batch_rows)
+                os.remove(new_rows_filename)
+                if parquet:
+                    csv_to_parquet(filename, parquet_filename, chunk_rows=batch_rows)
+            else:
+                logger.info("Season data saved: %s", filename)
+                if writer.rows_written:
+                    merge_player_rows(master_filename, filename, replace_season=season, chunk_rows=batch_rows)
+        if parquet:
+            logger.info("Parquet copy saved: %s", parquet_filename)
+
+        manifest[season] = sorted(scraped_ids, key=lambda gid: (len(gid), gid))
+        save_manifest(manifest, player_data_dir)
+        completed_seasons.append(season)
+        save_run_progress(journal_dir, completed_seasons)
+        journal.discard()
     
         # Break between seasons
-        if season_idx < len(seasons) - 1:
-            print(f"\n   LOADING:  Taking a 3-second break before next season...")
+        if season_idx < len(seasons) - 1 and not replay:
+            logger.info("Taking a 3-second break before next season...")
             time.sleep(3)
 
-    print(f"\n{'='*60}")
-    print(" SCRAPING COMPLETE!")
-    print("📁  Check your directory for the following files:")
-    for season in seasons:
-        print(f"   • playerGameData{season}.csv")
-    if len(seasons) > 0:
-        print(f"   • playerGameData{seasons[0]}_first5.csv (checkpoint)")
-    print(f"{'='*60}")
+    save_run_progress(journal_dir, None)
+
+    if cache is not None:
+        evicted = cache.evict()
+        metrics.count("cache_evicted", evicted)
+        logger.info("Cache: %d hits, %d misses, %d entries evicted", cache.hits, cache.misses, evicted)
+
+    report_path = metrics.write_report(os.path.join(player_data_dir, "scrape_run_report.json"))
+    logger.info("SCRAPING COMPLETE! Season files: %s",
+                ", ".join(f"playerGameData{season}.csv" for season in seasons))
+    logger.info("Run report saved to: %s", report_path)
 
 
 if __name__ == "__main__":
-    scrape_last_four_seasons()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape USports men's basketball box scores")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="number of concurrent box-score fetch workers")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="maximum box-score pages per second across all workers")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="directory of the on-disk response cache")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always download pages and do not store them")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL_HOURS,
+                        help="hours before cached pages of an unfinished season expire")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_MB,
+                        help="size limit of the cache before least recently used pages are evicted")
+    parser.add_argument("--replay", action="store_true",
+                        help="re-parse every cached page without touching the network")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only fetch games missing from the scrape manifest and merge them in")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted scrape: skip seasons it already committed "
+                             "and reuse the per-season journals")
+    parser.add_argument("--journal-every", type=int, default=DEFAULT_JOURNAL_EVERY,
+                        help="number of parsed games between journal flushes")
+    parser.add_argument("--parquet", action="store_true",
+                        help="also write each season as Parquet (needs pyarrow)")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS,
+                        help="player rows buffered before each write to the season output")
+    parser.add_argument("--parser", default=DEFAULT_PARSER, choices=["bs4", "lxml"],
+                        help="HTML engine for box scores (lxml is much faster, bs4 is the reference)")
+    parser.add_argument("--compare-parsers", action="store_true",
+                        help="check the parser engines against each other on every cached box score and exit")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(quiet=args.quiet, verbose=args.verbose)
+    if args.compare_parsers:
+        compare_parser_engines(args.cache_dir)
+        sys.exit(0)
+    scrape_last_four_seasons(workers=args.workers, rate=args.rate,
+                             cache_dir=None if args.no_cache else args.cache_dir,
+                             cache_ttl_hours=args.cache_ttl, cache_max_mb=args.cache_max_mb,
+                             replay=args.replay, incremental=args.incremental,
+                             resume=args.resume, journal_every=args.journal_every,
+                             parquet=args.parquet, batch_rows=args.batch_rows, parser=args.parser)
\ No newline at end of file
@@ -0,0 +1,392 @@
+import os
+import json
+import time
+import argparse
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pandas as pd
+
+from FeatureEngine import (build_features, load_games, load_new_games, load_state, save_features, update_features,
+                           EWM_FEATURES, FEATURES_FILENAME, MIN_GAMES, starter_categories)
+from MinutesModel import MinutesModel, load_features, DEFAULT_MODEL_PATH
+from PlayerDataProcessor import processed_source
+from RunMetrics import setup_logging, add_logging_arguments
+from TeamRegistry import load_team_registry, name_key, UNKNOWN_TEAM
+from combine import find_inputs
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Input files are checked for new games at most this often (on the next query)
+DEFAULT_REFRESH_SECONDS = 60
+# Team queries list players whose last game is at most this many days before the team's last game
+ROSTER_DAYS = 60
+
+# Feature vector kept per player (every model feature can be picked from it)
+INDEX_COLUMNS = ["Is_Home", "Is_Away", "Is_Neutral", "Rest_Days", "Team_Avg_Minutes_Season", *EWM_FEATURES]
+
+
+def check_queries(queries):
+    """Raise ValueError unless queries is a list of {"player": str, "team": str} objects (either key optional)"""
+    if not isinstance(queries, list):
+        raise ValueError(f"queries must be a list, got {type(queries).__name__}")
+    for query in queries:
+        if not isinstance(query, dict):
+            raise ValueError(f"each query must be an object, got {json.dumps(query)}")
+        for key in ("player", "team"):
+            if not isinstance(query.get(key), (str, type(None))):
+                raise ValueError(f"query {key} must be a string: {json.dumps(query)}")
+
+
+def pending_vector(pending):
+    """INDEX_COLUMNS values of a player's pending row in the FeatureState"""
+    home_away = pending["HomeAway"]
+    return [float(home_away == "Home"), float(home_away == "Away"), float(home_away not in ("Home", "Away")),
+            *(np.nan if pending[col] is None else float(pending[col]) for col in INDEX_COLUMNS[3:])]
+
+
+class PlayerIndex:
+    """
+    Latest feature vector of every player (a name on a team, as in the
+    FeatureState): the features of their last game, which is what
+    Target_Next_Mins is predicted from. Vectors are rows of one float matrix,
+    looked up by player name (exact or ignoring case and dots) and by team,
+    with the model's prediction of every row computed when the row changes,
+    so a query is a few dict lookups.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.names = []           # row → player name
+        self.teams = []           # row → team abbreviation
+        self.last_games = []      # row → date of the last game
+        self.games = []           # row → games played
+        self.rows = {}            # (player name, abbreviation) → row
+        self.by_name = {}         # player name → rows
+        self.by_key = {}          # name_key(player name) → rows
+        self.by_team = {}         # abbreviation → rows
+        self.matrix = np.empty((0, len(INDEX_COLUMNS)))
+        self.categories = np.empty(0, dtype=object)
+        self.predictions = np.empty(0)
+
+    def __len__(self):
+        return len(self.names)
+
+    def update(self, state, players):
+        """(Re)index the given (name, abbr) players of state; returns the number of rows written"""
+        players = [key for key in players if key in state.players]
+        if not players:
+            return 0
+        new_rows = len(self.names) + sum(key not in self.rows for key in players)
+        if new_rows > len(self.matrix):
+            self.matrix = np.vstack([self.matrix, np.full((new_rows - len(self.matrix), len(INDEX_COLUMNS)), np.nan)])
+            self.categories = np.concatenate([self.categories, np.full(new_rows - len(self.categories), None)])
+            self.predictions = np.concatenate([self.predictions, np.full(new_rows - len(self.predictions), np.nan)])
+
+        touched = []
+        for key in players:
+            player = state.players[key]
+            row = self.rows.get(key)
+            if row is None:
+                name, team = key
+                row = self.rows[key] = len(self.names)
+                self.names.append(name)
+                self.teams.append(team)
+                self.last_games.append(None)
+                self.games.append(0)
+                self.by_name.setdefault(name, []).append(row)
+                self.by_key.setdefault(name_key(name), []).append(row)
+                self.by_team.setdefault(team, []).append(row)
+            self.last_games[row] = player["last_date"]
+            self.games[row] = player["games"]
+            self.matrix[row] = pending_vector(player["pending"])
+            touched.append(row)
+
+        touched = np.array(touched)
+        vectors = pd.DataFrame(self.matrix[touched], columns=INDEX_COLUMNS)
+        self.categories[touched] = starter_categories(vectors["StarterFlag_ewm_02"])
+        self.predictions[touched] = self.model.predict(vectors, self.categories[touched])
+        return len(touched)
+
+    def find(self, player, team=None):
+        """Rows of a player (in team, when given)"""
+        rows = self.by_name.get(player) or self.by_key.get(name_key(player), [])
+        return [row for row in rows if team is None or self.teams[row] == team]
+
+    def roster(self, team, min_games=0):
+        """Rows of a team's current players: min_games+ games, the last within ROSTER_DAYS of the team's last game"""
+        rows = self.by_team.get(team, [])
+        if not rows:
+            return []
+        cutoff = max(self.last_games[row] for row in rows) - pd.Timedelta(days=ROSTER_DAYS)
+        return [row for row in rows if self.games[row] >= min_games and self.last_games[row] >= cutoff]
+
+    def answer(self, row):
+        prediction = self.predictions[row]
+        return {
+            "player": self.names[row],
+            "team": self.teams[row],
+            "last_game": self.last_games[row].date().isoformat(),
+            "games": self.games[row],
+            "category": self.categories[row],
+            "predicted_minutes": None if np.isnan(prediction) else round(float(prediction), 2),
+            "features": {col: None if np.isnan(value) else float(value)
+                         for col, value in zip(INDEX_COLUMNS, self.matrix[row])},
+        }
+
+
+class PredictionService:
+    """
+    Next-game minutes predictions for every player, kept in memory.
+      state  FeatureState of the player and team histories, loaded from
+             <features_dir>/feature_state.json and brought up to date with
+             every game in input_dir after its last date (or built from
+             input_dir, and saved, if there is none)
+      model  MinutesModel loaded from model_path, or fitted on
+             <features_dir>/basketball_minutes_features_FINAL.csv if there
+             is no saved model
+      index  PlayerIndex of each player's latest feature vector
+    refresh() checks the season files in input_dir and adds games newer than
+    the state in constant time per game, reindexing only the players who
+    played; queries call it at most every refresh_seconds. Games added at
+    startup or by refresh() go through FeatureEngine.update_features, so the
+    saved state and feature files in features_dir stay current and a restart
+    does not add them again. Safe to query from several threads.
+    """
+
+    def __init__(self, input_dir="PlayerDataHomeAway", features_dir="BaseData", model=None,
+                 model_path=DEFAULT_MODEL_PATH, refresh_seconds=DEFAULT_REFRESH_SECONDS):
+        self.input_dir = input_dir
+        self.features_dir = features_dir
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.Lock()
+        self.registry = load_team_registry()
+
+        os.makedirs(features_dir, exist_ok=True)
+        self.sources = self.source_stats()
+        self.state = load_state(features_dir)
+        if self.state is not None:
+            logger.info("Loaded feature state up to %s from %s", self.state.last_date.date(), features_dir)
+            self.add_new_games(list(self.sources))
+        else:
+            rows, self.state = build_features(load_games(input_dir))
+            save_features(rows, self.state, features_dir)
+            logger.info("No saved feature state: built and saved it from %s (up to %s)", input_dir,
+                        self.state.last_date.date())
+
+        if model is None and os.path.exists(model_path):
+            model = MinutesModel.load(model_path)
+            logger.info("Loaded model from %s", model_path)
+        elif model is None:
+            train = load_features(os.path.join(features_dir, FEATURES_FILENAME))
+            model = MinutesModel().fit(train)
+            logger.info("No saved model: fitted one on %d feature rows", len(train))
+
+        self.index = PlayerIndex(model)
+        self.index.update(self.state, self.state.players)
+        self.unindexed = set()   # players whose new games are in the state but not yet in the index
+        self.checked_at = time.monotonic()
+        logger.info("Indexed %d players of %d teams", len(self.index), len(self.index.by_team))
+
+    def source_stats(self):
+        """Season file → (source read, mtime, size) of the file read for it, to notice new games cheaply"""
+        stats = {}
+        for path in find_inputs(self.input_dir):
+            source = processed_source(path)
+            stat = os.stat(source)
+            stats[path] = (source, stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    def add_new_games(self, inputs):
+        """
+        Add the games of the season files inputs dated after the state's last
+        date (see FeatureEngine.load_new_games), saving the state and appending
+        to the feature files. Returns the (name, abbr) players who played.
+        If adding the games fails, update_features puts the state back as it
+        was, so the next call loads and adds the same games again.
+        """
+        last_date = self.state.last_date
+        games = load_new_games(inputs, self.state)
+        if not len(games):
+            return []
+        update_features(self.state, games, self.features_dir)
+        players = [key for key, player in self.state.players.items() if player["last_date"] > last_date]
+        logger.info("Added %d new game rows (%s to %s) from %d file(s); feature state saved", len(games),
+                    games["Date"].min().date(), self.state.last_date.date(), len(inputs))
+        return players
+
+    def refresh(self, force=False):
+        """
+        Add the games of changed season files dated after the state's last
+        date and reindex the players who played. Unless force is set, does
+        nothing if the files were checked less than refresh_seconds ago.
+        Returns the number of players reindexed.
+        """
+        with self.lock:
+            if not force and time.monotonic() - self.checked_at < self.refresh_seconds:
+                return 0
+            self.checked_at = time.monotonic()
+            sources = self.source_stats()
+            changed = [path for path, stat in sources.items() if self.sources.get(path) != stat]
+            if not changed and not self.unindexed:
+                return 0
+            self.unindexed.update(self.add_new_games(changed))
+            self.sources = sources
+            # Kept until indexed, so a failure here is retried by the next refresh
+            updated = self.index.update(self.state, sorted(self.unindexed))
+            self.unindexed.clear()
+        logger.info("Refreshed from %d changed file(s): %d players reindexed", len(changed), updated)
+        return updated
+
+    def team_abbr(self, team):
+        """Abbreviation of a team name, alias or abbreviation (the text itself if unknown)"""
+        if team is None:
+            return None
+        team_id = self.registry.lookup(team)
+        return self.registry.abbrs[team_id] if team_id != UNKNOWN_TEAM and self.registry.abbrs[team_id] else team
+
+    def predict(self, player, team=None):
+        """Predictions for a player (several if the name matches players of more than one team)"""
+        self.refresh()
+        with self.lock:
+            return [self.index.answer(row) for row in self.index.find(player, self.team_abbr(team))]
+
+    def predict_team(self, team, min_games=0):
+        """Predictions for a team's current players (see PlayerIndex.roster), most minutes first"""
+        self.refresh()
+        with self.lock:
+            answers = [self.index.answer(row) for row in self.index.roster(self.team_abbr(team), min_games)]
+        return sorted(answers, key=lambda a: -1 if a["predicted_minutes"] is None else a["predicted_minutes"],
+                      reverse=True)
+
+    def predict_many(self, queries):
+        """
+        Batch predictions (e.g. a whole slate): each query is {"player": ...,
+        "team": ...} with either key optional; a team-only query returns the
+        team's current players with MIN_GAMES+ games. Returns one result per
+        query. Raises ValueError for malformed queries (see check_queries).
+        """
+        check_queries(queries)
+        self.refresh()
+        results = []
+        with self.lock:
+            for query in queries:
+                team = self.team_abbr(query.get("team"))
+                if query.get("player") is None:
+                    rows = self.index.roster(team, MIN_GAMES)
+                else:
+                    rows = self.index.find(query["player"], team)
+                results.append({"query": query, "predictions": [self.index.answer(row) for row in rows]})
+        return results
+
+    def health(self):
+        with self.lock:
+            return {"last_game": self.state.last_date.date().isoformat() if self.state.last_date is not None else None,
+                    "players": len(self.index), "teams": len(self.index.by_team),
+                    "model": sorted(self.index.model.coefs), "sources": len(self.sources)}
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """
+    JSON endpoints of a PredictionService (set as the server's .service):
+      GET  /predict?player=<name>[&team=<team>]
+      GET  /team?team=<team>[&min_games=<n>]
+      POST /predict  {"queries": [{"player": ..., "team": ...}, ...]}
+      GET  /health
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        service = self.server.service
+        if url.path == "/predict" and "player" in params:
+            self.answer(service.predict, params["player"], params.get("team"))
+        elif url.path == "/team" and "team" in params:
+            try:
+                min_games = int(params.get("min_games", 0))
+            except ValueError:
+                self.send_json(400, {"error": f"min_games must be an integer, got {params['min_games']!r}"})
+                return
+            self.answer(service.predict_team, params["team"], min_games)
+        elif url.path == "/health":
+            self.answer(service.health)
+        else:
+            self.send_json(404, {"error": f"unknown endpoint or missing parameter: {self.path}"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/predict":
+            self.send_json(404, {"error": f"unknown endpoint: {self.path}"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            queries = body["queries"]
+            check_queries(queries)
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {"error": f"expected {{\"queries\": [...]}}: {e}"})
+            return
+        self.answer(self.server.service.predict_many, queries)
+
+    def answer(self, method, *args):
+        """Send method(*args) as JSON, or a 500 with the error if it raises"""
+        try:
+            payload = method(*args)
+        except Exception as e:
+            logger.exception("Failed to answer %s %s", self.command, self.path)
+            self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self.send_json(200, payload)
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+
+def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Answer HTTP queries on host:port until interrupted"""
+    server = ThreadingHTTPServer((host, port), PredictionHandler)
+    server.service = service
+    logger.info("Serving predictions on http://%s:%d (GET /predict?player=..., GET /team?team=..., POST /predict)",
+                host, server.server_port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Next-game minutes predictions, as a one-off query or a local HTTP service")
+    parser.add_argument("--input-dir", default="PlayerDataHomeAway", help="directory with the cleaned seasons")
+    parser.add_argument("--features-dir", default="BaseData", help="directory with the feature dataset and state")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="saved MinutesModel (fitted if missing)")
+    parser.add_argument("--player", help="print the prediction for this player and exit")
+    parser.add_argument("--team", help="restrict --player to a team, or print a whole team's predictions")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address the HTTP service listens on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port of the HTTP service")
+    parser.add_argument("--refresh-seconds", type=float, default=DEFAULT_REFRESH_SECONDS,
+                        help="how often queries check the season files for new games")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(quiet=args.quiet, verbose=args.verbose)
+
+    service = PredictionService(args.input_dir, args.features_dir, model_path=args.model,
+                                refresh_seconds=args.refresh_seconds)
+    if args.player:
+        print(json.dumps(service.predict(args.player, args.team), indent=2))
+    elif args.team:
+        print(json.dumps(service.predict_team(args.team), indent=2))
+    else:
+        serve(service, args.host, args.port)
@@ -0,0 +1,164 @@
+import os
+import re
+import json
+import gzip
+import time
+import hashlib
+import threading
+from datetime import date
+
+
+DEFAULT_CACHE_DIR = "HttpCache"
+DEFAULT_TTL_HOURS = 12
+DEFAULT_MAX_MB = 500
+
+SEASON_PATTERN = re.compile(r"Season=([0-9]{4})-[0-9]{2}")
+
+
+def season_is_complete(url, today=None):
+    """
+    Return True if url belongs to a season that is over (its pages will not
+    change any more). A season "YYYY-YY" is treated as finished once May 1st
+    of its second calendar year has passed. URLs without a season (e.g. the
+    past-seasons index) are never considered complete.
+    """
+    m = SEASON_PATTERN.search(url)
+    if not m:
+        return False
+    today = today or date.today()
+    return today >= date(int(m.group(1)) + 1, 5, 1)
+
+
+class ResponseCache:
+    """
+    Compressed on-disk cache of page bodies, keyed by URL.
+
+    Layout under cache_dir:
+      blobs/<sha256 of body>.html.gz   → gzip-compressed page body (content-addressed,
+                                         so identical pages are stored once)
+      entries/<sha256 of url>.json     → {"url", "blob", "fetched_at", "size"}
+
+    Entries for finished seasons never expire; all other entries expire after
+    ttl_hours. When the blobs grow past max_mb, the least recently used entries
+    are evicted first.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl_hours=DEFAULT_TTL_HOURS, max_mb=DEFAULT_MAX_MB):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        self.entry_dir = os.path.join(cache_dir, "entries")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.entry_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, url):
+        return os.path.join(self.entry_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _blob_path(self, blob):
+        return os.path.join(self.blob_dir, blob + ".html.gz")
+
+    def get(self, url, ignore_ttl=False):
+        """
+        Return the cached body for url, or None if it is missing or stale.
+        With ignore_ttl=True any stored copy is returned (used by replay mode).
+        """
+        entry_path = self._entry_path(url)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            fresh = (ignore_ttl or season_is_complete(url)
+                     or time.time() - entry["fetched_at"] < self.ttl_seconds)
+            if not fresh:
+                self._count(hit=False)
+                return None
+            with gzip.open(self._blob_path(entry["blob"]), "rt", encoding="utf-8") as f:
+                text = f.read()
+        except (OSError, ValueError, KeyError):
+            self._count(hit=False)
+            return None
+
+        # Touch the entry so eviction sees it as recently used
+        os.utime(entry_path)
+        self._count(hit=True)
+        return text
+
+    def _count(self, hit):
+        # get() is called from the scraper's worker threads
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, url, text):
+        """Store text as the body for url."""
+        data = text.encode("utf-8")
+        blob = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(blob)
+        blob_tmp_path = None
+        if not os.path.exists(blob_path):
+            blob_tmp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+            with gzip.open(blob_tmp_path, "wb") as f:
+                f.write(data)
+
+        entry = {"url": url, "blob": blob, "fetched_at": time.time(), "size": len(data)}
+        entry_path = self._entry_path(url)
+        tmp_path = f"{entry_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        # Publish blob and entry together so evict() never sees the blob unreferenced
+        with self.lock:
+            if blob_tmp_path is not None:
+                os.replace(blob_tmp_path, blob_path)
+            os.replace(tmp_path, entry_path)
+
+    def evict(self):
+        """
+        Delete blobs no entry references any more (e.g. the old body of a
+        re-fetched page), then remove least recently used entries, and the
+        blobs only they referenced, until the blobs fit in max_bytes.
+        Returns the number of entries removed.
+        """
+        with self.lock:
+            entries = []
+            for name in os.listdir(self.entry_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(self.entry_dir, name)
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        entries.append((os.path.getmtime(path), path, json.load(f)["blob"]))
+                except (OSError, ValueError, KeyError):
+                    os.remove(path)
+
+            blob_sizes = {}
+            for name in os.listdir(self.blob_dir):
+                if name.endswith(".html.gz"):
+                    blob_sizes[name[:-len(".html.gz")]] = os.path.getsize(os.path.join(self.blob_dir, name))
+            total = sum(blob_sizes.values())
+
+            refs = {}
+            for _, _, blob in entries:
+                refs[blob] = refs.get(blob, 0) + 1
+
+            for blob, size in list(blob_sizes.items()):
+                if blob not in refs:
+                    os.remove(self._blob_path(blob))
+                    total -= size
+                    del blob_sizes[blob]
+
+            removed = 0
+            for _, path, blob in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                removed += 1
+                refs[blob] -= 1
+                if refs[blob] == 0 and blob in blob_sizes:
+                    os.remove(self._blob_path(blob))
+                    total -= blob_sizes[blob]
+            return removed
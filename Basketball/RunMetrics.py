@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import contextlib
+from collections import Counter
+from datetime import datetime
+
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+LOG_DATE_FORMAT = "%H:%M:%S"
+
+
+def setup_logging(quiet=False, verbose=False):
+    """
+    Configure the root logger for a pipeline run.
+      default  → INFO: progress and season/file summaries
+      verbose  → DEBUG: also every game, team block and player row
+      quiet    → WARNING: only problems
+    """
+    level = logging.WARNING if quiet else logging.DEBUG if verbose else logging.INFO
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+
+def add_logging_arguments(parser):
+    """Add the shared --quiet / --verbose flags to an argparse parser."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-q", "--quiet", action="store_true", help="only log warnings and errors")
+    group.add_argument("-v", "--verbose", action="store_true", help="log every game and player row")
+
+
+@contextlib.contextmanager
+def quiet_logging():
+    """Silence all log output for the duration of the block (used when timing code)."""
+    previous = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        yield
+    finally:
+        logging.disable(previous)
+
+
+def init_worker(log_level):
+    """Pool initializer: keep the parent's log level in this worker"""
+    if not logging.getLogger().handlers:
+        setup_logging()
+    logging.getLogger().setLevel(log_level)
+
+
+def collect_results(futures):
+    """Yield each future's result in submission order; a crashed worker becomes an error result"""
+    for future in futures:
+        try:
+            yield future.result()
+        except Exception as e:
+            yield {'error': e}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class RunMetrics:
+    """
+    Thread-safe counters and timers for one pipeline run, dumped as a JSON
+    run report at the end. Tracks:
+      - requests and bytes downloaded (requests/sec over the run)
+      - per-stage seconds and rows (rows/sec per stage)
+      - observed values such as parse ms per page (mean, p50, p95, max)
+      - failures by reason (and the error of each failed item), plus
+        free-form counters (cache hits, ...) and notes (any JSON value)
+    """
+
+    def __init__(self, run_name):
+        self.run_name = run_name
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_downloaded = 0
+        self.stages = {}
+        self.observations = {}
+        self.failures = Counter()
+        self.errors = {}
+        self.counters = Counter()
+        self.notes = {}
+
+    def record_request(self, n_bytes):
+        with self.lock:
+            self.requests += 1
+            self.bytes_downloaded += n_bytes
+
+    def record_failure(self, reason):
+        with self.lock:
+            self.failures[reason] += 1
+
+    def record_error(self, item, error):
+        """Record that item (e.g. one input file) failed with exception error."""
+        with self.lock:
+            self.failures[type(error).__name__] += 1
+            self.errors[item] = f"{type(error).__name__}: {error}"
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def note(self, name, value):
+        """Attach a JSON-serializable value (e.g. a list of unresolved names) to the report."""
+        with self.lock:
+            self.notes[name] = value
+
+    def observe(self, name, value):
+        with self.lock:
+            self.observations.setdefault(name, []).append(value)
+
+    def add_stage(self, stage, seconds, rows=0):
+        with self.lock:
+            totals = self.stages.setdefault(stage, {"seconds": 0.0, "rows": 0, "calls": 0})
+            totals["seconds"] += seconds
+            totals["rows"] += rows
+            totals["calls"] += 1
+
+    def timed(self, stage):
+        """
+        Context manager timing one pass of a stage; set .rows on the yielded
+        object to credit rows to it:
+            with metrics.timed("transform") as t:
+                df = ...
+                t.rows = len(df)
+        """
+        return _StageTimer(self, stage)
+
+    def to_dict(self):
+        elapsed = time.perf_counter() - self.start
+        with self.lock:
+            stages = {
+                name: {
+                    "seconds": round(t["seconds"], 4),
+                    "rows": t["rows"],
+                    "calls": t["calls"],
+                    "rows_per_sec": round(t["rows"] / t["seconds"], 1) if t["seconds"] > 0 else None,
+                }
+                for name, t in self.stages.items()
+            }
+            observations = {
+                name: {
+                    "count": len(values),
+                    "mean": round(sum(values) / len(values), 3),
+                    "p50": round(percentile(values, 50), 3),
+                    "p95": round(percentile(values, 95), 3),
+                    "max": round(max(values), 3),
+                }
+                for name, values in self.observations.items() if values
+            }
+            return {
+                "run": self.run_name,
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "elapsed_seconds": round(elapsed, 3),
+                "requests": self.requests,
+                "requests_per_sec": round(self.requests / elapsed, 3) if elapsed > 0 else None,
+                "bytes_downloaded": self.bytes_downloaded,
+                "stages": stages,
+                "observations": observations,
+                "failures": dict(self.failures),
+                "errors": dict(self.errors),
+                "counters": dict(self.counters),
+                "notes": dict(self.notes),
+            }
+
+    def write_report(self, path):
+        """Write the run report as JSON and return its path."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+class _StageTimer:
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+        self.rows = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.add_stage(self.stage, time.perf_counter() - self.start, self.rows)
+        return False
@@ -0,0 +1,321 @@
+import os
+import json
+import zlib
+import base64
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from RunMetrics import setup_logging, add_logging_arguments
+
+logger = logging.getLogger(__name__)
+
+
+STATS_SUFFIX = "_stats.json"
+DEFAULT_STATS_DIR = "PlayerDataProcessed"
+
+# Inputs whose rows are already in a season file: the scraper's first-5-games
+# checkpoint and the all-seasons file. They get no stats, so merging the
+# stored files never counts a row twice.
+REPEATED_INPUT_MARKERS = ("_first5", "playerGameDataAll")
+
+# Distinct counts are estimated with HyperLogLog sketches of 2**SKETCH_BITS
+# one-byte registers: about 3% error on large counts, close to exact below a
+# couple of thousand distinct values (players per season, teams, ...).
+SKETCH_BITS = 10
+SKETCH_COLUMNS = ("PlayerName", "Team", "Opponent")
+
+# Accumulated moments of each numeric column, in this order
+MOMENTS = ("count", "sum", "sumsq", "min", "max")
+
+
+class DistinctSketch:
+    """
+    Mergeable distinct-count sketch (HyperLogLog). Each value is hashed to
+    64 bits: the top SKETCH_BITS pick a register, which keeps the longest run
+    of leading zeros seen in the remaining bits. Merging two sketches is an
+    element-wise max, so per-file sketches combine into per-season or
+    all-season counts without seeing any rows again.
+    """
+
+    def __init__(self, registers=None):
+        self.registers = np.zeros(1 << SKETCH_BITS, dtype=np.uint8) if registers is None else registers
+
+    def add(self, values):
+        index, rank = sketch_positions(pd.Series(values).dropna().unique())
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * np.log(m / zeros)))  # linear counting for small cardinalities
+        return int(round(raw))
+
+    def to_json(self):
+        return base64.b64encode(zlib.compress(self.registers.tobytes())).decode("ascii")
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(np.frombuffer(zlib.decompress(base64.b64decode(data)), dtype=np.uint8).copy())
+
+
+def sketch_positions(values):
+    """Return the (register index, rank) of each value in a DistinctSketch"""
+    hashes = pd.util.hash_array(np.asarray(values, dtype=object))
+    index = (hashes >> np.uint64(64 - SKETCH_BITS)).astype(np.intp)
+    # Top 53 of the remaining bits are exact as float64: rank = leading zeros + 1
+    window = ((hashes << np.uint64(SKETCH_BITS)) >> np.uint64(11)).astype(np.float64)
+    rank = np.full(len(hashes), 54, dtype=np.uint8)
+    nonzero = window > 0
+    rank[nonzero] = 53 - np.floor(np.log2(window[nonzero])).astype(np.uint8)
+    return index, rank
+
+
+class GroupStats:
+    """
+    Summary of one group of player-game rows (a season, or a team in a
+    season): row count, first and last game date, count / sum / sum of
+    squares / min / max of every numeric column, and distinct-count sketches
+    of SKETCH_COLUMNS. Summaries of disjoint row sets merge exactly (up to
+    the sketch error).
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.first_date = None
+        self.last_date = None
+        self.columns = {}   # column → np.array of MOMENTS
+        self.sketches = {}  # column → DistinctSketch
+
+    def merge(self, other):
+        self.rows += other.rows
+        dates = [d for d in (self.first_date, self.last_date, other.first_date, other.last_date) if d is not None]
+        if dates:
+            self.first_date, self.last_date = min(dates), max(dates)
+        for col, moments in other.columns.items():
+            mine = self.columns.get(col)
+            if mine is None:
+                self.columns[col] = moments.copy()
+                continue
+            mine[:3] += moments[:3]
+            mine[3] = np.fmin(mine[3], moments[3])
+            mine[4] = np.fmax(mine[4], moments[4])
+        for col, sketch in other.sketches.items():
+            self.sketches.setdefault(col, DistinctSketch()).merge(sketch)
+        return self
+
+    def distinct(self, column):
+        """Estimated number of distinct values of column (None if not sketched)"""
+        sketch = self.sketches.get(column)
+        return sketch.estimate() if sketch is not None else None
+
+    def summary(self):
+        return {
+            "rows": self.rows,
+            "first_date": self.first_date,
+            "last_date": self.last_date,
+            "players": self.distinct("PlayerName"),
+            "teams": self.distinct("Team"),
+            "opponents": self.distinct("Opponent"),
+        }
+
+    def describe(self):
+        """count / mean / std / min / max of each numeric column, like DataFrame.describe()"""
+        table = pd.DataFrame({col: moments for col, moments in self.columns.items()}, index=list(MOMENTS)).T
+        count = table["count"].replace(0, np.nan)
+        table["mean"] = table["sum"] / count
+        variance = (table["sumsq"] - table["sum"] * table["mean"]) / (count - 1)
+        table["std"] = np.sqrt(variance.clip(lower=0))
+        return table[["count", "mean", "std", "min", "max"]]
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "first_date": self.first_date.isoformat() if self.first_date is not None else None,
+            "last_date": self.last_date.isoformat() if self.last_date is not None else None,
+            "columns": {col: [None if np.isnan(v) else float(v) for v in moments]
+                        for col, moments in self.columns.items()},
+            "sketches": {col: sketch.to_json() for col, sketch in self.sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.rows = data["rows"]
+        stats.first_date = pd.Timestamp(data["first_date"]) if data["first_date"] else None
+        stats.last_date = pd.Timestamp(data["last_date"]) if data["last_date"] else None
+        stats.columns = {col: np.array([np.nan if v is None else v for v in moments], dtype=np.float64)
+                         for col, moments in data["columns"].items()}
+        stats.sketches = {col: DistinctSketch.from_json(s) for col, s in data["sketches"].items()}
+        return stats
+
+
+class StatsStore:
+    """
+    Per-season and per-team (within a season) GroupStats of processed
+    player-game data, built up as frames or chunks pass through update().
+    PlayerDataProcessor keeps one store per season file, saved as
+    PlayerDataProcessed/<file>_stats.json; load_stats() merges them so
+    questions about any season, team or all seasons are answered from the
+    summaries, without reading player rows.
+    """
+
+    def __init__(self):
+        self.seasons = {}   # season → GroupStats
+        self.teams = {}     # (season, team) → GroupStats
+
+    def update(self, df):
+        """Add the rows of a processed frame (whole file, chunk or appended rows)"""
+        if len(df) == 0:
+            return self
+        numeric = df.select_dtypes(include=[np.number, "bool"]).astype(np.float64)
+        positions = {}   # column → (rows with a value, their register index, rank)
+        for col in SKETCH_COLUMNS:
+            if col in df.columns:
+                present = df[col].notna().to_numpy()
+                positions[col] = (present, *sketch_positions(df[col].to_numpy(dtype=object)[present]))
+        dates = pd.to_datetime(df["Date"]) if "Date" in df.columns else None
+
+        for keys, target in ((["Season"], self.seasons), (["Season", "Team"], self.teams)):
+            group = df.groupby(keys, observed=True, dropna=False, sort=False).ngroup().to_numpy()
+            n_groups = group.max() + 1
+            first_rows = np.unique(group, return_index=True)[1]
+            grouped = numeric.groupby(group)
+            counts = np.bincount(group, minlength=n_groups)
+            # (group, column, moment) array, groups in ngroup order
+            moments = np.stack([grouped.count().to_numpy(np.float64), grouped.sum().to_numpy(),
+                                (numeric ** 2).groupby(group).sum().to_numpy(),
+                                grouped.min().to_numpy(), grouped.max().to_numpy()], axis=-1)
+            if dates is not None:
+                date_range = dates.groupby(group).agg(["min", "max"])
+            registers = {}
+            for col, (present, index, rank) in positions.items():
+                registers[col] = np.zeros((n_groups, 1 << SKETCH_BITS), dtype=np.uint8)
+                np.maximum.at(registers[col], (group[present], index), rank)
+
+            for g, row in enumerate(first_rows):
+                stats = GroupStats()
+                stats.rows = int(counts[g])
+                if dates is not None and pd.notna(date_range.at[g, "min"]):
+                    stats.first_date, stats.last_date = date_range.at[g, "min"], date_range.at[g, "max"]
+                stats.columns = {col: moments[g, i].copy() for i, col in enumerate(numeric.columns)}
+                stats.sketches = {col: DistinctSketch(registers[col][g]) for col in registers}
+                key = tuple(str(df[k].iat[row]) for k in keys)
+                key = key[0] if len(key) == 1 else key
+                if key in target:
+                    target[key].merge(stats)
+                else:
+                    target[key] = stats
+        return self
+
+    def merge(self, other):
+        for source, target in ((other.seasons, self.seasons), (other.teams, self.teams)):
+            for key, stats in source.items():
+                target.setdefault(key, GroupStats()).merge(stats)
+        return self
+
+    def season(self, season):
+        return self.seasons.get(season)
+
+    def team(self, team, season=None):
+        """Stats of team in one season, or merged over every season when season is None"""
+        if season is not None:
+            return self.teams.get((season, team))
+        found = [stats for (_, name), stats in self.teams.items() if name == team]
+        return merge_all(found) if found else None
+
+    def overall(self):
+        """Stats over every season in the store"""
+        return merge_all(self.seasons.values())
+
+    def season_table(self):
+        """One row per season: rows, date range and distinct players / teams / opponents"""
+        return pd.DataFrame({season: stats.summary() for season, stats in sorted(self.seasons.items())}).T
+
+    def to_dict(self):
+        teams = {}
+        for (season, team), stats in self.teams.items():
+            teams.setdefault(season, {})[team] = stats.to_dict()
+        return {"seasons": {season: stats.to_dict() for season, stats in self.seasons.items()},
+                "teams": teams}
+
+    @classmethod
+    def from_dict(cls, data):
+        store = cls()
+        store.seasons = {season: GroupStats.from_dict(s) for season, s in data["seasons"].items()}
+        store.teams = {(season, team): GroupStats.from_dict(s)
+                       for season, teams in data["teams"].items() for team, s in teams.items()}
+        return store
+
+    def save(self, path):
+        """Atomically write the store as JSON and return its path"""
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(path + ".tmp", path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def is_season_input(path):
+    """False for a checkpoint or combined input (or its stats file), whose rows a season file already has"""
+    name = os.path.basename(path)
+    return not any(marker in name for marker in REPEATED_INPUT_MARKERS)
+
+
+def merge_all(stats_list):
+    merged = GroupStats()
+    for stats in stats_list:
+        merged.merge(stats)
+    return merged
+
+
+def load_stats(directory=DEFAULT_STATS_DIR):
+    """Merge every season's *_stats.json in directory into one StatsStore"""
+    store = StatsStore()
+    if not os.path.isdir(directory):
+        return store
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(STATS_SUFFIX) and is_season_input(name):
+            store.merge(StatsStore.load(os.path.join(directory, name)))
+    return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the summary statistics saved by PlayerDataProcessor")
+    parser.add_argument("--dir", default=DEFAULT_STATS_DIR, help="directory with the *_stats.json files")
+    parser.add_argument("--season", help="summarize one season (e.g. 2023-24)")
+    parser.add_argument("--team", help="summarize one team (in --season, or over all seasons)")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(quiet=args.quiet, verbose=args.verbose)
+
+    store = load_stats(args.dir)
+    if not store.seasons:
+        logger.error("No summary statistics found in %s (run PlayerDataProcessor.py first)", args.dir)
+        raise SystemExit(1)
+    if args.team:
+        stats = store.team(args.team, args.season)
+    elif args.season:
+        stats = store.season(args.season)
+    else:
+        print(store.season_table().to_string())
+        print()
+        stats = store.overall()
+    if stats is None:
+        logger.error("No data for %s", " / ".join(filter(None, (args.season, args.team))))
+        raise SystemExit(1)
+    for name, value in stats.summary().items():
+        print(f"{name:>10}: {value}")
+    print()
+    print(stats.describe().to_string())
@@ -0,0 +1,242 @@
+import os
+import re
+import logging
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+UNKNOWN_TEAM = -1          # id of a name the registry cannot resolve
+TEAM_ID_DTYPE = np.int16
+
+# Non-Canadian opponents (exhibitions against them are excluded from the cleaned data)
+NON_CANADIAN_TEAMS = [
+    "Air Force Academy Falcons", "Rhode Island Rams", "Black Hills State Yellow Jackets",
+    "Louisville Cardinals", "Saginaw Valley Cardinals", "Albany Great Danes",
+    "Catholic University Cardinals", "Heidelberg Student Princes", "Moravian Greyhounds",
+    "Macalester Scots", "Hope International", "Benedictine Mesa Redhawks",
+    "Western Washington", "Westcliff", "Universidad Panamericana Guada"
+]
+
+# Schedule team name -> full team name used in the player data
+SCHEDULE_ALIASES = {
+    "Acadia": "Acadia Axemen",
+    "Alberta": "Alberta Golden Bears",
+    "Algoma": "Algoma Thunderbirds",
+    "Algonquin": "Algonquin Thunder",
+    "Bishop's": "Bishop's Gaiters",
+    "Brandon": "Brandon Bobcats",
+    "Brock": "Brock Badgers",
+    "Calgary": "Calgary Dinos",
+    "Cape Breton": "Cape Breton Capers",
+    "Carleton": "Carleton Ravens",
+    "Concordia": "Concordia Stingers",
+    "Dalhousie": "Dalhousie Tigers",
+    "Guelph": "Guelph Gryphons",
+    "Humber College": "Humber Hawks",
+    "Lakehead": "Lakehead Thunderwolves",
+    "Laurentian": "Laurentian Voyageurs",
+    "Laurier": "Wilfrid Laurier Golden Hawks",
+    "Laval": "Laval Rouge et Or",
+    "Lethbridge": "Lethbridge Pronghorns",
+    "MacEwan": "MacEwan Griffins",
+    "Manitoba": "Manitoba Bisons",
+    "McGill": "McGill Redbirds",
+    "McMaster": "McMaster Marauders",
+    "Memorial": "Memorial Sea-Hawks",
+    "Mohawk College": "Mohawk Mountaineers",
+    "Mount Royal": "Mount Royal University Cougars",
+    "Nipissing": "Nipissing Lakers",
+    "Ontario Tech": "Ontario Tech Ridgebacks",
+    "Ottawa": "Ottawa Gee Gees",
+    "Queen's": "Queen's Gaels",
+    "Regina": "Regina Cougars",
+    "Saint Mary's": "Saint Mary's Huskies",
+    "Saskatchewan": "Saskatchewan Huskies",
+    "Sheridan College": "Sheridan Bruins",
+    "St. Thomas": "St. Thomas Tommies",
+    "StFX": "St. Francis Xavier X-Men",
+    "Thompson Rivers": "Thompson Rivers Wolfpack",
+    "TMU": "TMU Bold",
+    "Toronto Metropolitan": "TMU Bold",
+    "Toronto": "Toronto Varsity Blues",
+    "Trinity Western": "Trinity Western Spartans",
+    "UBC": "UBC Thunderbirds",
+    "UBC Okanagan": "UBC Okanagan Heat",
+    "UFV": "UFV Cascades",
+    "UNB": "UNB Reds",
+    "UNBC": "UNBC Timberwolves",
+    "UPEI": "UPEI Panthers",
+    "UQAM": "UQAM Citadins",
+    "Victoria": "Victoria Vikes",
+    "Vancouver Island University": "VIU Mariners",
+    "Waterloo": "Waterloo Warriors",
+    "Western": "Western Mustangs",
+    "Wilfrid Laurier": "Wilfrid Laurier Golden Hawks",
+    "Windsor": "Windsor Lancers",
+    "Winnipeg": "Winnipeg Wesmen",
+    "York": "York Lions",
+}
+
+
+def name_key(name):
+    """Spelling-insensitive lookup key: "Ottawa Gee-Gees" and "ottawa gee gees" share one"""
+    return re.sub(r"[\s\-]+", " ", str(name).replace(".", "").replace("\u2019", "'")).strip().lower()
+
+
+class TeamRegistry:
+    """
+    One table of every team the pipeline knows, each with a compact integer
+    id (0, 1, ... as int16), built from:
+      TeamData.csv            → the listed teams (name, abbr, city, province);
+                                the processor only keeps games between two of
+                                them, spelled exactly as in the file
+      TeamDataWithColors.csv  → colors, and its spellings of the same teams
+                                (matched by abbreviation) as aliases
+      SCHEDULE_ALIASES        → schedule names, and teams the schedule
+                                knows that TeamData.csv does not
+      NON_CANADIAN_TEAMS      → opponents flagged non-Canadian
+    Names, aliases and abbreviations all resolve to the same id (exactly, or
+    ignoring case, dots and dashes). Resolution of each distinct raw name is
+    memoized, and names that resolve to nothing are counted in .unresolved
+    so a run can report them in one place.
+    """
+
+    def __init__(self):
+        self.names = []        # id → name
+        self.abbrs = []        # id → abbreviation (None if unknown)
+        self.listed = []       # id → in TeamData.csv
+        self.canadian = []     # id → not in NON_CANADIAN_TEAMS
+        self.details = []      # id → {city, province, primary_color, secondary_color}
+        self.keys = {}         # name / alias / abbreviation key → id
+        self.resolved = {}     # raw name → id (memo, including misses)
+        self.unresolved = Counter()   # raw name → rows seen that did not resolve
+
+    def add_team(self, name, abbr=None, listed=False, canadian=True, **details):
+        team_id = len(self.names)
+        self.names.append(name)
+        self.abbrs.append(abbr)
+        self.listed.append(listed)
+        self.canadian.append(canadian)
+        self.details.append(details)
+        self.add_alias(name, team_id)
+        if abbr:
+            self.add_alias(abbr, team_id)
+        return team_id
+
+    def add_alias(self, alias, team_id):
+        self.keys.setdefault(alias, team_id)
+        self.keys.setdefault(name_key(alias), team_id)
+        self.resolved.clear()
+
+    def lookup(self, name):
+        """Id of a name, alias or abbreviation, or UNKNOWN_TEAM (not counted as unresolved)"""
+        team_id = self.keys.get(name)
+        return team_id if team_id is not None else self.keys.get(name_key(name), UNKNOWN_TEAM)
+
+    def resolve(self, name, rows=1):
+        """Memoized lookup of a raw name; misses are counted in .unresolved"""
+        team_id = self.resolved.get(name)
+        if team_id is None:
+            team_id = self.resolved[name] = UNKNOWN_TEAM if pd.isna(name) else self.lookup(name)
+        if team_id == UNKNOWN_TEAM and not pd.isna(name):
+            self.unresolved[name] += rows
+        return team_id
+
+    def resolve_exact(self, name, rows=1):
+        """resolve, but only a team's own name spelled exactly matches (aliases and other spellings do not)"""
+        team_id = self.resolve(name, rows)
+        return team_id if team_id != UNKNOWN_TEAM and self.names[team_id] == name else UNKNOWN_TEAM
+
+    def ids(self, values, exact=False):
+        """
+        Team id of every value (UNKNOWN_TEAM where it does not resolve), as an
+        int16 array. With exact=True only names spelled exactly as the
+        registry's own (TeamData.csv's for listed teams) get an id.
+        """
+        codes, uniques = pd.factorize(pd.Series(values, copy=False), use_na_sentinel=True)
+        rows = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        resolve = self.resolve_exact if exact else self.resolve
+        unique_ids = np.array([resolve(name, int(n)) for name, n in zip(uniques, rows)] + [UNKNOWN_TEAM],
+                              dtype=TEAM_ID_DTYPE)
+        return unique_ids[codes]   # code -1 (missing value) picks the UNKNOWN_TEAM at the end
+
+    # Per-id lookups index arrays with one extra slot at the end, which id -1 (UNKNOWN_TEAM) picks
+
+    def names_of(self, ids):
+        """Registry name of every id (NaN for UNKNOWN_TEAM)"""
+        return np.array(self.names + [np.nan], dtype=object)[ids]
+
+    def abbrs_of(self, ids):
+        """Abbreviation of every id (NaN when unknown)"""
+        return np.array([np.nan if abbr is None else abbr for abbr in self.abbrs] + [np.nan], dtype=object)[ids]
+
+    def is_listed(self, ids):
+        return np.asarray(self.listed + [False], dtype=bool)[ids]
+
+    def is_canadian(self, ids):
+        """Unknown teams count as Canadian: only NON_CANADIAN_TEAMS are flagged"""
+        return np.asarray(self.canadian + [True], dtype=bool)[ids]
+
+    def take_unresolved(self):
+        """Return and reset the unresolved-name counts (e.g. to send them back from a pool worker)"""
+        unresolved, self.unresolved = self.unresolved, Counter()
+        return unresolved
+
+    def report_unresolved(self, unresolved=None, what="team names"):
+        """Log the names that did not resolve, most frequent first, and return them as {name: rows}"""
+        unresolved = self.unresolved if unresolved is None else unresolved
+        if unresolved:
+            logger.info("%d %s not in the team registry: %s", len(unresolved), what,
+                        ", ".join(f"{name} ({rows})" for name, rows in unresolved.most_common()))
+        return dict(unresolved.most_common())
+
+    def table(self):
+        """Every team as a DataFrame indexed by team id"""
+        return pd.DataFrame([{'team': name, 'abbr': abbr, 'listed': listed, 'canadian': canadian, **details}
+                             for name, abbr, listed, canadian, details
+                             in zip(self.names, self.abbrs, self.listed, self.canadian, self.details)],
+                            index=pd.RangeIndex(len(self.names), name='team_id'))
+
+    @classmethod
+    def load(cls, team_data_path="TeamData.csv", colors_path="TeamDataWithColors.csv"):
+        """Build the registry from the team files (colors are optional) and the alias tables above"""
+        registry = cls()
+        team_data = pd.read_csv(team_data_path)
+        for row in team_data.itertuples(index=False):
+            registry.add_team(row.team, row.abbr, listed=True, city=row.city, province=row.province)
+
+        if colors_path and os.path.exists(colors_path):
+            for row in pd.read_csv(colors_path).itertuples(index=False):
+                team_id = registry.lookup(row.abbr)
+                if team_id == UNKNOWN_TEAM:
+                    team_id = registry.add_team(row.team, row.abbr, city=row.city, province=row.province)
+                registry.add_alias(row.team, team_id)
+                registry.details[team_id].update(primary_color=row.primary_color,
+                                                 secondary_color=row.secondary_color)
+
+        for alias, name in SCHEDULE_ALIASES.items():
+            team_id = registry.lookup(name)
+            if team_id == UNKNOWN_TEAM:
+                team_id = registry.add_team(name)
+            registry.add_alias(alias, team_id)
+
+        for name in NON_CANADIAN_TEAMS:
+            team_id = registry.lookup(name)
+            if team_id == UNKNOWN_TEAM:
+                team_id = registry.add_team(name, canadian=False)
+            registry.canadian[team_id] = False
+        return registry
+
+
+_registries = {}
+
+def load_team_registry(team_data_path="TeamData.csv", colors_path="TeamDataWithColors.csv"):
+    """TeamRegistry.load, once per process and set of files"""
+    key = (os.path.abspath(team_data_path), colors_path and os.path.abspath(colors_path))
+    if key not in _registries:
+        _registries[key] = TeamRegistry.load(team_data_path, colors_path)
+    return _registries[key]
@@ -1,26 +1,277 @@
 import os
+import re
+import glob
+import shutil
+import argparse
+import logging
+
+import numpy as np
 import pandas as pd
 
-print("Current working directory:", os.getcwd())
+from PlayerDataProcessor import (iter_processed_data, parse_processed_csv,
+                                 to_processed_dtypes, DEFAULT_CHUNK_ROWS, HAVE_PYARROW)
+from RunMetrics import RunMetrics, setup_logging, add_logging_arguments
+from TeamRegistry import load_team_registry, name_key, UNKNOWN_TEAM
+
+logger = logging.getLogger(__name__)
+
+# A player appears at most once per game: rows repeating these columns are
+# duplicates (the first one read is kept)
+DEDUPE_KEYS = ["PlayerName", "Date", "Team"]
+
+COMBINED_FILENAME = "playerGameDataAll.csv"
+DATASET_DIRNAME = "playerGameData"
+
+# Dataset layout: <dataset>/season=<season>/team=<abbr>/part-<n>.<ext>
+SEASON_PARTITION = "season="
+TEAM_PARTITION = "team="
+PARTITION_FORMATS = ('csv', 'parquet')
+DEFAULT_PARTITION_FORMAT = 'parquet' if HAVE_PYARROW else 'csv'
+UNSAFE_PATH_CHARS = re.compile(r'[^\w.-]+')
+
+
+class SeenKeys:
+    """
+    Set of the DEDUPE_KEYS rows seen so far, kept as a sorted array of 64-bit
+    row hashes: 8 bytes per row however long the names are. Two different
+    keys sharing a hash would drop a row, which at this data size (about
+    1e-10 odds for a million rows) is not worth storing the keys for.
+    """
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def add_new(self, df):
+        """Add the keys of df's rows and return a mask of the rows not seen before (in df or earlier)"""
+        hashes = key_hashes(df)
+        new = ~pd.Series(hashes).duplicated().to_numpy()
+        if len(self.hashes):
+            pos = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+            new &= self.hashes[pos] != hashes
+        self.hashes = np.union1d(self.hashes, hashes[new])
+        return new
+
+
+def key_hashes(df):
+    """64-bit hash of each row's DEDUPE_KEYS (the same for CSV- and Parquet-read rows)"""
+    keys = pd.DataFrame({
+        "PlayerName": df["PlayerName"].astype(object),
+        "Date": pd.to_datetime(df["Date"]),
+        "Team": df["Team"].astype(object),
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def partition_value(value):
+    """Directory-safe form of a partition value ("2024-25", "ALG", ...)"""
+    return UNSAFE_PATH_CHARS.sub("_", str(value)).strip("_") or "unknown"
+
+
+def team_partition(team, registry=None):
+    """Partition value of a team name, alias or abbreviation: its registry abbreviation"""
+    registry = registry or load_team_registry()
+    team_id = registry.lookup(team)
+    abbr = registry.abbrs[team_id] if team_id != UNKNOWN_TEAM else None
+    return partition_value(abbr or name_key(team))
+
+
+def partition_dir(dataset_dir, season, team_value):
+    return os.path.join(dataset_dir, SEASON_PARTITION + partition_value(season), TEAM_PARTITION + team_value)
+
+
+def find_inputs(input_dir):
+    """Season files in input_dir, each listed once even when saved as both CSV and Parquet"""
+    return sorted({
+        os.path.join(input_dir, os.path.splitext(f)[0] + ".csv")
+        for f in os.listdir(input_dir)
+        if f.endswith((".csv", ".parquet")) and "playerGameDataAll" not in f
+    })
+
+
+def write_partitions(df, dataset_dir, part, partition_format):
+    """Write df's rows of each (season, team) as one part file; returns the partition directories"""
+    teams = df["Abbr"].astype(object)
+    teams = teams.where(teams.notna(), df["Team"].astype(object).map(name_key))
+    written = []
+    for (season, team), rows in df.groupby([df["Season"].astype(object), teams.map(partition_value)], sort=False):
+        directory = partition_dir(dataset_dir, season, team)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{part:05d}.{partition_format}")
+        if partition_format == 'parquet':
+            to_processed_dtypes(rows).to_parquet(path, index=False, engine="pyarrow")
+        else:
+            rows.to_csv(path, index=False)
+        written.append(directory)
+    return written
+
+
+def replace_dir(staging_dir, target_dir):
+    """Swap a fully written staging directory in place of target_dir"""
+    old_dir = target_dir + ".old"
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+    if os.path.exists(target_dir):
+        os.rename(target_dir, old_dir)
+    os.rename(staging_dir, target_dir)
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+
+
+def combine_seasons(input_dir="PlayerDataHomeAway", output_dir="BaseData", partition_format=DEFAULT_PARTITION_FORMAT,
+                    chunk_rows=DEFAULT_CHUNK_ROWS, write_combined=True):
+    """
+    Combine every cleaned season into one deduplicated dataset:
+      1. Stream each season file (Parquet copy preferred, see load_processed_data)
+         chunk_rows rows at a time
+      2. Drop rows whose (PlayerName, Date, Team) was already seen (SeenKeys)
+      3. Write each chunk's rows under <output_dir>/playerGameData/season=<season>/team=<abbr>/
+         so one team-season can be read alone (read_partition)
+      4. Optionally append them to <output_dir>/playerGameDataAll.csv for
+         consumers of the single combined file
+    Outputs are written to .part files / directories and swapped in at the
+    end, so a failed run leaves the previous outputs as they were. Rows read,
+    duplicates dropped and stage times go to <output_dir>/combine_run_report.json.
+    Returns the dataset directory.
+    """
+    if partition_format not in PARTITION_FORMATS:
+        raise ValueError(f"partition_format must be one of {PARTITION_FORMATS}, got {partition_format!r}")
+    if partition_format == 'parquet' and not HAVE_PYARROW:
+        raise ImportError("Parquet partitions need pyarrow (pip install pyarrow), or use partition_format='csv'")
+
+    inputs = find_inputs(input_dir)
+    if not inputs:
+        logger.warning("No season files found in %s", input_dir)
+        return None
+
+    os.makedirs(output_dir, exist_ok=True)
+    dataset_dir = os.path.join(output_dir, DATASET_DIRNAME)
+    staging_dir = dataset_dir + ".part"
+    combined_path = os.path.join(output_dir, COMBINED_FILENAME)
+    if os.path.exists(staging_dir):
+        shutil.rmtree(staging_dir)
+
+    metrics = RunMetrics("combine")
+    seen = SeenKeys()
+    partitions = set()
+    columns = None
+    part = 0
+    try:
+        for path in inputs:
+            read_rows = kept_rows = 0
+            chunks = iter_processed_data(path, chunk_rows)
+            while True:
+                with metrics.timed("read") as t:
+                    chunk = next(chunks, None)
+                    t.rows = 0 if chunk is None else len(chunk)
+                if chunk is None:
+                    break
+                if columns is None:
+                    columns = list(chunk.columns)
+                elif list(chunk.columns) != columns:
+                    extra = [col for col in chunk.columns if col not in columns]
+                    if extra:
+                        logger.warning("%s: dropping columns not in the first file: %s", path, ", ".join(extra))
+                    chunk = chunk.reindex(columns=columns)
+
+                with metrics.timed("dedupe") as t:
+                    new = seen.add_new(chunk)
+                    if not new.all():
+                        for row in chunk.loc[~new, DEDUPE_KEYS].itertuples(index=False):
+                            logger.debug("Duplicate row dropped: %s", ", ".join(map(str, row)))
+                        chunk = chunk[new]
+                    t.rows = len(new)
+
+                with metrics.timed("write") as t:
+                    partitions.update(write_partitions(chunk, staging_dir, part, partition_format))
+                    if write_combined:
+                        chunk.to_csv(combined_path + ".part", mode='a' if part else 'w', header=not part, index=False)
+                    t.rows = len(chunk)
+                part += 1
+                read_rows += len(new)
+                kept_rows += len(chunk)
+            metrics.count("rows_read", read_rows)
+            metrics.count("rows_written", kept_rows)
+            metrics.count("duplicates_dropped", read_rows - kept_rows)
+            logger.info("%s: %d rows, %d duplicate(s) dropped", path, read_rows, read_rows - kept_rows)
+    except BaseException:
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir)
+        if os.path.exists(combined_path + ".part"):
+            os.remove(combined_path + ".part")
+        raise
+
+    if not part:
+        logger.warning("Season files in %s have no rows", input_dir)
+        return None
+    replace_dir(staging_dir, dataset_dir)
+    if write_combined:
+        os.replace(combined_path + ".part", combined_path)
+        logger.info("Saved combined data to %s", combined_path)
+    metrics.count("partitions", len(partitions))
+    report_path = metrics.write_report(os.path.join(output_dir, "combine_run_report.json"))
+    logger.info("Saved %d rows in %d season/team partitions to %s (%d duplicate(s) dropped)",
+                metrics.counters["rows_written"], len(partitions), dataset_dir, metrics.counters["duplicates_dropped"])
+    logger.info("Run report saved to: %s", report_path)
+    return dataset_dir
+
+
+def partition_files(dataset_dir, season="*", team="*"):
+    """Part files of the matching partitions (season / team values may be glob patterns)"""
+    pattern = os.path.join(dataset_dir, SEASON_PARTITION + season, TEAM_PARTITION + team, "part-*")
+    return sorted(path for path in glob.glob(pattern) if path.endswith((".csv", ".parquet")))
+
+
+def read_part(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, engine="pyarrow")
+    return parse_processed_csv(pd.read_csv(path))
+
+
+def read_parts(files):
+    """Concatenate part files; columns that are empty in a part (e.g. HomeAway) take their type from the others"""
+    frames = [read_part(path) for path in files]
+    columns = frames[0].columns
+    combined = pd.concat([frame.dropna(axis=1, how="all") for frame in frames], ignore_index=True)
+    return to_processed_dtypes(combined.reindex(columns=columns))
+
 
-input_dir = "PlayerDataHomeAway"
-output_dir = "BaseData"
-output_file = os.path.join(output_dir, "playerGameDataAll.csv")
+def read_partition(season, team, dataset_dir=os.path.join("BaseData", DATASET_DIRNAME)):
+    """
+    Rows of one team in one season, reading only that partition's files.
+    team may be a team name, alias or abbreviation.
+    """
+    files = partition_files(dataset_dir, partition_value(season), team_partition(team))
+    if not files:
+        raise FileNotFoundError(f"No partition for {team} in {season} under {dataset_dir}")
+    return read_parts(files)
 
-# Create output dir if it doesn't exist
-os.makedirs(output_dir, exist_ok=True)
 
-# List all CSVs in input_dir (excluding the output file if it's in the same folder)
-csv_files = [
-    os.path.join(input_dir, f)
-    for f in os.listdir(input_dir)
-    if f.endswith(".csv") and "playerGameDataAll.csv" not in f
-]
+def read_dataset(dataset_dir=os.path.join("BaseData", DATASET_DIRNAME), seasons=None, teams=None):
+    """Rows of the given seasons and teams (all of them when None), read partition by partition"""
+    season_values = [partition_value(s) for s in seasons] if seasons is not None else ["*"]
+    team_values = [team_partition(t) for t in teams] if teams is not None else ["*"]
+    files = [path for season in season_values for team in team_values
+             for path in partition_files(dataset_dir, season, team)]
+    if not files:
+        raise FileNotFoundError(f"No matching partitions under {dataset_dir}")
+    return read_parts(files)
 
-# Combine all CSVs
-df_list = [pd.read_csv(file) for file in csv_files]
-combined_df = pd.concat(df_list, ignore_index=True)
 
-# Write to output
-combined_df.to_csv(output_file, index=False)
-print(f"Saved combined data to {output_file}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Combine the cleaned seasons into one deduplicated, "
+                                                 "season/team-partitioned dataset")
+    parser.add_argument("--input-dir", default="PlayerDataHomeAway", help="directory with the cleaned seasons")
+    parser.add_argument("--output-dir", default="BaseData", help="directory for the combined outputs")
+    parser.add_argument("--format", choices=PARTITION_FORMATS, default=DEFAULT_PARTITION_FORMAT,
+                        help="file format of the partitions")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                        help="rows read, deduplicated and written at a time")
+    parser.add_argument("--no-combined-csv", action="store_true",
+                        help=f"only write the partitioned dataset, not {COMBINED_FILENAME}")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(quiet=args.quiet, verbose=args.verbose)
+    combine_seasons(args.input_dir, args.output_dir, args.format, args.chunk_rows, not args.no_combined_csv)
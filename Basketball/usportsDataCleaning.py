@@ -1,177 +1,427 @@
+import os
+import re
+import csv
+import glob
+import time
+import argparse
+import logging
+from collections import Counter
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from datetime import datetime
 
-# Load player game data
-jerrysFile = pd.read_csv("playerGameData2024-25_processed.csv") # INSERT PLAYER GAME LOG FILE HERE!!
-
-# List of non-Canadian teams to exclude
-non_canadian_teams = [
-    "Air Force Academy Falcons", "Rhode Island Rams", "Black Hills State Yellow Jackets",
-    "Louisville Cardinals", "Saginaw Valley Cardinals", "Albany Great Danes",
-    "Catholic University Cardinals", "Heidelberg Student Princes", "Moravian Greyhounds",
-    "Macalester Scots", "Hope International", "Benedictine Mesa Redhawks",
-    "Western Washington", "Westcliff", "Universidad Panamericana Guada"
-]
-
-# Filter out non-Canadian teams
-jerrysFile = jerrysFile[~jerrysFile['Opponent'].isin(non_canadian_teams)].copy()
-
-# Load schedule data (bizarre font from excel)
-usports_sched = pd.read_csv("Usports Data - Sheet1.csv", header=None) # INCLUDE SEASON SCHEDULE FILE HERE!!
-
-# Rename columns
-usports_sched.columns = [f'V{i+1}' for i in range(usports_sched.shape[1])]
-
-# Identify Month rows (V1 contains a month name and V2–V5 are all NA)
-usports_sched['Month'] = np.where(
-    usports_sched['V1'].str.strip().str.match(
-        r"^(January|February|March|April|May|June|July|August|September|October|November|December)$",
-        case=False
-    ) &
-    usports_sched[['V2', 'V3', 'V4', 'V5']].isna().all(axis=1),
-    usports_sched['V1'].str.strip(),
-    np.nan
-)
-
-# Identify Day rows (V1 contains a day, V2-V5 are all NA)
-usports_sched['DayText'] = np.where(
-    usports_sched['V1'].str.match(r'^\w+\.\s*\d+$'),  
-    usports_sched['V1'],
-    np.nan
-)
-
-
-pd.set_option('future.no_silent_downcasting', True)
-
-# Fill down Month and DayText
-usports_sched['Month'] = usports_sched['Month'].ffill()
-usports_sched['DayText'] = usports_sched['DayText'].ffill()
-
-# Filter to only valid game rows
-usports_clean = usports_sched[
-     ~usports_sched['V1'].isin(['Away', 'Home']) &
-     ~usports_sched['V1'].str.match("^[A-Za-z]+$") &
-     ~usports_sched['V1'].str.match(r'^\w+\.\s*\d+$') &
-     ~((usports_sched['V2'] == '') &
-       (usports_sched['V3'] == '') &
-       (usports_sched['V4'] == '') &
-       (usports_sched['V5'] == '')) ].copy()
-
-# Extract day safely from DayText
-usports_clean['Day'] = usports_clean['DayText'].str.extract(r'\D*(\d+)$').astype(float)
-
-# Infer year based on month
-usports_clean['Year'] = np.where(
-     usports_clean['Month'].isin(['November', 'December']),
-     2024,
-     2025) # INSERT PROPER YEAR INFO HERE!!!
-
-# Convert full month name to number (strip leading/trailing whitespace just in case)
-usports_clean['Month_Num'] = usports_clean['Month'].map(
-    lambda m: datetime.strptime(m.strip(), "%B").month if pd.notnull(m) else np.nan)
-
-# Construct ISO date string: YYYY-MM-DD
-usports_clean['Date_Str'] = (
-     usports_clean['Year'].astype(int).astype(str) + "-" +
-     usports_clean['Month_Num'].astype('Int64').astype(str).str.zfill(2) + "-" +
-     usports_clean['Day'].astype('Int64').astype(str).str.zfill(2))
-
-
-# Convert final date string to datetime object
-usports_clean['Date'] = pd.to_datetime(
-   usports_clean['Date_Str'], format="%Y-%m-%d", errors="coerce")
-
-# Rename and subset
-usports_clean = usports_clean.rename(columns={'V1': 'Away', 'V2': 'Home'})
-usports_clean = usports_clean[['Date', 'Away', 'Home']].copy()
-
-# Split out team names and scores
-usports_clean['Away_Team'] = usports_clean['Away'].str.replace(r'\d+$', '', regex=True).str.strip()
-usports_clean['Away_Score'] = usports_clean['Away'].str.extract(r'(\d+)$').astype(int)
-
-usports_clean['Home_Team'] = usports_clean['Home'].str.replace(r'\d+$', '', regex=True).str.strip()
-usports_clean['Home_Score'] = usports_clean['Home'].str.extract(r'(\d+)$').astype(int)
-
-usports_clean = usports_clean[['Date', 'Away_Team', 'Away_Score', 'Home_Team', 'Home_Score']]
-
-# Lookup table
-team_lookup = {
-     "Acadia": "Acadia Axemen",
-     "Alberta": "Alberta Golden Bears",
-     "Algoma": "Algoma Thunderbirds",
-     "Algonquin": "Algonquin Thunder",
-     "Bishop's": "Bishop's Gaiters",
-     "Brandon": "Brandon Bobcats",
-     "Brock": "Brock Badgers",
-     "Calgary": "Calgary Dinos",
-     "Cape Breton": "Cape Breton Capers",
-     "Carleton": "Carleton Ravens",
-     "Concordia": "Concordia Stingers",
-     "Dalhousie": "Dalhousie Tigers",
-     "Guelph": "Guelph Gryphons",
-     "Humber College": "Humber Hawks",
-     "Lakehead": "Lakehead Thunderwolves",
-     "Laurentian": "Laurentian Voyageurs",
-     "Laurier": "Wilfrid Laurier Golden Hawks",
-     "Laval": "Laval Rouge et Or",
-     "Lethbridge": "Lethbridge Pronghorns",
-     "MacEwan": "MacEwan Griffins",
-     "Manitoba": "Manitoba Bisons",
-     "McGill": "McGill Redbirds",
-     "McMaster": "McMaster Marauders",
-     "Memorial": "Memorial Sea-Hawks",
-     "Mohawk College": "Mohawk Mountaineers",
-     "Mount Royal": "Mount Royal University Cougars",
-     "Nipissing": "Nipissing Lakers",
-     "Ontario Tech": "Ontario Tech Ridgebacks",
-     "Ottawa": "Ottawa Gee Gees",
-     "Queen's": "Queen's Gaels",
-     "Regina": "Regina Cougars",
-     "Saint Mary's": "Saint Mary's Huskies",
-     "Saskatchewan": "Saskatchewan Huskies",
-     "Sheridan College": "Sheridan Bruins",
-     "St. Thomas": "St. Thomas Tommies",
-     "StFX": "St. Francis Xavier X-Men",
-     "Thompson Rivers": "Thompson Rivers Wolfpack",
-     "TMU": "TMU Bold",
-     "Toronto Metropolitan": "TMU Bold",
-     "Toronto": "Toronto Varsity Blues",
-     "Trinity Western": "Trinity Western Spartans",
-     "UBC": "UBC Thunderbirds",
-     "UBC Okanagan": "UBC Okanagan Heat",
-     "UFV": "UFV Cascades",
-     "UNB": "UNB Reds",
-     "UNBC": "UNBC Timberwolves",
-     "UPEI": "UPEI Panthers",
-     "UQAM": "UQAM Citadins",
-     "Victoria": "Victoria Vikes",
-     "Vancouver Island University": "VIU Mariners",
-     "Waterloo": "Waterloo Warriors",
-     "Western": "Western Mustangs",
-     "Wilfrid Laurier": "Wilfrid Laurier Golden Hawks",
-     "Windsor": "Windsor Lancers",
-     "Winnipeg": "Winnipeg Wesmen",
-     "York": "York Lions"}
-
-usports_clean['Away_Team'] = usports_clean['Away_Team'].map(team_lookup)
-usports_clean['Home_Team'] = usports_clean['Home_Team'].map(team_lookup)
-
-# Standardize dates
-jerrysFile['Date'] = pd.to_datetime(jerrysFile['Date'])
-usports_clean['Date'] = pd.to_datetime(usports_clean['Date'])
+from PlayerDataProcessor import load_processed_data, save_typed_parquet, HAVE_PYARROW
+from RunMetrics import RunMetrics, setup_logging, add_logging_arguments, init_worker, collect_results
+from TeamRegistry import load_team_registry, UNKNOWN_TEAM
+
+logger = logging.getLogger(__name__)
+
+# Exported season schedules: USportsSched_<season>.csv, e.g. USportsSched_2024-25.csv
+SCHEDULE_GLOB = "USportsSched_*.csv"
+SCHEDULE_SEASON_PATTERN = re.compile(r"USportsSched_(\d{4}-\d{2})\.csv$")
+
+# Seasons cleaned in parallel by clean_all_seasons
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Schedule months that fall in the first calendar year of a season (the
+# rest, January to June, are in the second)
+FIRST_YEAR_MONTHS = {'July', 'August', 'September', 'October', 'November', 'December'}
+
+# Row shapes of the exported schedule format
+MONTH_NUMBERS = {name.lower(): number for number, name in enumerate(
+    ["January", "February", "March", "April", "May", "June", "July", "August",
+     "September", "October", "November", "December"], start=1)}
+DAY_ROW = re.compile(r'^\w+\.\s*\d+$')      # "Sun. 30"
+DAY_NUMBER = re.compile(r'\D*(\d+)$')
+WORD_ROW = re.compile(r'^[A-Za-z]+$')          # month names, "Away"/"Home" headers
+TRAILING_SCORE = re.compile(r'(\d+)$')         # "Carleton86" -> 86
+
+def season_years(season):
+    """Calendar years of a season string: "2024-25" -> (2024, 2025)"""
+    first_year = int(season[:4])
+    return first_year, first_year + 1
+
+def schedule_season(schedule_path):
+    """The season of a USportsSched_<season>.csv file, or None if the name does not match"""
+    m = SCHEDULE_SEASON_PATTERN.search(os.path.basename(schedule_path))
+    return m.group(1) if m else None
+
+def split_team_score(text):
+    """"Carleton86" -> ("Carleton", 86); the score is None when there is none"""
+    m = TRAILING_SCORE.search(text)
+    if not m:
+        return text.strip(), None
+    return text[:m.start()].strip(), int(m.group(1))
+
+def iter_schedule_games(lines, season):
+    """
+    One-pass reader of an exported USports schedule. The rows are walked
+    once as a small state machine:
+      month row ("November", nothing else)  → current month
+      day row ("Sun. 30")                   → current day
+      other one-word rows ("Away" headers)  → skipped
+      game row ("Carleton86,Waterloo77,...") → record
+    and a (Date, Away_Team, Away_Score, Home_Team, Home_Score) record is
+    yielded for every played game, with the schedule's team names. The
+    year comes from the season (July-December in its first year); a date
+    that cannot be built is NaT. Games without a final score (postponed,
+    cancelled) are skipped. `lines` is any iterable of CSV lines.
+    """
+    first_year, second_year = season_years(season)
+    month = day = None
+    for row in csv.reader(lines):
+        if not row or not row[0]:
+            continue
+        first = row[0]
+        rest_empty = not any(row[1:5])
+        if WORD_ROW.match(first):
+            if rest_empty and first.lower() in MONTH_NUMBERS:
+                month = first
+            continue
+        stripped = first.strip()
+        if rest_empty and stripped.lower() in MONTH_NUMBERS:
+            month = stripped
+            continue
+        if DAY_ROW.match(first):
+            day = int(DAY_NUMBER.match(first).group(1))
+            continue
+
+        away_team, away_score = split_team_score(first)
+        home_team, home_score = split_team_score(row[1] if len(row) > 1 else "")
+        if away_score is None or home_score is None:
+            continue
+        date = pd.NaT
+        if month is not None and day is not None:
+            year = first_year if month in FIRST_YEAR_MONTHS else second_year
+            try:
+                date = pd.Timestamp(year, MONTH_NUMBERS[month.lower()], day)
+            except ValueError:
+                pass
+        yield date, away_team, away_score, home_team, home_score
+
+def parse_schedule_stream(schedule_path, season):
+    """
+    Read an exported USports schedule into one row per played game:
+    Date, Away_Team, Away_Score, Home_Team, Home_Score, with the schedule's
+    team names (see iter_schedule_games).
+    """
+    with open(schedule_path, "r", encoding="utf-8", newline="") as f:
+        games = pd.DataFrame(list(iter_schedule_games(f, season)),
+                             columns=['Date', 'Away_Team', 'Away_Score', 'Home_Team', 'Home_Score'])
+    return games.astype({'Date': 'datetime64[ns]', 'Away_Score': int, 'Home_Score': int})
+
+def parse_schedule_columns(schedule_path, season):
+    """
+    Reference parser: same result as parse_schedule_stream, built from
+    whole-column pandas passes (month / day regex matches, forward fills, a
+    row filter, then extract/replace per team column). Kept to check and
+    benchmark the streaming parser against.
+    """
+    # Load schedule data (bizarre font from excel)
+    usports_sched = pd.read_csv(schedule_path, header=None)
+
+    # Rename columns
+    usports_sched.columns = [f'V{i+1}' for i in range(usports_sched.shape[1])]
+
+    # Identify Month rows (V1 contains a month name and V2–V5 are all NA)
+    usports_sched['Month'] = np.where(
+        usports_sched['V1'].str.strip().str.match(
+            r"^(January|February|March|April|May|June|July|August|September|October|November|December)$",
+            case=False
+        ) &
+        usports_sched[['V2', 'V3', 'V4', 'V5']].isna().all(axis=1),
+        usports_sched['V1'].str.strip(),
+        np.nan
+    )
+
+    # Identify Day rows (V1 contains a day, V2-V5 are all NA)
+    usports_sched['DayText'] = np.where(
+        usports_sched['V1'].str.match(r'^\w+\.\s*\d+$'),
+        usports_sched['V1'],
+        np.nan
+    )
+
+    # Fill down Month and DayText
+    with pd.option_context('future.no_silent_downcasting', True):
+        usports_sched['Month'] = usports_sched['Month'].ffill()
+        usports_sched['DayText'] = usports_sched['DayText'].ffill()
+
+    # Filter to only valid game rows
+    usports_clean = usports_sched[
+        ~usports_sched['V1'].isin(['Away', 'Home']) &
+        ~usports_sched['V1'].str.match("^[A-Za-z]+$") &
+        ~usports_sched['V1'].str.match(r'^\w+\.\s*\d+$') &
+        ~((usports_sched['V2'] == '') &
+          (usports_sched['V3'] == '') &
+          (usports_sched['V4'] == '') &
+          (usports_sched['V5'] == ''))].copy()
+
+    # Extract day safely from DayText
+    usports_clean['Day'] = usports_clean['DayText'].str.extract(r'\D*(\d+)$').astype(float)
+
+    # Infer year based on month and season
+    first_year, second_year = season_years(season)
+    usports_clean['Year'] = np.where(usports_clean['Month'].isin(FIRST_YEAR_MONTHS), first_year, second_year)
+
+    # Convert full month name to number (strip leading/trailing whitespace just in case)
+    usports_clean['Month_Num'] = usports_clean['Month'].map(
+        lambda m: datetime.strptime(m.strip(), "%B").month if pd.notnull(m) else np.nan)
+
+    # Construct ISO date string: YYYY-MM-DD
+    usports_clean['Date_Str'] = (
+        usports_clean['Year'].astype(int).astype(str) + "-" +
+        usports_clean['Month_Num'].astype('Int64').astype(str).str.zfill(2) + "-" +
+        usports_clean['Day'].astype('Int64').astype(str).str.zfill(2))
+
+    # Convert final date string to datetime object
+    usports_clean['Date'] = pd.to_datetime(
+        usports_clean['Date_Str'], format="%Y-%m-%d", errors="coerce")
+
+    # Rename and subset
+    usports_clean = usports_clean.rename(columns={'V1': 'Away', 'V2': 'Home'})
+    usports_clean = usports_clean[['Date', 'Away', 'Home']].copy()
+
+    # Split out team names and scores
+    usports_clean['Away_Team'] = usports_clean['Away'].str.replace(r'\d+$', '', regex=True).str.strip()
+    usports_clean['Away_Score'] = usports_clean['Away'].str.extract(r'(\d+)$')[0].astype('Int64')
+
+    usports_clean['Home_Team'] = usports_clean['Home'].str.replace(r'\d+$', '', regex=True).str.strip()
+    usports_clean['Home_Score'] = usports_clean['Home'].str.extract(r'(\d+)$')[0].astype('Int64')
+
+    # Drop games that were not played
+    played = usports_clean['Away_Score'].notna() & usports_clean['Home_Score'].notna()
+    if not played.all():
+        logger.debug("Dropping %d games without a final score from %s", (~played).sum(), schedule_path)
+    usports_clean = usports_clean.loc[played, ['Date', 'Away_Team', 'Away_Score', 'Home_Team', 'Home_Score']]
+    usports_clean = usports_clean.astype({'Away_Score': int, 'Home_Score': int})
+    return usports_clean.reset_index(drop=True)
+
+SCHEDULE_PARSERS = {"stream": parse_schedule_stream, "columns": parse_schedule_columns}
+DEFAULT_SCHEDULE_PARSER = "stream"
+
+def parse_schedule(schedule_path, season, engine=DEFAULT_SCHEDULE_PARSER, registry=None):
+    """
+    Parse one season's schedule with a parser from SCHEDULE_PARSERS and
+    resolve its team names through the team registry: Away_Id / Home_Id are
+    the team ids (UNKNOWN_TEAM if unresolved) and Away_Team / Home_Team the
+    registry's names (NaN if unresolved).
+    """
+    games = SCHEDULE_PARSERS[engine](schedule_path, season)
+    registry = registry or load_team_registry()
+    for side in ('Away', 'Home'):
+        team_ids = registry.ids(games[f'{side}_Team'])
+        games[f'{side}_Team'] = registry.names_of(team_ids)
+        games[f'{side}_Id'] = team_ids
+    return games
+
+def compare_schedule_parsers(schedule_dir=".", engines=("columns", "stream"), repeats=20):
+    """
+    Run every USportsSched_<season>.csv through each schedule parser, check
+    that they give the same games and log the average ms per file.
+    Returns {engine: avg ms per schedule}.
+    """
+    schedules = [(schedule_season(path), path)
+                 for path in sorted(glob.glob(os.path.join(schedule_dir, SCHEDULE_GLOB)))
+                 if schedule_season(path)]
+    if not schedules:
+        logger.warning("No schedules found (%s in %s)", SCHEDULE_GLOB, schedule_dir)
+        return {}
+    totals = {engine: 0.0 for engine in engines}
+    for season, path in schedules:
+        outputs = []
+        for engine in engines:
+            start = time.perf_counter()
+            for _ in range(repeats):
+                games = parse_schedule(path, season, engine)
+            totals[engine] += time.perf_counter() - start
+            outputs.append(games)
+        if not all(games.equals(outputs[0]) for games in outputs[1:]):
+            logger.warning("Schedule parsers disagree on %s", path)
+    avg_ms = {engine: totals[engine] / (len(schedules) * repeats) * 1000 for engine in engines}
+    logger.info("Schedule parsing over %d file(s):", len(schedules))
+    for engine in engines:
+        logger.info("   • %s: %.2f ms per schedule", engine, avg_ms[engine])
+    return avg_ms
 
 # Determine Home/Away
-def determine_home_away(row):
-     games_today = usports_clean[usports_clean['Date'] == row['Date']]
-     if row['Team'] in games_today['Home_Team'].values:
-         return 'Home'
-     elif row['Team'] in games_today['Away_Team'].values:
-         return 'Away'
-     else:
-         return np.nan
-
-jerrysFile['HomeAway'] = jerrysFile.apply(determine_home_away, axis=1)
-
-# Export cleaned data
-jerrysFile.to_csv("2024-25DataCleanFinalPython.csv", index=False) # INSERT DESIRED EXPORT FILE NAME HERE!
+def home_away_table(schedule):
+    """
+    Reshape the schedule into one row per (Date, team id) holding the side
+    the team played on that day, indexed for the join in determine_home_away.
+    A team listed as the home team in any game that day is 'Home' (home
+    teams are checked first, as the old row-by-row lookup did).
+    """
+    sides = pd.concat([
+        pd.DataFrame({'Date': schedule['Date'], 'Team_Id': schedule['Home_Id'], 'HomeAway': 'Home'}),
+        pd.DataFrame({'Date': schedule['Date'], 'Team_Id': schedule['Away_Id'], 'HomeAway': 'Away'}),
+    ], ignore_index=True)
+    sides = sides[sides['Date'].notna() & (sides['Team_Id'] != UNKNOWN_TEAM)]
+    return sides.drop_duplicates(['Date', 'Team_Id']).set_index(['Date', 'Team_Id'])['HomeAway']
+
+def determine_home_away(player_games, schedule, registry=None):
+    """
+    Home/Away of every player-game row, by an indexed join on (Date, team id)
+    against the reshaped schedule. Rows whose team has no scheduled game that
+    day (exhibitions, unresolved team names) get NaN.
+    """
+    registry = registry or load_team_registry()
+    keys = pd.MultiIndex.from_arrays([player_games['Date'], registry.ids(player_games['Team'])])
+    return home_away_table(schedule).reindex(keys).to_numpy()
+
+def clean_player_games(player_games, schedule, registry=None):
+    """
+    Drop games against non-Canadian opponents and add the HomeAway column
+    (from the parsed schedule) to a season of processed player games.
+    """
+    registry = registry or load_team_registry()
+
+    # Filter out non-Canadian teams
+    cleaned = player_games[registry.is_canadian(registry.ids(player_games['Opponent']))].copy()
+
+    # Standardize dates
+    cleaned['Date'] = pd.to_datetime(cleaned['Date'])
+
+    cleaned['HomeAway'] = determine_home_away(cleaned, schedule, registry)
+    return cleaned
+
+def cleaned_path(season, output_dir="PlayerDataHomeAway"):
+    """Output CSV path of one cleaned season (a typed .parquet copy sits next to it)"""
+    return os.path.join(output_dir, f"{season}PlayerGameDataFinal.csv")
+
+def clean_season(season, schedule_path, processed_path, output_dir="PlayerDataHomeAway"):
+    """
+    Clean one season (one pool task): load its processed player games (the
+    typed Parquet copy when present), parse its schedule, assign Home/Away
+    and write <output_dir>/<season>PlayerGameDataFinal.csv (+ .parquet).
+    Returns a dict with the saved 'path', the number of 'rows', the seconds
+    spent in each stage under 'stages', the team names the registry could
+    not resolve under 'unresolved' ({name: rows}), and 'error' (the
+    exception, or None).
+    """
+    result = {'path': None, 'rows': 0, 'stages': {}, 'unresolved': {}, 'error': None}
+    registry = load_team_registry()
+    registry.take_unresolved()
+    try:
+        start = time.perf_counter()
+        player_games = load_processed_data(processed_path)
+        schedule = parse_schedule(schedule_path, season, registry=registry)
+        result['stages']['load'] = time.perf_counter() - start
+        logger.info("%s: %d player games, %d scheduled games", season, len(player_games), len(schedule))
+
+        start = time.perf_counter()
+        cleaned = clean_player_games(player_games, schedule, registry)
+        result['rows'] = len(cleaned)
+        result['stages']['clean'] = time.perf_counter() - start
+
+        # Export cleaned data
+        start = time.perf_counter()
+        os.makedirs(output_dir, exist_ok=True)
+        result['path'] = cleaned_path(season, output_dir)
+        cleaned.to_csv(result['path'], index=False)
+        if HAVE_PYARROW:
+            save_typed_parquet(cleaned, os.path.splitext(result['path'])[0] + ".parquet")
+        result['stages']['save'] = time.perf_counter() - start
+        logger.info("%s: %d rows (%d without Home/Away) saved to %s", season, len(cleaned),
+                    cleaned['HomeAway'].isna().sum(), result['path'])
+    except Exception as e:
+        result['error'] = e
+    result['unresolved'] = registry.take_unresolved()
+    return result
+
+def find_seasons(schedule_dir=".", processed_dir="PlayerDataProcessed"):
+    """
+    Pair every USportsSched_<season>.csv in schedule_dir with the processed
+    player games of that season (playerGameData<season>_processed.csv or
+    .parquet in processed_dir). Returns [(season, schedule path, processed
+    path)] sorted by season; schedules without processed data are skipped
+    with a warning.
+    """
+    seasons = []
+    for schedule_path in sorted(glob.glob(os.path.join(schedule_dir, SCHEDULE_GLOB))):
+        season = schedule_season(schedule_path)
+        if season is None:
+            logger.warning("Skipping %s: no season in its name", schedule_path)
+            continue
+        processed_path = os.path.join(processed_dir, f"playerGameData{season}_processed.csv")
+        if not any(os.path.exists(os.path.splitext(processed_path)[0] + ext) for ext in (".csv", ".parquet")):
+            logger.warning("Skipping %s: no processed player data for %s in %s", schedule_path, season, processed_dir)
+            continue
+        seasons.append((season, schedule_path, processed_path))
+    return seasons
+
+def clean_all_seasons(schedule_dir=".", processed_dir="PlayerDataProcessed", output_dir="PlayerDataHomeAway",
+                      workers=DEFAULT_WORKERS):
+    """
+    Clean every season that has both a schedule and processed player data
+    (see find_seasons), `workers` seasons at a time in a process pool
+    (workers=1 cleans them one by one in this process). A season that fails
+    does not stop the others; its error is logged and collected.
+    Time and rows of each stage (load, clean, save), failures by exception
+    type, the error of each failed season and the team names the registry
+    could not resolve are written to <output_dir>/clean_run_report.json.
+    Returns the list of cleaned files.
+    """
+    seasons = find_seasons(schedule_dir, processed_dir)
+    if not seasons:
+        logger.warning("No schedules with processed player data found (%s in %s)", SCHEDULE_GLOB, schedule_dir)
+        return []
+
+    workers = max(1, min(workers, len(seasons)))
+    logger.info("Cleaning %d season(s) with %d worker(s): %s", len(seasons), workers,
+                ", ".join(season for season, _, _ in seasons))
+
+    metrics = RunMetrics("clean")
+    cleaned_files = []
+    executor = None
+    if workers == 1:
+        results = (clean_season(season, schedule_path, processed_path, output_dir)
+                   for season, schedule_path, processed_path in seasons)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                       initargs=(logging.getLogger().getEffectiveLevel(),))
+        results = collect_results([executor.submit(clean_season, season, schedule_path, processed_path, output_dir)
+                                   for season, schedule_path, processed_path in seasons])
+    unresolved = Counter()
+    try:
+        for (season, _, _), result in zip(seasons, results):
+            unresolved.update(result.get('unresolved', {}))
+            if result['error'] is not None:
+                logger.error("Failed cleaning %s: %s", season, result['error'])
+                metrics.record_error(season, result['error'])
+                continue
+            for stage, seconds in result['stages'].items():
+                metrics.add_stage(stage, seconds, result['rows'])
+            cleaned_files.append(result['path'])
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    metrics.count("seasons_cleaned", len(cleaned_files))
+    metrics.note("unresolved_teams", load_team_registry().report_unresolved(unresolved))
+    report_path = metrics.write_report(os.path.join(output_dir, "clean_run_report.json"))
+    logger.info("CLEANING COMPLETE! Cleaned files created: %s", ", ".join(cleaned_files) or "none")
+    if metrics.errors:
+        logger.warning("%d season(s) failed: %s", len(metrics.errors),
+                       "; ".join(f"{name} ({error})" for name, error in metrics.errors.items()))
+    logger.info("Run report saved to: %s", report_path)
+    return cleaned_files
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assign Home/Away to every season's processed player games")
+    parser.add_argument("--schedule-dir", default=".", help=f"directory with the {SCHEDULE_GLOB} schedules")
+    parser.add_argument("--processed-dir", default="PlayerDataProcessed",
+                        help="directory with the processed player-game files")
+    parser.add_argument("--output-dir", default="PlayerDataHomeAway", help="directory for the cleaned seasons")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="number of seasons cleaned in parallel (1 = no process pool)")
+    parser.add_argument("--compare-parsers", action="store_true",
+                        help="check the schedule parsers against each other on every schedule and exit")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(quiet=args.quiet, verbose=args.verbose)
+    if args.compare_parsers:
+        compare_schedule_parsers(args.schedule_dir)
+    else:
+        clean_all_seasons(args.schedule_dir, args.processed_dir, args.output_dir, args.workers)